@@ -0,0 +1 @@
+python3 bench/bench.py "$@"
\ No newline at end of file
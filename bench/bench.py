@@ -0,0 +1,346 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from build import BuildConfig, build_site  # noqa: E402
+from htmlnode import HTMLNode, LeafNode, ParentNode, intern_props  # noqa: E402
+from textnode import TextNode, TextType, text_node_to_html_node, text_nodes_to_html  # noqa: E402
+
+SEED = 1234
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+# name -> setup(scale) returning the zero-argument callable that is timed
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def inline_nodes(rng, count):
+    nodes = []
+    for i in range(count):
+        kind = i % 6
+        if kind == 0:
+            nodes.append(TextNode(words(rng, 6) + " ", TextType.TEXT))
+        elif kind == 1:
+            nodes.append(TextNode(words(rng, 2), TextType.BOLD))
+        elif kind == 2:
+            nodes.append(TextNode(words(rng, 2), TextType.ITALIC))
+        elif kind == 3:
+            nodes.append(TextNode(words(rng, 1), TextType.CODE))
+        elif kind == 4:
+            nodes.append(TextNode(words(rng, 2), TextType.LINK, f"/docs/{rng.randrange(1000)}"))
+        else:
+            nodes.append(TextNode(words(rng, 3), TextType.IMAGE, f"/img/{rng.randrange(1000)}.png"))
+    return nodes
+
+
+def page_markdown(rng, number):
+    blocks = [f"# Page {number}"]
+    for _ in range(8):
+        blocks.append(
+            f"{words(rng, 12)} **{words(rng, 2)}** {words(rng, 8)} _{words(rng, 2)}_ "
+            f"[{words(rng, 2)}](/page/{rng.randrange(10000)}) `{rng.choice(WORDS)}` {words(rng, 10)}"
+        )
+    blocks.append("\n".join(f"- {words(rng, 5)}" for _ in range(5)))
+    blocks.append("```\n" + "\n".join(words(rng, 6) for _ in range(4)) + "\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+@scenario("leaf_to_html")
+def leaf_to_html(scale):
+    rng = random.Random(SEED)
+    leaves = [LeafNode(rng.choice(["b", "i", "span", None]), words(rng, 4)) for _ in range(int(50000 * scale))]
+
+    def run():
+        for leaf in leaves:
+            leaf.to_html()
+    return run
+
+
+@scenario("wide_tree")
+def wide_tree(scale):
+    rng = random.Random(SEED)
+    node = ParentNode("ul", [LeafNode("li", words(rng, 3)) for _ in range(int(100000 * scale))])
+    return node.to_html
+
+
+@scenario("deep_tree")
+def deep_tree(scale):
+    node = LeafNode("span", "leaf")
+    for i in range(int(20000 * scale)):
+        node = ParentNode("div", [LeafNode(None, str(i)), node])
+    return node.to_html
+
+
+@scenario("props_heavy")
+def props_heavy(scale):
+    rng = random.Random(SEED)
+    nodes = []
+    for i in range(int(20000 * scale)):
+        props = {"class": rng.choice(["nav", "item", "link active"]), "id": f"n{i}"}
+        if i % 3 == 0:
+            props.update({"href": f"/page/{i}?ref=nav", "title": words(rng, 3), "data-index": str(i)})
+        nodes.append(HTMLNode("a", "x", None, props))
+
+    def run():
+        for node in nodes:
+            node.props_to_html()
+    return run
+
+
+@scenario("props_shared")
+def props_shared(scale):
+    # Separate but equal class-only dicts, as most node trees are built.
+    rng = random.Random(SEED)
+    classes = ["nav", "item", "link active", "kw", "str", "com"]
+    nodes = [HTMLNode("span", "x", None, {"class": rng.choice(classes)}) for _ in range(int(20000 * scale))]
+
+    def run():
+        for node in nodes:
+            node.props_to_html()
+    return run
+
+
+@scenario("props_interned")
+def props_interned(scale):
+    # Shared class-only props, as emitted for highlighted or styled spans.
+    rng = random.Random(SEED)
+    classes = ["nav", "item", "link active", "kw", "str", "com"]
+    nodes = [HTMLNode("span", "x", None, intern_props({"class": rng.choice(classes)})) for _ in range(int(20000 * scale))]
+
+    def run():
+        for node in nodes:
+            node.props_to_html()
+    return run
+
+
+@scenario("inline_paragraph")
+def inline_paragraph(scale):
+    rng = random.Random(SEED)
+    paragraphs = [inline_nodes(rng, 60) for _ in range(int(1000 * scale))]
+
+    def run():
+        for paragraph in paragraphs:
+            ParentNode("p", [text_node_to_html_node(node) for node in paragraph]).to_html()
+    return run
+
+
+@scenario("inline_paragraph_batch")
+def inline_paragraph_batch(scale):
+    # Same corpus as inline_paragraph, rendered through the string batch path.
+    rng = random.Random(SEED)
+    paragraphs = [inline_nodes(rng, 60) for _ in range(int(1000 * scale))]
+
+    def run():
+        for paragraph in paragraphs:
+            "<p>" + text_nodes_to_html(paragraph) + "</p>"
+    return run
+
+
+def make_site(root, pages):
+    # Writes a synthetic site under root; returns the build_site config
+    # and the equivalent main.py build arguments.
+    rng = random.Random(SEED)
+    content_dir = os.path.join(root, "content")
+    for i in range(pages):
+        path = os.path.join(content_dir, f"section{i % 50}", f"page{i}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(page_markdown(rng, i))
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write("<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>")
+    config = BuildConfig(
+        content_dir=content_dir,
+        template_path=template_path,
+        static_dir=os.path.join(root, "static"),
+        public_dir=os.path.join(root, "public"),
+        cache_dir=os.path.join(root, ".cache"),
+    )
+    args = [
+        "--content", config.content_dir,
+        "--template", config.template_path,
+        "--static", config.static_dir,
+        "--public", config.public_dir,
+        "--cache-dir", config.cache_dir,
+    ]
+    return config, args
+
+
+@scenario("site_10k")
+def site_10k(scale):
+    root = tempfile.mkdtemp(prefix="ssg-bench-")
+    config, _ = make_site(root, int(10000 * scale))
+    config.force = True
+
+    def run():
+        build_site(config)
+    run.cleanup = lambda: shutil.rmtree(root)
+    return run
+
+
+def edit_page(path, counter):
+    # A real one-page change: the page gets new text every run.
+    counter[0] += 1
+    with open(path, "w") as f:
+        f.write(f"# Edited page\n\nEdit number {counter[0]}\n")
+
+
+@scenario("edit_cold")
+def edit_cold(scale):
+    # One edited page rebuilt the way a plain ./main.sh call does it:
+    # interpreter startup, imports and loading the build state included.
+    root = tempfile.mkdtemp(prefix="ssg-bench-")
+    config, args = make_site(root, int(2000 * scale))
+    build_site(config)
+    page = os.path.join(config.content_dir, "section0", "page0.md")
+    command = [sys.executable, os.path.join(SRC_DIR, "main.py"), "build", *args]
+    counter = [0]
+
+    def run():
+        edit_page(page, counter)
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    run.cleanup = lambda: shutil.rmtree(root)
+    return run
+
+
+@scenario("edit_warm")
+def edit_warm(scale):
+    # The same edit sent by client.py to a running daemon.
+    root = tempfile.mkdtemp(prefix="ssg-bench-")
+    config, args = make_site(root, int(2000 * scale))
+    socket_path = os.path.join(root, "daemon.sock")
+    daemon = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, "main.py"), "daemon", *args, "--socket", socket_path],
+        stdout=subprocess.DEVNULL,
+    )
+    while not os.path.exists(socket_path):
+        if daemon.poll() is not None:
+            raise RuntimeError("daemon exited")
+        time.sleep(0.01)
+    page = os.path.join(config.content_dir, "section0", "page0.md")
+    client = [sys.executable, os.path.join(SRC_DIR, "client.py")]
+    command = [*client, "build", page, "--socket", socket_path]
+    counter = [0]
+
+    def run():
+        edit_page(page, counter)
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+    def cleanup():
+        subprocess.run([*client, "stop", "--socket", socket_path], stdout=subprocess.DEVNULL)
+        daemon.wait()
+        shutil.rmtree(root)
+    run.cleanup = cleanup
+    return run
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer: {text!r}")
+    return value
+
+
+def run_scenario(name, scale, warmup, repeats):
+    run = SCENARIOS[name](scale)
+    try:
+        for _ in range(warmup):
+            run()
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    finally:
+        cleanup = getattr(run, "cleanup", None)
+        if cleanup is not None:
+            cleanup()
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "times": times,
+    }
+
+
+def compare(results, baseline, threshold):
+    # Returns (name, baseline median, current median, ratio, regressed)
+    # for every scenario present in both result sets.
+    rows = []
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        ratio = current["median"] / previous["median"]
+        rows.append((name, previous["median"], current["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every corpus size by this factor")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=positive_int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail if a scenario regressed against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown for --compare (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "warmup": args.warmup,
+        "repeats": args.repeats,
+        "scenarios": {},
+    }
+    for name in args.scenario or list(SCENARIOS):
+        result = run_scenario(name, args.scale, args.warmup, args.repeats)
+        results["scenarios"][name] = result
+        print(f"{name:>20}: median {result['median'] * 1000:9.2f} ms  min {result['min'] * 1000:9.2f} ms", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    elif not args.compare:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failed = False
+        for name, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+            status = "REGRESSED" if regressed else "ok"
+            print(f"{name:>20}: {before * 1000:9.2f} ms -> {after * 1000:9.2f} ms ({ratio - 1:+.1%}) {status}")
+            failed = failed or regressed
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
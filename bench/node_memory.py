@@ -0,0 +1,82 @@
+# Measures peak RSS per 10k nodes for the node representations. Each
+# variant runs in a fresh interpreter so ru_maxrss only reflects that
+# variant's allocations.
+import os
+import resource
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+VARIANTS = ("dict", "slots", "arena")
+PARAGRAPHS = 25000  # 4 nodes per paragraph, 100k nodes in total
+
+
+class DictNode:
+    # The pre-__slots__ layout, kept here as the "before" baseline.
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def build_tree(leaf_cls, parent_cls):
+    paragraphs = []
+    for i in range(PARAGRAPHS):
+        paragraphs.append(
+            parent_cls(
+                "p",
+                [
+                    leaf_cls(None, f"Paragraph {i} with "),
+                    leaf_cls("a", "a link", {"href": f"/page/{i}"}),
+                    leaf_cls("b", "bold text"),
+                ],
+            )
+        )
+    return parent_cls("div", paragraphs), PARAGRAPHS * 4 + 1
+
+
+def measure(variant):
+    from htmlnode import LeafNode, ParentNode
+    from nodearena import NodeArena
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if variant == "dict":
+        root, count = build_tree(
+            lambda tag, value, props=None: DictNode(tag, value, None, props),
+            lambda tag, children, props=None: DictNode(tag, None, children, props),
+        )
+    elif variant == "slots":
+        root, count = build_tree(LeafNode, ParentNode)
+    else:
+        root = NodeArena()
+        _, count = build_tree(
+            root.leaf,
+            lambda tag, children, props=None: root.parent(tag, children, props),
+        )
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux
+    return (after - before) / (count / 10000)
+
+
+def main():
+    if len(sys.argv) == 2:
+        print(f"{measure(sys.argv[1]):.1f}")
+        return
+    results = {}
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, variant],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        results[variant] = float(output.stdout)
+    for variant in VARIANTS:
+        print(f"{variant:>6}: {results[variant]:8.1f} KiB peak RSS per 10k nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import errno
+import hashlib
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Errors meaning the fast copy path isn't available for this pair of
+# files, so the next strategy should be tried.
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+class AssetSyncResult:
+    def __init__(self):
+        self.copied = []
+        self.linked = []
+        self.skipped = 0
+        self.deleted = []
+        self.bytes_copied = 0
+        self.bytes_skipped = 0
+        # rel path -> manifest entry for every asset now in public/
+        self.assets = {}
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_contents(src_fd, dst_fd, size):
+    # Let the kernel move the bytes where possible (copy_file_range can
+    # even share extents on CoW filesystems), falling back to sendfile and
+    # finally to a userspace copy.
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                sent = os.copy_file_range(src_fd, dst_fd, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while copied < size:
+                sent = os.sendfile(dst_fd, src_fd, copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+    os.lseek(src_fd, copied, os.SEEK_SET)
+    os.lseek(dst_fd, copied, os.SEEK_SET)
+    with open(src_fd, "rb", closefd=False) as fsrc, open(dst_fd, "wb", closefd=False) as fdst:
+        shutil.copyfileobj(fsrc, fdst)
+
+
+def copy_asset(source_path, output_path, st, link=False):
+    # Copies (or hardlinks) through a temporary name so a reader never sees
+    # a half-written file, and keeps the source mtime so the next sync can
+    # skip it by size+mtime. Returns True if a hardlink was made.
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.tmp{os.getpid()}"
+    if link:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(source_path, tmp_path)
+            os.replace(tmp_path, output_path)
+            return True
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS and e.errno not in (errno.EPERM, errno.EMLINK):
+                raise
+    src_fd = os.open(source_path, os.O_RDONLY)
+    try:
+        dst_fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, st.st_mode & 0o777)
+        try:
+            _copy_contents(src_fd, dst_fd, st.st_size)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp_path, output_path)
+    return False
+
+
+def _unchanged(source_path, output_path, st, checksum):
+    try:
+        out = os.stat(output_path)
+    except FileNotFoundError:
+        return False
+    if out.st_size != st.st_size:
+        return False
+    if checksum:
+        return file_digest(source_path) == file_digest(output_path)
+    return out.st_mtime_ns == st.st_mtime_ns
+
+
+def sync_assets(files, public_dir, previous, checksum=False, link=False, force=False, workers=8):
+    # files yields (rel path, source path) pairs; previous is the asset
+    # section of the last manifest and decides which outputs are orphans.
+    # Outputs are compared by size+mtime (or by content with checksum=True)
+    # and only changed files are copied, fanned out over a thread pool;
+    # force copies everything.
+    result = AssetSyncResult()
+    jobs = []
+    for rel_path, source_path in files:
+        st = os.stat(source_path)
+        output_path = os.path.join(public_dir, rel_path)
+        result.assets[rel_path] = {"size": st.st_size}
+        if not force and _unchanged(source_path, output_path, st, checksum):
+            result.skipped += 1
+            result.bytes_skipped += st.st_size
+            continue
+        jobs.append((rel_path, source_path, output_path, st))
+
+    def run(job):
+        rel_path, source_path, output_path, st = job
+        return copy_asset(source_path, output_path, st, link)
+
+    if len(jobs) > 1 and workers > 1:
+        with ThreadPoolExecutor(min(workers, len(jobs))) as executor:
+            linked = list(executor.map(run, jobs))
+    else:
+        linked = [run(job) for job in jobs]
+    for (rel_path, _, _, st), was_linked in zip(jobs, linked):
+        if was_linked:
+            result.linked.append(rel_path)
+        else:
+            result.copied.append(rel_path)
+            result.bytes_copied += st.st_size
+
+    result.deleted = sorted(set(previous) - set(result.assets))
+    return result
@@ -0,0 +1,252 @@
+import html
+import re
+from enum import Enum
+
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import iter_textnodes
+from textnode import TextNode, TextType, text_node_to_html_node, text_nodes_to_html, text_nodes_to_html_nodes
+
+
+class BlockType(Enum):
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
+
+
+_HEADING = re.compile(r"(#{1,6}) ")
+_ORDERED_ITEM = re.compile(r"\d+\. ")
+_NOT_SLUG = re.compile(r"[^\w]+")
+_FENCE = "```"
+
+# Version of the parse_block output format; cached parses from any other
+# version are ignored (see parse_cache.py).
+PARSER_VERSION = 3
+
+
+def _is_fence(line):
+    return line.lstrip().startswith(_FENCE)
+
+
+class MarkdownError(ValueError):
+    # Invalid inline syntax, at a 1-based line of the source.
+    def __init__(self, message, line):
+        super().__init__(message, line)
+        self.message = message
+        self.line = line
+
+    def __str__(self):
+        return f"line {self.line}: {self.message}"
+
+
+def iter_blocks(lines, starts=None):
+    # Groups an iterable of lines (a file object works) into blocks, each a
+    # list of lines without line endings. Blocks are separated by blank
+    # lines, except inside ``` fences; a heading is always a block of its
+    # own. Only the block being collected is held in memory. Given a list,
+    # starts gets the line number each block starts on, appended before
+    # the block is yielded.
+    block = []
+    in_code = False
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if in_code:
+            block.append(line)
+            if _is_fence(line):
+                yield block
+                block = []
+                in_code = False
+            continue
+        stripped = line.strip()
+        if not stripped:
+            if block:
+                yield block
+                block = []
+        elif stripped.startswith(_FENCE):
+            if block:
+                yield block
+            block = [stripped]
+            in_code = True
+            if starts is not None:
+                starts.append(number)
+        elif _HEADING.match(stripped):
+            if block:
+                yield block
+                block = []
+            if starts is not None:
+                starts.append(number)
+            yield [stripped]
+        else:
+            if not block and starts is not None:
+                starts.append(number)
+            block.append(stripped)
+    if block:
+        yield block
+
+
+def block_to_block_type(block):
+    first = block[0]
+    if _HEADING.match(first):
+        return BlockType.HEADING
+    if first.startswith(_FENCE):
+        return BlockType.CODE
+    if all(line.startswith(">") for line in block):
+        return BlockType.QUOTE
+    if all(line.startswith(("- ", "* ")) for line in block):
+        return BlockType.UNORDERED_LIST
+    if all(_ORDERED_ITEM.match(line) for line in block):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def heading_id(nodes):
+    # Anchor id of a heading from its text: "Setup & *Usage*" -> "setup-usage".
+    # A heading with nothing to slug gets no id.
+    text = "".join(node.text for node in nodes)
+    return _NOT_SLUG.sub("-", text.lower()).strip("-_")
+
+
+def unique_heading_id(nodes, used):
+    # heading_id(nodes), made unique on the page: a repeated "usage" becomes
+    # "usage-1", "usage-2", ... used is the set of ids the page has handed
+    # out so far and gets the new one added.
+    anchor = heading_id(nodes)
+    if anchor:
+        if anchor in used:
+            n = 1
+            while f"{anchor}-{n}" in used:
+                n += 1
+            anchor = f"{anchor}-{n}"
+        used.add(anchor)
+    return anchor
+
+
+def parse_block(block):
+    # Parsed form of a block: (tag, content). content is the list of inline
+    # TextNodes, a list of them per item for "ul"/"ol", or (language, raw
+    # code text) for "pre", language being the first word after the
+    # opening fence ("" if none). Bump PARSER_VERSION whenever this output
+    # changes.
+    block_type = block_to_block_type(block)
+    if block_type == BlockType.HEADING:
+        level = len(_HEADING.match(block[0]).group(1))
+        return f"h{level}", list(iter_textnodes(block[0][level + 1:]))
+    if block_type == BlockType.CODE:
+        lines = block[1:]
+        if lines and _is_fence(lines[-1]):
+            lines = lines[:-1]
+        info = block[0][len(_FENCE):].split(maxsplit=1)
+        return "pre", (info[0] if info else "", "".join(line + "\n" for line in lines))
+    if block_type == BlockType.QUOTE:
+        text = " ".join(line[1:].strip() for line in block)
+        return "blockquote", list(iter_textnodes(text))
+    if block_type == BlockType.UNORDERED_LIST:
+        return "ul", [list(iter_textnodes(line[2:])) for line in block]
+    if block_type == BlockType.ORDERED_LIST:
+        return "ol", [list(iter_textnodes(line[_ORDERED_ITEM.match(line).end():])) for line in block]
+    return "p", list(iter_textnodes(" ".join(block)))
+
+
+def render_block(parsed, highlighter=None, used=None):
+    # highlighter(language, code) returns the code as highlighted HTML, or
+    # None for a language it doesn't know (see highlight.HighlightCache).
+    # Without one, code blocks render as plain escaped text. used is as for
+    # block_to_html_node.
+    tag, content = parsed
+    if tag == "pre":
+        language, code = content
+        if highlighter is not None and language:
+            highlighted = highlighter(language, code)
+            if highlighted is not None:
+                return f'<pre><code class="language-{html.escape(language)}">{highlighted}</code></pre>'
+        return f"<pre><code>{html.escape(code, quote=False)}</code></pre>"
+    if tag == "ul" or tag == "ol":
+        items = "".join(f"<li>{text_nodes_to_html(item)}</li>" for item in content)
+        return f"<{tag}>{items}</{tag}>"
+    if tag[0] == "h":
+        anchor = heading_id(content) if used is None else unique_heading_id(content, used)
+        if anchor:
+            return f'<{tag} id="{anchor}">{text_nodes_to_html(content)}</{tag}>'
+    return f"<{tag}>{text_nodes_to_html(content)}</{tag}>"
+
+
+def block_to_html(block, used=None):
+    # String twin of block_to_html_node(block, used).to_html(): inline text
+    # goes through text_nodes_to_html, so no nodes are built at all.
+    return render_block(parse_block(block), used=used)
+
+
+def _children(nodes):
+    children = text_nodes_to_html_nodes(nodes)
+    if not children:
+        return [LeafNode(None, "")]
+    return children
+
+
+def parsed_to_html_node(parsed, used=None):
+    # Node tree of a parsed block (see parse_block), rendering the same HTML
+    # as render_block(parsed, used=used).
+    tag, content = parsed
+    if tag == "pre":
+        code = html.escape(content[1], quote=False)
+        return ParentNode("pre", [text_node_to_html_node(TextNode(code, TextType.CODE))])
+    if tag == "ul" or tag == "ol":
+        return ParentNode(tag, [ParentNode("li", _children(item)) for item in content])
+    props = None
+    if tag[0] == "h":
+        anchor = heading_id(content) if used is None else unique_heading_id(content, used)
+        if anchor:
+            props = {"id": anchor}
+    return ParentNode(tag, _children(content), props)
+
+
+def block_to_html_node(block, used=None):
+    # used: the heading ids given out so far on the page (see
+    # unique_heading_id); without it heading ids aren't deduplicated.
+    return parsed_to_html_node(parse_block(block), used)
+
+
+def parse_markdown(markdown):
+    # Raises MarkdownError, with the line of the offending block, for
+    # invalid inline syntax.
+    starts = []
+    try:
+        return [parse_block(block) for block in iter_blocks(markdown.splitlines(), starts)]
+    except ValueError as e:
+        raise MarkdownError(str(e), starts[-1]) from None
+
+
+def render_markdown(parsed, highlighter=None):
+    used = set()
+    return "<div>" + "".join(render_block(block, highlighter, used) for block in parsed) + "</div>"
+
+
+def iter_block_nodes(lines):
+    used = set()
+    for block in iter_blocks(lines):
+        yield block_to_html_node(block, used)
+
+
+def markdown_to_html_node(markdown):
+    children = list(iter_block_nodes(markdown.splitlines()))
+    if not children:
+        children = [LeafNode(None, "")]
+    return ParentNode("div", children)
+
+
+def markdown_to_html(markdown):
+    # Same HTML as markdown_to_html_node(markdown).to_html(), rendered
+    # straight to a string for callers that never look at the tree.
+    return render_markdown(parse_markdown(markdown))
+
+
+def write_markdown_html(lines, fp):
+    # Streams the same HTML as markdown_to_html_node(...).to_html() one
+    # top-level block at a time, so neither the whole document nor the
+    # whole tree is ever held in memory.
+    fp.write("<div>")
+    for node in iter_block_nodes(lines):
+        node.write_html(fp)
+    fp.write("</div>")
@@ -0,0 +1,1028 @@
+import collections
+import itertools
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from assets import sync_assets
+from block_markdown import MarkdownError, parse_markdown, render_markdown
+from compress import DEFAULT_MAX_RATIO, DEFAULT_MIN_SIZE, compress_outputs, remove_variants
+from depgraph import FRAGMENT, HIGHLIGHT, LINK, PAGE, TEMPLATE, TITLE, DepGraph
+from highlight import DEFAULT_CACHE_BYTES, HIGHLIGHT_VERSION, LANGUAGE_RULES, HighlightCache, language_name
+from links import LinkIndex, output_path_for, page_for_url, page_links
+from manifest import Manifest, content_hash, stat_key
+from parse_cache import DEFAULT_MAX_BYTES, ParseCache
+from template import load_template
+from textnode import TextType
+from search import SearchIndex, page_terms
+from tracing import NULL_TRACER, Tracer
+from writer import OutputWriter, write_output
+
+# Upper bound on pages per task sent to a worker process.
+BATCH_SIZE = 64
+# Pages rendered but not yet written (or out at the workers) at once.
+DEFAULT_MAX_IN_FLIGHT = 256
+
+
+class BuildConfig:
+    def __init__(
+        self,
+        content_dir="content",
+        template_path="template.html",
+        static_dir="static",
+        public_dir="public",
+        cache_dir=".cache",
+        force=False,
+        jobs=1,
+        asset_checksum=False,
+        asset_links=False,
+        parse_cache=True,
+        parse_cache_size=DEFAULT_MAX_BYTES,
+        io_threads=4,
+        compress=False,
+        compress_deflate=False,
+        compress_min_size=DEFAULT_MIN_SIZE,
+        compress_max_ratio=DEFAULT_MAX_RATIO,
+        search=False,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        highlight=True,
+        highlight_cache_size=DEFAULT_CACHE_BYTES,
+        check_links=False,
+        check_assets=False,
+        base_url=None,
+    ):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.public_dir = public_dir
+        self.cache_dir = cache_dir
+        self.force = force
+        self.jobs = jobs
+        self.asset_checksum = asset_checksum
+        self.asset_links = asset_links
+        self.parse_cache = parse_cache
+        self.parse_cache_size = parse_cache_size
+        self.io_threads = io_threads
+        self.compress = compress
+        self.compress_deflate = compress_deflate
+        self.compress_min_size = compress_min_size
+        self.compress_max_ratio = compress_max_ratio
+        self.search = search
+        self.max_in_flight = max_in_flight
+        self.highlight = highlight
+        self.highlight_cache_size = highlight_cache_size
+        self.check_links = check_links
+        self.check_assets = check_assets
+        self.base_url = base_url
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.cache_dir, "manifest.json")
+
+    @property
+    def deps_path(self):
+        return os.path.join(self.cache_dir, "deps.json")
+
+    @property
+    def search_state_path(self):
+        return os.path.join(self.cache_dir, "search.json")
+
+    @property
+    def search_dir(self):
+        return os.path.join(self.public_dir, "search")
+
+    @property
+    def links_state_path(self):
+        return os.path.join(self.cache_dir, "links.json")
+
+    @property
+    def link_index(self):
+        # The link index backs both link checking and sitemap.xml/rss.xml.
+        return self.check_links or self.check_assets or self.base_url is not None
+
+
+class BuildReport:
+    def __init__(self):
+        self.rendered = []
+        # pages rendered only because something they depend on changed
+        self.invalidated = []
+        self.skipped = 0
+        self.deleted = []
+        self.assets_copied = []
+        self.assets_linked = 0
+        self.assets_skipped = 0
+        self.assets_deleted = []
+        self.assets_bytes_copied = 0
+        self.assets_bytes_skipped = 0
+        self.parse_hits = 0
+        self.parse_misses = 0
+        self.highlight_hits = 0
+        self.highlight_misses = 0
+        self.outputs_written = 0
+        # rendered pages whose output already had identical bytes
+        self.outputs_unchanged = 0
+        self.output_bytes_written = 0
+        self.compressed = []
+        self.compress_unchanged = 0
+        self.compress_skipped = 0
+        self.compress_bytes_in = 0
+        self.compress_bytes_out = 0
+        # SearchStats when the search index stage ran
+        self.search = None
+        # links checked and (location, url, problem) for the broken ones,
+        # when links were checked
+        self.links_checked = None
+        self.broken_links = []
+        # Worker pid -> (pages rendered, seconds spent rendering)
+        self.workers = {}
+        self.elapsed = 0.0
+
+    def summary(self):
+        lines = [
+            f"pages: {len(self.rendered)} rendered ({len(self.invalidated)} via dependencies), "
+            f"{self.skipped} unchanged, {len(self.deleted)} deleted",
+            f"assets: {len(self.assets_copied)} copied ({format_size(self.assets_bytes_copied)}, "
+            f"{self.assets_linked} hardlinked), {self.assets_skipped} unchanged "
+            f"({format_size(self.assets_bytes_skipped)}), {len(self.assets_deleted)} deleted",
+        ]
+        if self.rendered:
+            lines.append(
+                f"outputs: {self.outputs_written} written ({format_size(self.output_bytes_written)}), "
+                f"{self.outputs_unchanged} identical left untouched"
+            )
+        if self.compressed or self.compress_unchanged or self.compress_skipped:
+            saved = 1 - self.compress_bytes_out / self.compress_bytes_in if self.compress_bytes_in else 0.0
+            lines.append(
+                f"compression: {len(self.compressed)} compressed ({format_size(self.compress_bytes_in)} -> "
+                f"{format_size(self.compress_bytes_out)}, {saved:.0%} smaller), {self.compress_unchanged} unchanged, "
+                f"{self.compress_skipped} skipped (small or incompressible)"
+            )
+        if self.search is not None:
+            search = self.search
+            lines.append(
+                f"search: {search.indexed} pages indexed, {search.removed} removed, {search.shards_written} shards "
+                f"written ({format_size(search.shard_bytes_written)}, largest {format_size(search.largest_shard)}), "
+                f"{search.shards} shards ({format_size(search.shard_bytes)}) in total, {search.elapsed * 1000:.1f} ms"
+            )
+        if self.parse_hits or self.parse_misses:
+            lines.append(f"parse cache: {self.parse_hits} hits, {self.parse_misses} misses")
+        if self.highlight_hits or self.highlight_misses:
+            lines.append(f"highlight cache: {self.highlight_hits} hits, {self.highlight_misses} misses")
+        if self.links_checked is not None:
+            lines.append(f"links: {self.links_checked} checked, {len(self.broken_links)} broken")
+            for location, url, problem in self.broken_links:
+                lines.append(f"broken link: {location}: {url} ({problem})")
+        for number, (pid, (pages, seconds)) in enumerate(sorted(self.workers.items()), 1):
+            rate = pages / seconds if seconds else 0.0
+            lines.append(f"worker {number} (pid {pid}): {pages} pages in {seconds * 1000:.1f} ms, {rate:.0f} pages/s")
+        lines.append(f"finished in {self.elapsed * 1000:.1f} ms")
+        return lines
+
+
+class WarmState:
+    # What a long-running process (the build daemon) keeps between
+    # builds: the manifest and dependency graph as the last build saved
+    # them, one parse cache with an in-memory layer and the highlight
+    # cache. A saved object is only reused while its file still has the
+    # stat it had when saved, so a build run by anything else is picked
+    # up; a build that fails keeps nothing, and the next one loads from
+    # disk.
+    def __init__(self, parse_cache_entries=4096):
+        self.parse_cache_entries = parse_cache_entries
+        self.parse_cache = None
+        self.highlight_cache = None
+        self._saved = {}
+
+    def get_parse_cache(self, config):
+        cache = self.parse_cache
+        if cache is None or cache.root != os.path.join(config.cache_dir, "parse"):
+            cache = ParseCache(config.cache_dir, config.parse_cache_size, self.parse_cache_entries)
+            self.parse_cache = cache
+        cache.max_bytes = config.parse_cache_size
+        return cache
+
+    def get_highlight_cache(self, config):
+        cache = self.highlight_cache
+        if cache is None or cache.cache_dir != config.cache_dir:
+            cache = self.highlight_cache = HighlightCache(config.cache_dir)
+        cache.max_bytes = config.highlight_cache_size
+        return cache
+
+    def load(self, path, loader):
+        saved = self._saved.pop(path, None)
+        if saved is not None and saved[0] == _file_stat(path):
+            return saved[1]
+        return loader(path)
+
+    def keep(self, path, value):
+        self._saved[path] = (_file_stat(path), value)
+
+
+def _file_stat(path):
+    try:
+        return stat_key(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class PageError(ValueError):
+    # A page that can't be built: "content/post.md:12: what's wrong".
+    pass
+
+
+def extract_title(markdown):
+    for line in markdown.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip()
+    raise ValueError("Markdown page must have an h1 heading")
+
+
+def _iter_inline(parsed):
+    for tag, content in parsed:
+        if tag == "pre":
+            continue
+        if tag == "ul" or tag == "ol":
+            for item in content:
+                yield from item
+        else:
+            yield from content
+
+
+def resolve_links(parsed, rel_path, titles):
+    # Records the pages this one links to and fills in empty link text
+    # ("[](/about.html)") with the target's title. Returns the dependency
+    # nodes: title: for links showing a title, link: for the rest. A link
+    # to a page that doesn't exist yet still gets its node, so creating
+    # the page rebuilds this one.
+    deps = set()
+    for node in _iter_inline(parsed):
+        if node.text_type is not TextType.LINK or node.url is None:
+            continue
+        target = page_for_url(node.url, rel_path)
+        if target is None:
+            continue
+        if node.text == "":
+            if target in titles:
+                node.text = titles[target]
+            deps.add(TITLE + target)
+        else:
+            deps.add(LINK + target)
+    return sorted(deps)
+
+
+def highlight_deps(parsed):
+    # highlight: nodes for the languages of a page's code blocks that get
+    # highlighted, so changing the highlighter rebuilds just those pages.
+    languages = set()
+    for tag, content in parsed:
+        if tag == "pre" and content[0]:
+            name = language_name(content[0])
+            if name is not None:
+                languages.add(HIGHLIGHT + name)
+    return sorted(languages)
+
+
+def _highlight_inputs(config):
+    state = f"v{HIGHLIGHT_VERSION}" if config.highlight else "off"
+    return {HIGHLIGHT + name: state for name in LANGUAGE_RULES}
+
+
+def iter_files(root, suffix=None):
+    # Yields (relative path, absolute path) for every file under root in a
+    # stable order. Relative paths always use "/" so manifests are portable.
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.append(entry.path)
+            elif suffix is None or entry.name.endswith(suffix):
+                rel_path = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                yield rel_path, entry.path
+        stack.extend(reversed(subdirs))
+
+
+def remove_output(public_dir, rel_path):
+    path = os.path.join(public_dir, rel_path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    remove_variants(path)
+    # Drop directories the removal left empty, up to public_dir itself.
+    directory = os.path.dirname(path)
+    public_dir = os.path.abspath(public_dir)
+    while os.path.abspath(directory) != public_dir:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def parse_page(source_path, source_bytes, parse_cache=None, tracer=NULL_TRACER):
+    # Returns (title, parse_markdown output), from the parse cache when the
+    # same source has been parsed before. Raises PageError, naming
+    # source_path, for a page without a title or with invalid Markdown.
+    with tracer.span("parse"):
+        if parse_cache is not None:
+            source_hash = content_hash(source_bytes)
+            cached = parse_cache.get(source_hash)
+            if cached is not None:
+                return cached
+        markdown = source_bytes.decode("utf-8")
+        try:
+            title = extract_title(markdown)
+            parsed = parse_markdown(markdown)
+        except MarkdownError as e:
+            raise PageError(f"{source_path}:{e.line}: {e.message}") from None
+        except ValueError as e:
+            raise PageError(f"{source_path}: {e}") from None
+        if parse_cache is not None:
+            parse_cache.put(source_hash, title, parsed)
+        return title, parsed
+
+
+def read_pages(tasks, tracer=NULL_TRACER):
+    # Pipeline stage: yields (task, source bytes). The "page" span stays
+    # open across the yield, so it covers the page's trip through every
+    # later stage. Each stage drops its references to a page after the
+    # yield, or they'd keep it alive while the next page is worked on.
+    for task in tasks:
+        with tracer.span("page", path=task[0]):
+            with tracer.span("read"):
+                with open(task[1], "rb") as f:
+                    source_bytes = f.read()
+            yield task, source_bytes
+            del source_bytes
+
+
+def parse_pages(pages, parse_cache=None, titles=None, tracer=NULL_TRACER):
+    # Pipeline stage: yields (task, title, parsed, title:/link:/highlight:
+    # dependency nodes). titles maps page paths to titles for resolving
+    # internal links.
+    titles = titles or {}
+    for task, source_bytes in pages:
+        title, parsed = parse_page(task[1], source_bytes, parse_cache, tracer)
+        del source_bytes
+        yield task, title, parsed, resolve_links(parsed, task[0], titles) + highlight_deps(parsed)
+        del parsed
+
+
+def render_pages(pages, template, search=False, tracer=NULL_TRACER, highlighter=None, links=False):
+    # Pipeline stage: yields (task, output bytes, deps, search terms or
+    # None, link index entry or None). highlighter highlights code blocks
+    # (see render_block).
+    for task, title, parsed, deps in pages:
+        terms = None
+        if search:
+            with tracer.span("terms"):
+                terms = page_terms(title, parsed)
+        entry = None
+        if links:
+            with tracer.span("links"):
+                entry = page_links(task[0], parsed)
+        values = {"Title": title, "Content": render_markdown(parsed, highlighter)}
+        del parsed
+        with tracer.span("serialize"):
+            data = template.render(values).encode("utf-8")
+        del values
+        yield task, data, deps, terms, entry
+        del data
+
+
+def write_pages(pages, writer=None, tracer=NULL_TRACER):
+    # Pipeline stage: hands each output to writer (an OutputWriter; written
+    # inline without one) and yields (page, output hash, deps, terms, link
+    # index entry).
+    for task, data, deps, terms, entry in pages:
+        if writer is not None:
+            writer.submit(task[2], data)
+        else:
+            with tracer.span("write", path=task[2]):
+                write_output(task[2], data)
+        output_hash = content_hash(data)
+        del data
+        yield task[0], output_hash, deps, terms, entry
+        tracer.check_memory()
+
+
+def page_pipeline(
+    tasks,
+    template,
+    tracer=NULL_TRACER,
+    parse_cache=None,
+    titles=None,
+    writer=None,
+    search=False,
+    highlighter=None,
+    links=False,
+):
+    # read -> parse -> render -> write, chained as generators: each page
+    # is pulled through every stage before the next one is read, so only
+    # the page in hand (plus what the writer has queued) is in memory,
+    # however many pages there are.
+    pages = read_pages(tasks, tracer)
+    pages = parse_pages(pages, parse_cache, titles, tracer)
+    pages = render_pages(pages, template, search, tracer, highlighter, links)
+    return write_pages(pages, writer, tracer)
+
+
+_worker_template = None
+_worker_tracing = False
+_worker_parse_cache = None
+_worker_titles = None
+_worker_io_threads = 4
+_worker_search = False
+_worker_highlight_cache = None
+_worker_links = False
+
+
+def _init_worker(template, tracing, parse_cache_dir, titles, io_threads, search, highlight_cache_dir, links):
+    global _worker_template, _worker_tracing, _worker_parse_cache, _worker_titles, _worker_io_threads, _worker_search
+    global _worker_highlight_cache, _worker_links
+    _worker_template = template
+    _worker_tracing = tracing
+    _worker_titles = titles
+    _worker_io_threads = io_threads
+    _worker_search = search
+    _worker_links = links
+    if parse_cache_dir is not None:
+        _worker_parse_cache = ParseCache(parse_cache_dir)
+    if highlight_cache_dir is not None:
+        # Each worker highlights a snippet at most once; across workers
+        # and builds the snippets are shared through the disk cache.
+        _worker_highlight_cache = HighlightCache(highlight_cache_dir)
+
+
+def _render_batch(tasks):
+    tracer = Tracer() if _worker_tracing else NULL_TRACER
+    cache = _worker_parse_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    highlight_cache = _worker_highlight_cache
+    highlighter = None
+    if highlight_cache is not None:
+        highlighter = highlight_cache.get
+        highlight_hits, highlight_misses = highlight_cache.hits, highlight_cache.misses
+    start = time.perf_counter()
+    with tracer.span("batch", "worker", pages=len(tasks)):
+        with OutputWriter(_worker_io_threads, tracer=tracer) as writer:
+            pages = page_pipeline(
+                tasks, _worker_template, tracer, cache, _worker_titles, writer, _worker_search, highlighter, _worker_links
+            )
+            results = [result[1:] for result in pages]
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    counts = {
+        "parse_hits": hits,
+        "parse_misses": misses,
+        "outputs_written": writer.written,
+        "outputs_unchanged": writer.unchanged,
+        "output_bytes_written": writer.bytes_written,
+    }
+    if highlight_cache is not None:
+        counts["highlight_hits"] = highlight_cache.hits - highlight_hits
+        counts["highlight_misses"] = highlight_cache.misses - highlight_misses
+    return os.getpid(), time.perf_counter() - start, results, list(tracer.events), counts
+
+
+def _batches(tasks, jobs, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    # A few batches per worker keeps the pool balanced without paying IPC
+    # overhead for every small page; batches are also small enough that
+    # every worker has two of them within max_in_flight pages.
+    size = max(1, min(BATCH_SIZE, -(-len(tasks) // (jobs * 4)), max_in_flight // (jobs * 2)))
+    return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+
+def _render_tasks(tasks, template, config, report, tracer, parse_cache=None, titles=None, highlight_cache=None):
+    # Yields page_pipeline's (page, output hash, deps, terms, link index
+    # entry) for every task, in order, rendering in-process or on a pool
+    # of config.jobs workers. At most config.max_in_flight pages are queued for the
+    # writer or out at the workers at any time.
+    if config.jobs <= 1 or len(tasks) <= 1:
+        writer = OutputWriter(config.io_threads, tracer=tracer, max_pages=config.max_in_flight)
+        # The caches may outlive this build (see WarmState); count their
+        # hits and misses from here.
+        hits, misses = (parse_cache.hits, parse_cache.misses) if parse_cache is not None else (0, 0)
+        highlighter = None
+        if highlight_cache is not None:
+            highlighter = highlight_cache.get
+            highlight_hits, highlight_misses = highlight_cache.hits, highlight_cache.misses
+        with writer:
+            yield from page_pipeline(
+                tasks, template, tracer, parse_cache, titles, writer, config.search, highlighter, config.link_index
+            )
+        if parse_cache is not None:
+            report.parse_hits += parse_cache.hits - hits
+            report.parse_misses += parse_cache.misses - misses
+        if highlight_cache is not None:
+            report.highlight_hits += highlight_cache.hits - highlight_hits
+            report.highlight_misses += highlight_cache.misses - highlight_misses
+        report.outputs_written += writer.written
+        report.outputs_unchanged += writer.unchanged
+        report.output_bytes_written += writer.bytes_written
+        return
+    cache_dir = None
+    if parse_cache is not None:
+        cache_dir = os.path.dirname(parse_cache.root)
+    highlight_cache_dir = highlight_cache.cache_dir if highlight_cache is not None else None
+    initargs = (
+        template, tracer.enabled, cache_dir, titles, config.io_threads, config.search, highlight_cache_dir,
+        config.link_index,
+    )
+    batches = _batches(tasks, config.jobs, config.max_in_flight)
+    # Batches are submitted as earlier ones come back rather than all at
+    # once, so finished results never pile up behind a slow batch.
+    window = max(config.jobs, config.max_in_flight // len(batches[0]))
+    # The workers' entries don't go through this process's caches.
+    if parse_cache is not None:
+        parse_cache.size = None
+    if highlight_cache is not None:
+        highlight_cache.size = None
+    with ProcessPoolExecutor(config.jobs, initializer=_init_worker, initargs=initargs) as executor:
+        pending = collections.deque()
+        for batch in batches:
+            pending.append((batch, executor.submit(_render_batch, batch)))
+            if len(pending) >= window:
+                yield from _batch_results(*pending.popleft(), report, tracer)
+        while pending:
+            yield from _batch_results(*pending.popleft(), report, tracer)
+
+
+def _batch_results(batch, future, report, tracer):
+    pid, elapsed, results, events, counts = future.result()
+    tracer.extend(events)
+    for name, count in counts.items():
+        setattr(report, name, getattr(report, name) + count)
+    pages, seconds = report.workers.get(pid, (0, 0.0))
+    report.workers[pid] = (pages + len(results), seconds + elapsed)
+    for task, result in zip(batch, results):
+        yield (task[0], *result)
+    tracer.check_memory()
+
+
+def _select_pages(content_dir, paths):
+    # Resolves an explicit list of changed paths to (relative path, path)
+    # pairs like iter_files, skipping anything that isn't a page.
+    for path in sorted(set(paths)):
+        rel_path = os.path.relpath(path, content_dir).replace(os.sep, "/")
+        if rel_path.startswith("../") or not rel_path.endswith(".md"):
+            continue
+        yield rel_path, os.path.join(content_dir, rel_path)
+
+
+def _template_node(config):
+    # Template and fragment nodes are keyed on absolute paths, so
+    # "./template.html" and "template.html" are the same node.
+    return TEMPLATE + os.path.abspath(config.template_path)
+
+
+def _template_graph(config, sources):
+    # Graph edges and input hashes for the template and its fragments.
+    edges = {}
+    inputs = {}
+    template_node = _template_node(config)
+    for path, (_, file_hash, includes) in sources.items():
+        node = TEMPLATE + os.path.abspath(path)
+        if node != template_node:
+            node = FRAGMENT + os.path.abspath(path)
+        edges[node] = [FRAGMENT + os.path.abspath(include) for include in includes]
+        inputs[node] = file_hash
+    return edges, inputs
+
+
+def _build_pages(
+    config, manifest, graph, report, pages, tracer, parse_cache, index=None, highlight_cache=None, link_index=None
+):
+    # Renders what changed, recording each page in the manifest, the graph
+    # and the search and link indexes (when on) as it comes out of the
+    # pipeline, so nothing per page is held until the end of the stage.
+    template, template_hash, sources = load_template(config.template_path, config.cache_dir)
+    template_edges, template_inputs = _template_graph(config, sources)
+    template_inputs.update(_highlight_inputs(config))
+    template_node = _template_node(config)
+    # A template or fragment no longer in use (--template switched, or an
+    # include dropped) counts as changed for the pages still built from it.
+    stale = [node for node in graph.edges if node.startswith((TEMPLATE, FRAGMENT)) and node not in template_edges]
+    for node in stale:
+        graph.remove(node)
+
+    with tracer.span("discover", "stage"):
+        tasks, stats, titles, inputs, deleted = _plan_pages(
+            config, manifest, graph, report, pages, template_inputs, template_node, stale
+        )
+    if index is not None:
+        # Before the adds, so their doc ids can be reused right away.
+        for rel_path in sorted(deleted):
+            index.remove(rel_path)
+    with tracer.span("render", "stage", pages=len(tasks)):
+        for rel_path, output_hash, deps, terms, entry in _render_tasks(
+            tasks, template, config, report, tracer, parse_cache, titles, highlight_cache
+        ):
+            stat, source_hash, title = stats.pop(rel_path)
+            manifest.pages[rel_path] = {
+                "stat": stat,
+                "source": source_hash,
+                "title": title,
+                "output": output_hash,
+                "output_path": output_path_for(rel_path),
+            }
+            graph.edges[PAGE + rel_path] = [template_node, *deps]
+            report.rendered.append(rel_path)
+            if index is not None:
+                index.add(rel_path, title, terms)
+            if link_index is not None:
+                link_index.add(rel_path, *entry, stat[0])
+    # New entries were written; keep the caches within their size bounds.
+    if report.parse_misses:
+        with tracer.span("prune", "stage"):
+            parse_cache.maybe_prune()
+    if report.highlight_misses:
+        with tracer.span("prune", "stage"):
+            highlight_cache.maybe_prune()
+    graph.edges.update(template_edges)
+    graph.inputs.update(inputs)
+
+    for rel_path in sorted(deleted):
+        remove_output(config.public_dir, manifest.pages.pop(rel_path)["output_path"])
+        graph.remove(PAGE + rel_path)
+        graph.remove(TITLE + rel_path)
+        report.deleted.append(rel_path)
+        if link_index is not None:
+            link_index.remove(rel_path)
+
+
+def _page_state(source_path, entry):
+    # (stat, source hash, title) for a page, or None if it's gone. The
+    # source is only read when its stat changed, and only re-parsed for
+    # the title when its content changed.
+    try:
+        stat = stat_key(os.stat(source_path))
+    except FileNotFoundError:
+        return None
+    if entry is not None and entry["stat"] == stat:
+        return stat, entry["source"], entry["title"]
+    with open(source_path, "rb") as f:
+        data = f.read()
+    source_hash = content_hash(data)
+    if entry is not None and entry["source"] == source_hash:
+        return stat, source_hash, entry["title"]
+    try:
+        return stat, source_hash, extract_title(data.decode("utf-8"))
+    except ValueError as e:
+        raise PageError(f"{source_path}: {e}") from None
+
+
+def _plan_pages(config, manifest, graph, report, pages, template_inputs, template_node, stale=()):
+    # Works out which pages need rendering. A page is rendered when its
+    # own source or output changed, when it was built from another
+    # template than template_node, or when the dependency graph reaches it
+    # from a changed input (template, fragment, one of the stale nodes or
+    # a linked page's title); with config.force, always. Returns the render tasks, (stat, source hash, title) for
+    # each of them, the current title of every page, the input hashes to
+    # record in the graph and the pages whose sources have gone away.
+    if pages is None:
+        sources = iter_files(config.content_dir, ".md")
+    else:
+        sources = list(_select_pages(config.content_dir, pages))
+    titles = {rel_path: entry["title"] for rel_path, entry in manifest.pages.items()}
+    inputs = dict(template_inputs)
+    states = {}
+    dirty = []
+    for rel_path, source_path in sources:
+        entry = manifest.pages.get(rel_path)
+        state = _page_state(source_path, entry)
+        if state is None:
+            continue
+        states[rel_path] = (source_path, state)
+        titles[rel_path] = state[2]
+        inputs[TITLE + rel_path] = state[2]
+        output_rel = output_path_for(rel_path)
+        if (
+            config.force
+            or entry is None
+            or entry["source"] != state[1]
+            or entry["output_path"] != output_rel
+            or graph.edges.get(PAGE + rel_path, [None])[0] != template_node
+            or not os.path.exists(os.path.join(config.public_dir, output_rel))
+        ):
+            dirty.append(rel_path)
+
+    # Pages that may have been deleted: everything on a full build, only
+    # the requested paths on a targeted one.
+    if pages is None:
+        candidates = set(manifest.pages)
+    else:
+        candidates = {rel_path for rel_path, _ in sources if rel_path in manifest.pages}
+    deleted = candidates - set(states)
+    for rel_path in deleted:
+        del titles[rel_path]
+
+    changed = graph.changed_inputs(inputs)
+    changed.update(stale)
+    changed.update(TITLE + rel_path for rel_path in deleted)
+    dirty_set = set(dirty)
+    affected = {node[len(PAGE):] for node in graph.dependents(changed) if node.startswith(PAGE)}
+    affected = [rel_path for rel_path in states if rel_path in affected] + sorted(affected - states.keys())
+    for rel_path in affected:
+        if rel_path in dirty_set or rel_path not in titles:
+            continue
+        if rel_path not in states:
+            # Outside a targeted build's paths; its own title isn't
+            # recorded as an input, so a full build still checks it.
+            source_path = os.path.join(config.content_dir, rel_path)
+            state = _page_state(source_path, manifest.pages.get(rel_path))
+            if state is None:
+                continue
+            states[rel_path] = (source_path, state)
+        dirty.append(rel_path)
+        dirty_set.add(rel_path)
+        report.invalidated.append(rel_path)
+
+    tasks = []
+    stats = {}
+    for rel_path, (source_path, state) in states.items():
+        if rel_path in dirty_set:
+            continue
+        manifest.pages[rel_path]["stat"] = state[0]
+        report.skipped += 1
+    for rel_path in dirty:
+        source_path, state = states[rel_path]
+        tasks.append((rel_path, source_path, os.path.join(config.public_dir, output_path_for(rel_path))))
+        stats[rel_path] = state
+    return tasks, stats, titles, inputs, deleted
+
+
+_DEP_LABELS = {
+    "template": "template",
+    "fragment": "includes",
+    "title": "shows the title of",
+    "link": "links to",
+    "highlight": "highlights",
+}
+
+
+def explain_output(config, output):
+    # Lines for "deps why OUTPUT": the page an output is built from, what
+    # that page depends on (indented under whatever pulled it in) and the
+    # pages that link to it.
+    manifest = Manifest.load(config.manifest_path)
+    graph = DepGraph.load(config.deps_path)
+    output_rel = os.path.relpath(output, config.public_dir).replace(os.sep, "/")
+    for rel_path, entry in manifest.pages.items():
+        if entry["output_path"] == output_rel:
+            break
+    else:
+        raise ValueError(f"No page in the last build produced {output}")
+    lines = [f"{output} is built from {os.path.join(config.content_dir, rel_path)}"]
+    for depth, node in graph.dependency_tree(PAGE + rel_path):
+        kind, _, path = node.partition(":")
+        lines.append("  " * depth + f"{_DEP_LABELS[kind]} {path}")
+    backlinks = graph.dependents([TITLE + rel_path, LINK + rel_path])
+    if backlinks:
+        lines.append("linked from: " + ", ".join(sorted(node[len(PAGE):] for node in backlinks)))
+    return lines
+
+
+def dependent_outputs(config, path):
+    # Outputs (relative to the public dir) that depend on path: the
+    # template, a fragment, or a page (through links to it).
+    manifest = Manifest.load(config.manifest_path)
+    graph = DepGraph.load(config.deps_path)
+    if TEMPLATE + os.path.abspath(path) in graph.edges:
+        nodes = [TEMPLATE + os.path.abspath(path)]
+    elif FRAGMENT + os.path.abspath(path) in graph.edges:
+        nodes = [FRAGMENT + os.path.abspath(path)]
+    else:
+        rel_path = os.path.relpath(path, config.content_dir).replace(os.sep, "/")
+        if rel_path not in manifest.pages:
+            raise ValueError(f"{path} is not a template, fragment or page of the last build")
+        nodes = [TITLE + rel_path, LINK + rel_path]
+    pages = (node[len(PAGE):] for node in graph.dependents(nodes) if node.startswith(PAGE))
+    return sorted(manifest.pages[rel_path]["output_path"] for rel_path in pages if rel_path in manifest.pages)
+
+
+def _sync_assets(config, manifest, report):
+    result = sync_assets(
+        iter_files(config.static_dir),
+        config.public_dir,
+        manifest.assets,
+        checksum=config.asset_checksum,
+        link=config.asset_links,
+        force=config.force,
+    )
+    for rel_path in result.deleted:
+        remove_output(config.public_dir, rel_path)
+    manifest.assets = result.assets
+    report.assets_copied = result.copied + result.linked
+    report.assets_linked = len(result.linked)
+    report.assets_skipped = result.skipped
+    report.assets_deleted = result.deleted
+    report.assets_bytes_copied = result.bytes_copied
+    report.assets_bytes_skipped = result.bytes_skipped
+
+
+def _compress_outputs(config, manifest, report):
+    if not config.compress:
+        # Compression was turned off: drop the variants it left behind.
+        for rel_path in manifest.compressed:
+            remove_variants(os.path.join(config.public_dir, rel_path))
+        manifest.compressed = {}
+        return
+    outputs = [entry["output_path"] for entry in manifest.pages.values()]
+    result = compress_outputs(
+        config.public_dir,
+        outputs + list(manifest.assets),
+        {} if config.force else manifest.compressed,
+        deflate=config.compress_deflate,
+        min_size=config.compress_min_size,
+        max_ratio=config.compress_max_ratio,
+        jobs=config.jobs,
+    )
+    manifest.compressed = result.entries
+    report.compressed = result.compressed
+    report.compress_unchanged = result.unchanged
+    report.compress_skipped = result.skipped
+    report.compress_bytes_in = result.bytes_in
+    report.compress_bytes_out = result.bytes_out
+
+
+def _load_search(config):
+    # The search index to feed rendered pages into, or None when it's off.
+    if not config.search:
+        # The index was turned off: drop it rather than leave it stale.
+        if os.path.exists(config.search_state_path):
+            shutil.rmtree(config.search_dir, ignore_errors=True)
+            os.remove(config.search_state_path)
+        return None
+    return SearchIndex.load(config.search_state_path, config.search_dir, reset=config.force)
+
+
+def _update_search(config, manifest, report, index, parse_cache):
+    # Pages the index is missing (a fresh index, or search was just
+    # turned on) weren't necessarily rendered; index them from source.
+    for rel_path in manifest.pages:
+        if rel_path not in index.pages:
+            source_path = os.path.join(config.content_dir, rel_path)
+            with open(source_path, "rb") as f:
+                title, parsed = parse_page(source_path, f.read(), parse_cache)
+            index.add(rel_path, title, page_terms(title, parsed))
+    report.search = index.flush()
+    index.save()
+
+
+def _load_links(config, state=None):
+    # The link index to feed rendered pages into, or None when neither
+    # link checking nor sitemap.xml/rss.xml is on.
+    path = config.links_state_path
+    if not config.link_index:
+        if os.path.exists(path):
+            # Turned off: drop the index and whatever it generated.
+            _remove_feeds(config.public_dir, LinkIndex.load(path).base_url)
+            os.remove(path)
+        return None
+    if config.force:
+        return LinkIndex.load(path, reset=True)
+    if state is not None:
+        return state.load(path, LinkIndex.load)
+    return LinkIndex.load(path)
+
+
+def _remove_feeds(public_dir, base_url):
+    if base_url is None:
+        return
+    for name in ("sitemap.xml", "rss.xml"):
+        try:
+            os.remove(os.path.join(public_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def _update_links(config, manifest, report, link_index, parse_cache, state=None):
+    # Pages the index is missing (a fresh index, or it was just turned on)
+    # weren't necessarily rendered; index them from source.
+    for rel_path, page in manifest.pages.items():
+        if rel_path not in link_index.pages:
+            source_path = os.path.join(config.content_dir, rel_path)
+            with open(source_path, "rb") as f:
+                _, parsed = parse_page(source_path, f.read(), parse_cache)
+            link_index.add(rel_path, *page_links(rel_path, parsed), page["stat"][0])
+    if config.check_links or config.check_assets:
+        broken = link_index.check(config.public_dir, manifest.assets, config.check_assets)
+        report.links_checked = link_index.links()
+        report.broken_links = _link_locations(config, broken)
+
+    base_url = config.base_url
+    public_dir = config.public_dir
+    if base_url != link_index.base_url:
+        _remove_feeds(public_dir, link_index.base_url)
+        link_index.base_url = base_url
+        link_index.changed = True
+    if base_url is not None and (
+        link_index.changed
+        or not os.path.exists(os.path.join(public_dir, "sitemap.xml"))
+        or not os.path.exists(os.path.join(public_dir, "rss.xml"))
+    ):
+        titles = {rel_path: page["title"] for rel_path, page in manifest.pages.items()}
+        write_output(os.path.join(public_dir, "sitemap.xml"), link_index.sitemap(base_url))
+        write_output(os.path.join(public_dir, "rss.xml"), link_index.feed(base_url, titles))
+    if link_index.changed:
+        link_index.save()
+    if state is not None:
+        state.keep(config.links_state_path, link_index)
+
+
+def _link_locations(config, broken):
+    # LinkIndex.check's (page, url, problem) list with each page turned
+    # into "content/blog/post.md:12", the first line linking to url. Only
+    # broken links are looked up, one read per page, so the index needn't
+    # carry line numbers.
+    located = []
+    for rel_path, links in itertools.groupby(broken, key=lambda link: link[0]):
+        source_path = os.path.join(config.content_dir, rel_path)
+        try:
+            with open(source_path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            lines = []
+        for _, url, problem in links:
+            needle = f"]({url}"
+            location = source_path
+            for number, line in enumerate(lines, 1):
+                if needle in line:
+                    location = f"{source_path}:{number}"
+                    break
+            located.append((location, url, problem))
+    return located
+
+
+def build_site(config, pages=None, tracer=NULL_TRACER, state=None):
+    # pages optionally limits the build to those content paths, e.g. the
+    # files a watcher saw change; assets are only synced on full builds.
+    # state, a WarmState, carries loaded state over from earlier builds.
+    start = time.perf_counter()
+    with tracer.span("build", "build"):
+        with tracer.span("manifest", "stage"):
+            # A forced build still loads the manifest, which is how it finds
+            # the outputs of deleted pages and assets; it just doesn't let
+            # it skip anything.
+            if state is not None:
+                manifest = state.load(config.manifest_path, Manifest.load)
+            else:
+                manifest = Manifest.load(config.manifest_path)
+            if config.force:
+                graph = DepGraph(config.deps_path)
+            elif state is not None:
+                graph = state.load(config.deps_path, DepGraph.load)
+            else:
+                graph = DepGraph.load(config.deps_path)
+        report = BuildReport()
+        parse_cache = None
+        if config.parse_cache:
+            if state is not None:
+                parse_cache = state.get_parse_cache(config)
+            else:
+                parse_cache = ParseCache(config.cache_dir, config.parse_cache_size)
+        highlight_cache = None
+        if config.highlight:
+            if state is not None:
+                highlight_cache = state.get_highlight_cache(config)
+            else:
+                highlight_cache = HighlightCache(config.cache_dir, max_bytes=config.highlight_cache_size)
+        index = _load_search(config)
+        link_index = _load_links(config, state)
+        _build_pages(config, manifest, graph, report, pages, tracer, parse_cache, index, highlight_cache, link_index)
+        if index is not None:
+            with tracer.span("search", "stage"):
+                _update_search(config, manifest, report, index, parse_cache)
+        if pages is None:
+            with tracer.span("assets", "stage"):
+                _sync_assets(config, manifest, report)
+        if link_index is not None:
+            # After the assets, which links may point at.
+            with tracer.span("links", "stage"):
+                _update_links(config, manifest, report, link_index, parse_cache, state)
+        with tracer.span("compress", "stage"):
+            _compress_outputs(config, manifest, report)
+        with tracer.span("manifest", "stage"):
+            manifest.save()
+            graph.save()
+        if state is not None:
+            state.keep(config.manifest_path, manifest)
+            state.keep(config.deps_path, graph)
+    report.elapsed = time.perf_counter() - start
+    return report
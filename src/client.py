@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Thin client for the build daemon (main.py daemon). It deliberately
+# imports nothing from the generator, so a request costs interpreter
+# startup plus the build itself.
+
+DEFAULT_SOCKET = os.path.join(".cache", "daemon.sock")
+
+
+def request(socket_path, message, timeout=None):
+    # Sends one request and returns the daemon's decoded response.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("the daemon closed the connection without answering")
+    return json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="client.py", description="Send a request to a running build daemon")
+    parser.add_argument("command", choices=("build", "status", "reload", "stop"))
+    parser.add_argument("paths", nargs="*", help="with build: the changed files (default: an incremental build)")
+    parser.add_argument("--force", action="store_true", help="with build: rebuild everything")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="the daemon's socket")
+    args = parser.parse_args(argv)
+
+    message = {"command": args.command}
+    if args.command == "build":
+        message["pages"] = [os.path.abspath(path) for path in args.paths] or None
+        message["force"] = args.force
+    try:
+        response = request(args.socket, message)
+    except (FileNotFoundError, ConnectionRefusedError):
+        parser.exit(1, f"no daemon listening on {args.socket} (start one with main.sh daemon)\n")
+    if not response["ok"]:
+        parser.exit(1, f"daemon: {response['error']}\n")
+    for line in response.get("summary", ()):
+        print(line)
+    if args.command == "status":
+        print(f"daemon {response['pid']}: {response['builds']} builds, up {response['uptime']:.0f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
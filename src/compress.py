@@ -0,0 +1,117 @@
+import gzip
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from manifest import stat_key, write_atomic
+
+COMPRESSIBLE = (".html", ".css", ".js")
+GZIP_SUFFIX = ".gz"
+# zlib-wrapped deflate, what HTTP calls Content-Encoding: deflate
+DEFLATE_SUFFIX = ".zz"
+VARIANT_SUFFIXES = (GZIP_SUFFIX, DEFLATE_SUFFIX)
+
+DEFAULT_MIN_SIZE = 1024
+# Compressed/original size above which a variant isn't worth serving.
+DEFAULT_MAX_RATIO = 0.9
+
+BATCH_SIZE = 64
+
+
+class CompressResult:
+    def __init__(self):
+        self.compressed = []
+        self.unchanged = 0
+        # too small, or didn't compress below the ratio cutoff
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        # rel path -> manifest entry for every compressible output
+        self.entries = {}
+
+
+def remove_variants(path, keep=()):
+    for suffix in VARIANT_SUFFIXES:
+        if suffix in keep:
+            continue
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def compress_file(path, deflate=False, min_size=DEFAULT_MIN_SIZE, max_ratio=DEFAULT_MAX_RATIO):
+    # Writes path.gz (and path.zz with deflate=True) next to path, or
+    # removes stale ones when the file is too small or compresses too
+    # poorly. Returns (original size, {suffix: compressed size}).
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = {}
+    if len(data) >= min_size:
+        # mtime=0 keeps the .gz bytes identical for identical input.
+        encoded = {GZIP_SUFFIX: gzip.compress(data, compresslevel=9, mtime=0)}
+        if deflate:
+            encoded[DEFLATE_SUFFIX] = zlib.compress(data, 9)
+        for suffix, compressed in encoded.items():
+            if len(compressed) <= len(data) * max_ratio:
+                write_atomic(path + suffix, compressed)
+                variants[suffix] = len(compressed)
+    if len(variants) < len(VARIANT_SUFFIXES):
+        remove_variants(path, keep=variants)
+    return len(data), variants
+
+
+def _compress_batch(args):
+    paths, deflate, min_size, max_ratio = args
+    return [compress_file(path, deflate, min_size, max_ratio) for path in paths]
+
+
+def compress_outputs(
+    public_dir,
+    rel_paths,
+    previous,
+    deflate=False,
+    min_size=DEFAULT_MIN_SIZE,
+    max_ratio=DEFAULT_MAX_RATIO,
+    jobs=1,
+):
+    # Compresses the HTML/CSS/JS files among rel_paths whose size+mtime
+    # changed since previous (the manifest's compressed section), fanned
+    # out over a process pool when jobs > 1. Outputs written with
+    # identical bytes keep their mtime, so they aren't compressed again.
+    result = CompressResult()
+    options = [deflate, min_size, max_ratio]
+    todo = []
+    for rel_path in rel_paths:
+        if not rel_path.endswith(COMPRESSIBLE):
+            continue
+        path = os.path.join(public_dir, rel_path)
+        try:
+            stat = stat_key(os.stat(path))
+        except FileNotFoundError:
+            continue
+        entry = previous.get(rel_path)
+        if entry is not None and entry["stat"] == stat and entry["options"] == options:
+            result.entries[rel_path] = entry
+            result.unchanged += 1
+            continue
+        todo.append((rel_path, path, stat))
+
+    paths = [path for _, path, _ in todo]
+    if jobs > 1 and len(paths) > 1:
+        size = max(1, min(BATCH_SIZE, -(-len(paths) // (jobs * 4))))
+        batches = [(paths[i:i + size], deflate, min_size, max_ratio) for i in range(0, len(paths), size)]
+        with ProcessPoolExecutor(jobs) as executor:
+            outcomes = [outcome for batch in executor.map(_compress_batch, batches) for outcome in batch]
+    else:
+        outcomes = _compress_batch((paths, deflate, min_size, max_ratio))
+
+    for (rel_path, _, stat), (size, variants) in zip(todo, outcomes):
+        result.entries[rel_path] = {"stat": stat, "options": options, "variants": variants}
+        if variants:
+            result.compressed.append(rel_path)
+            result.bytes_in += size
+            result.bytes_out += variants.get(GZIP_SUFFIX) or variants[DEFLATE_SUFFIX]
+        else:
+            result.skipped += 1
+    return result
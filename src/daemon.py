@@ -0,0 +1,171 @@
+import copy
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+
+from build import WarmState, build_site
+from server import rebuild
+from watch import Watcher
+
+# Set across a reload's exec to the listening socket's fd, so the new
+# process serves the same socket and no client sees it go away.
+SOCKET_FD_ENV = "SSG_DAEMON_FD"
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    # One JSON request line in, one JSON response line out; see client.py.
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(request)
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class BuildDaemon(socketserver.UnixStreamServer):
+    # Serves builds from one warm process: imports, compiled templates,
+    # interned props, the manifest, the dependency graph and parsed pages
+    # all stay in memory between requests (see build.WarmState). Requests
+    # are handled one at a time, so builds never overlap, and between
+    # requests the daemon checks its own source files: when they change
+    # it re-execs itself on the same listening socket.
+    def __init__(self, config, socket_path, interval=0.5, inherited_fd=None):
+        self.config = config
+        self.socket_path = socket_path
+        self.interval = interval
+        self.state = WarmState()
+        self.builds = 0
+        self.started = time.time()
+        self.stopping = False
+        self.reload_requested = False
+        self.code = Watcher(_code_files())
+        if inherited_fd is None:
+            super().__init__(socket_path, DaemonRequestHandler)
+        else:
+            super().__init__(socket_path, DaemonRequestHandler, bind_and_activate=False)
+            self.socket.close()
+            self.socket = socket.socket(fileno=inherited_fd)
+
+    def server_bind(self):
+        # Binds under a temporary name; server_activate moves the socket
+        # into place once it's listening, so clients never find a socket
+        # that refuses connections.
+        if os.path.exists(self.socket_path):
+            if _daemon_alive(self.socket_path):
+                raise OSError(f"a daemon is already listening on {self.socket_path}")
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        self.server_address = f"{self.socket_path}.tmp{os.getpid()}"
+        super().server_bind()
+
+    def server_activate(self):
+        super().server_activate()
+        os.rename(self.server_address, self.socket_path)
+        self.server_address = self.socket_path
+
+    def dispatch(self, request):
+        command = request.get("command")
+        if command == "build":
+            return self.build(request.get("pages"), request.get("force", False))
+        if command == "status":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "builds": self.builds,
+                "uptime": time.time() - self.started,
+            }
+        if command == "reload":
+            self.reload_requested = True
+            return {"ok": True}
+        if command == "stop":
+            self.stopping = True
+            return {"ok": True}
+        raise ValueError(f"Unknown daemon command: {command!r}")
+
+    def build(self, pages, force):
+        # pages: changed files (absolute paths) or None for a full build.
+        config = self.config
+        if force:
+            config = copy.copy(config)
+            config.force = True
+        if pages:
+            report = rebuild(config, pages, self.state)
+        else:
+            report = build_site(config, state=self.state)
+        self.builds += 1
+        return {"ok": True, "summary": report.summary(), "elapsed": report.elapsed}
+
+    def run(self):
+        # serve_forever() can't be stopped from its own thread, so this
+        # loop handles one request at a time and checks for stop and
+        # reload between them.
+        self.timeout = self.interval
+        try:
+            while not self.stopping:
+                self.handle_request()
+                if self.reload_requested or self.code.poll():
+                    self.reload()
+        finally:
+            # Not reached after a successful reload: exec doesn't return.
+            self.server_close()
+            try:
+                os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def reload(self):
+        # Only re-execs when every source file still compiles; otherwise
+        # the daemon keeps serving the code it has.
+        for path in _code_files():
+            try:
+                with open(path, "rb") as f:
+                    compile(f.read(), path, "exec")
+            except (OSError, SyntaxError) as e:
+                print(f"daemon: not reloading, {path} doesn't compile: {e}", file=sys.stderr)
+                self.reload_requested = False
+                return
+        print("daemon: code changed, reloading", file=sys.stderr)
+        fd = self.socket.fileno()
+        os.set_inheritable(fd, True)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        env = dict(os.environ, **{SOCKET_FD_ENV: str(fd)})
+        os.execve(sys.executable, [sys.executable, *sys.argv], env)
+
+
+def _code_files():
+    return sorted(
+        os.path.join(SRC_DIR, name)
+        for name in os.listdir(SRC_DIR)
+        if name.endswith(".py") and not name.startswith("test_")
+    )
+
+
+def _daemon_alive(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def run_daemon(config, socket_path, interval=0.5):
+    inherited = os.environ.pop(SOCKET_FD_ENV, None)
+    server = BuildDaemon(config, socket_path, interval, None if inherited is None else int(inherited))
+    # A first build loads everything the requests will need.
+    for line in server.build(None, False)["summary"]:
+        print(line)
+    print(f"daemon {os.getpid()} listening on {socket_path}")
+    sys.stdout.flush()
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
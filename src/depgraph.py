@@ -0,0 +1,92 @@
+import json
+
+from manifest import write_atomic
+
+DEPS_VERSION = 1
+
+# Node names are "<kind>:<path>". Pages, templates and fragments are
+# recorded as they're used by a build; "title:" and "link:" nodes point at
+# other pages and "highlight:<language>" nodes at the code highlighter,
+# and exist only as edge targets.
+PAGE = "page:"
+TEMPLATE = "template:"
+FRAGMENT = "fragment:"
+TITLE = "title:"
+LINK = "link:"
+HIGHLIGHT = "highlight:"
+
+
+class DepGraph:
+    # What every output was built from, stored as JSON next to the
+    # manifest. edges maps a node to the nodes it depends on, e.g.
+    #   "page:blog/post.md" -> ["template:template.html", "title:index.md",
+    #                           "link:about.md"]
+    #   "template:template.html" -> ["fragment:partials/nav.html"]
+    # and inputs holds the hash (for titles, the title itself) that each
+    # template, fragment and title had when the graph was saved. A build
+    # compares inputs against the current ones and rebuilds the pages
+    # reachable from the changed ones. link: edges record plain links
+    # (for backlinks) and never invalidate anything.
+    def __init__(self, path, edges=None, inputs=None):
+        self.path = path
+        self.edges = edges if edges is not None else {}
+        self.inputs = inputs if inputs is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != DEPS_VERSION:
+            return cls(path)
+        return cls(path, data.get("edges"), data.get("inputs"))
+
+    def save(self):
+        data = {
+            "version": DEPS_VERSION,
+            "edges": dict(sorted(self.edges.items())),
+            "inputs": dict(sorted(self.inputs.items())),
+        }
+        write_atomic(self.path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def remove(self, node):
+        self.edges.pop(node, None)
+        self.inputs.pop(node, None)
+
+    def changed_inputs(self, current):
+        # Nodes in current whose hash differs from the recorded one.
+        inputs = self.inputs
+        return {node for node, value in current.items() if inputs.get(node) != value}
+
+    def reverse(self):
+        dependents = {}
+        for node, deps in self.edges.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(node)
+        return dependents
+
+    def dependents(self, nodes):
+        # Every node that depends on any of nodes, directly or through
+        # other nodes (a fragment -> the fragments and templates including
+        # it -> the pages using those templates).
+        reverse = self.reverse()
+        seen = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            for dependent in reverse.get(node, ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return seen
+
+    def dependency_tree(self, node):
+        # Yields (depth, dependency) depth-first for everything node
+        # depends on; a dependency reached twice is listed twice.
+        stack = [(1, dep) for dep in reversed(self.edges.get(node, ()))]
+        while stack:
+            depth, dep = stack.pop()
+            yield depth, dep
+            stack.extend((depth + 1, child) for child in reversed(self.edges.get(dep, ())))
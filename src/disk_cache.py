@@ -0,0 +1,115 @@
+import os
+import shutil
+
+
+class DiskCacheStats:
+    def __init__(self):
+        self.entries = 0
+        self.bytes = 0
+        # entries/bytes written by other format versions, dropped by prune()
+        self.stale_entries = 0
+        self.stale_bytes = 0
+
+
+class DiskCache:
+    # One file per entry under root/v<version>/<key[:2]>/<key><suffix>,
+    # kept within max_bytes by prune(): entries of other versions go
+    # first, then the least recently used ones by mtime, which hits bump
+    # through touch(). Subclasses do the reading and writing. With root
+    # None nothing is kept on disk.
+    suffix = ""
+
+    def __init__(self, root, version, max_bytes):
+        self.root = root
+        self.directory = os.path.join(root, f"v{version}") if root is not None else None
+        self.max_bytes = max_bytes
+        # Bytes on disk as of the last prune() plus what added() has
+        # counted since, or None when unknown (e.g. other processes wrote
+        # entries).
+        self.size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}{self.suffix}")
+
+    def touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def added(self, size):
+        if self.size is not None:
+            self.size += size
+
+    def _entries(self):
+        # Yields (path, size, mtime_ns, current version?) for every entry.
+        if self.root is None:
+            return
+        try:
+            versions = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return
+        for version in versions:
+            if not version.is_dir():
+                continue
+            current = version.path == self.directory
+            for shard in os.scandir(version.path):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(self.suffix):
+                        st = entry.stat()
+                        yield entry.path, st.st_size, st.st_mtime_ns, current
+
+    def stats(self):
+        stats = DiskCacheStats()
+        for _, size, _, current in self._entries():
+            if current:
+                stats.entries += 1
+                stats.bytes += size
+            else:
+                stats.stale_entries += 1
+                stats.stale_bytes += size
+        return stats
+
+    def prune(self, max_bytes=None):
+        # Drops entries from other versions, then the least recently used
+        # entries until the cache fits in max_bytes. Returns (entries
+        # removed, bytes freed).
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        current = []
+        removed = 0
+        freed = 0
+        for path, size, mtime, is_current in self._entries():
+            if is_current:
+                current.append((mtime, size, path))
+            else:
+                removed += 1
+                freed += size
+        if removed:
+            for version in os.scandir(self.root):
+                if version.is_dir() and version.path != self.directory:
+                    shutil.rmtree(version.path, ignore_errors=True)
+        total = sum(size for _, size, _ in current)
+        if total > max_bytes:
+            current.sort()
+            for _, size, path in current:
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+                freed += size
+        self.size = total
+        return removed, freed
+
+    def maybe_prune(self):
+        # prune(), unless the cache is known to fit: a long-lived cache
+        # then only scans its directory when it may have outgrown it.
+        if self.size is not None and self.size <= self.max_bytes:
+            return 0, 0
+        return self.prune()
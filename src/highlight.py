@@ -0,0 +1,246 @@
+import html
+import os
+import re
+from collections import OrderedDict
+
+from disk_cache import DiskCache
+from htmlnode import LeafNode, intern_props
+from manifest import content_hash, write_atomic
+
+# Bump whenever a lexer table or the emitted HTML changes; cached
+# highlights from any other version are ignored.
+HIGHLIGHT_VERSION = 1
+
+DEFAULT_MEMORY_ENTRIES = 4096
+# Default size bound for the highlight cache directory, enforced by prune().
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+
+# Token classes, emitted as <span class="..."> (see static/styles.css).
+KEYWORD = "kw"
+STRING = "str"
+COMMENT = "com"
+NUMBER = "num"
+BUILTIN = "bi"
+ATTRIBUTE = "attr"
+VARIABLE = "var"
+TAG = "tag"
+
+_TOKEN_PROPS = {}
+
+
+def _words(words):
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+
+_C_COMMENT = r"/\*[\s\S]*?\*/"
+_LINE_COMMENT = r"//[^\n]*"
+_HASH_COMMENT = r"#[^\n]*"
+_DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+_SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'"
+_NUMBER = r"\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+
+# language -> [(token class, regex)]; at each position the first rule
+# that matches wins, and text no rule matches is emitted unstyled.
+LANGUAGE_RULES = {
+    "python": [
+        (COMMENT, _HASH_COMMENT),
+        (STRING, r"""(?:\b[rRbBuUfF]{1,2})?(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?''')"""),
+        (STRING, r"(?:\b[rRbBuUfF]{1,2})?(?:" + _DOUBLE_QUOTED + "|" + _SINGLE_QUOTED + ")"),
+        (KEYWORD, _words(
+            "False None True and as assert async await break class continue def del elif else except "
+            "finally for from global if import in is lambda nonlocal not or pass raise return try while "
+            "with yield match case"
+        )),
+        (BUILTIN, _words(
+            "abs all any bool bytes dict enumerate filter float getattr hasattr int isinstance iter len "
+            "list map max min next object open print range repr reversed set sorted str sum super tuple "
+            "type zip self cls"
+        )),
+        (BUILTIN, r"@[\w.]+"),
+        (NUMBER, _NUMBER),
+    ],
+    "javascript": [
+        (COMMENT, _LINE_COMMENT),
+        (COMMENT, _C_COMMENT),
+        (STRING, _DOUBLE_QUOTED + "|" + _SINGLE_QUOTED + r"|`(?:\\.|[^`\\])*`"),
+        (KEYWORD, _words(
+            "async await break case catch class const continue debugger default delete do else export "
+            "extends false finally for function if import in instanceof let new null of return static "
+            "super switch this throw true try typeof undefined var void while with yield"
+        )),
+        (BUILTIN, _words("Array Boolean console Date document Error JSON Map Math Number Object Promise "
+                         "RegExp Set String Symbol window")),
+        (NUMBER, _NUMBER),
+    ],
+    "json": [
+        (ATTRIBUTE, _DOUBLE_QUOTED + r"(?=\s*:)"),
+        (STRING, _DOUBLE_QUOTED),
+        (KEYWORD, _words("true false null")),
+        (NUMBER, r"-?" + _NUMBER),
+    ],
+    "bash": [
+        (COMMENT, r"(?:(?<=\s)|^)#[^\n]*"),
+        (STRING, _DOUBLE_QUOTED + "|" + r"'[^']*'"),
+        (VARIABLE, r"\$(?:\{[^}\n]*\}|\w+|[@*#?$!0-9])"),
+        (KEYWORD, _words(
+            "if then else elif fi for in do done case esac while until function return local export "
+            "readonly select break continue"
+        )),
+        (BUILTIN, _words("cd echo exit printf read set shift source test trap unset cat cp grep ls mkdir mv rm sed")),
+    ],
+    "css": [
+        (COMMENT, _C_COMMENT),
+        (STRING, _DOUBLE_QUOTED + "|" + _SINGLE_QUOTED),
+        (KEYWORD, r"@[\w-]+|!important"),
+        (ATTRIBUTE, r"[\w-]+(?=\s*:[^;{}]*[;}])"),
+        (NUMBER, r"#[\da-fA-F]{3,8}\b|-?\b\d+(?:\.\d+)?(?:%|[a-zA-Z]+)?"),
+    ],
+    "html": [
+        (COMMENT, r"<!--[\s\S]*?-->"),
+        (TAG, r"</?[\w-]+|/?>"),
+        (ATTRIBUTE, r"[\w:-]+(?==)"),
+        (STRING, _DOUBLE_QUOTED + "|" + _SINGLE_QUOTED),
+    ],
+}
+
+ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "mjs": "javascript",
+    "sh": "bash",
+    "shell": "bash",
+    "console": "bash",
+    "htm": "html",
+    "xml": "html",
+}
+
+
+class Lexer:
+    # One regex per language: the rules become an alternation of groups,
+    # and the group that matched (match.lastindex) picks the class.
+    def __init__(self, rules):
+        self.classes = [None] + [token_class for token_class, _ in rules]
+        self.pattern = re.compile("|".join(f"({regex})" for _, regex in rules), re.MULTILINE)
+
+    def tokens(self, code):
+        # Yields (token class or None, text) covering all of code.
+        position = 0
+        classes = self.classes
+        for match in self.pattern.finditer(code):
+            start = match.start()
+            if start > position:
+                yield None, code[position:start]
+            text = match.group()
+            if text:
+                yield classes[match.lastindex], text
+            position = match.end()
+        if position < len(code):
+            yield None, code[position:]
+
+
+_lexers = {}
+
+
+def language_name(language):
+    # The LANGUAGE_RULES name for a fence's language ("py" -> "python"),
+    # or None when it isn't one this module highlights.
+    name = language.strip().lower()
+    name = ALIASES.get(name, name)
+    return name if name in LANGUAGE_RULES else None
+
+
+def lexer_for(language):
+    name = language_name(language)
+    if name is None:
+        return None
+    lexer = _lexers.get(name)
+    if lexer is None:
+        lexer = _lexers[name] = Lexer(LANGUAGE_RULES[name])
+    return lexer
+
+
+def _token_props(token_class):
+    props = _TOKEN_PROPS.get(token_class)
+    if props is None:
+        props = _TOKEN_PROPS[token_class] = intern_props({"class": token_class})
+    return props
+
+
+def highlight(language, code):
+    # LeafNodes for the code: a <span class="..."> per styled token and a
+    # bare text leaf for everything else, all HTML-escaped. Returns None
+    # for unknown languages.
+    lexer = lexer_for(language)
+    if lexer is None:
+        return None
+    nodes = []
+    for token_class, text in lexer.tokens(code):
+        text = html.escape(text, quote=False)
+        if token_class is None:
+            if nodes and nodes[-1].tag is None:
+                nodes[-1].value += text
+            else:
+                nodes.append(LeafNode(None, text))
+        else:
+            nodes.append(LeafNode("span", text, _token_props(token_class)))
+    return nodes
+
+
+def highlight_html(language, code):
+    nodes = highlight(language, code)
+    if nodes is None:
+        return None
+    return "".join(node.to_html() for node in nodes)
+
+
+class HighlightCache(DiskCache):
+    # Highlighted HTML keyed by a hash of language and code: in memory (up
+    # to memory_entries, least recently used dropped first) and, given a
+    # cache_dir, as one file per snippet under
+    # cache_dir/highlight/v<HIGHLIGHT_VERSION>/<key[:2]>/<key>.html, so a
+    # snippet repeated across pages (and builds) is tokenized once. Like
+    # the parse cache, the files are kept within max_bytes by prune().
+    suffix = ".html"
+
+    def __init__(self, cache_dir=None, memory_entries=DEFAULT_MEMORY_ENTRIES, max_bytes=DEFAULT_CACHE_BYTES):
+        root = os.path.join(cache_dir, "highlight") if cache_dir is not None else None
+        super().__init__(root, HIGHLIGHT_VERSION, max_bytes)
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, language, code):
+        # highlight_html(language, code), from the cache when possible.
+        name = language_name(language)
+        if name is None:
+            return None
+        key = content_hash(f"{name}\0{code}".encode("utf-8"))
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return result
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    result = f.read()
+            except (OSError, ValueError):
+                result = None
+        if result is None:
+            self.misses += 1
+            result = highlight_html(name, code)
+            if self.directory is not None:
+                data = result.encode("utf-8")
+                write_atomic(path, data)
+                self.added(len(data))
+        else:
+            self.touch(path)
+            self.hits += 1
+        self._memory[key] = result
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+        return result
@@ -1,4 +1,83 @@
+_ATTR_ESCAPES = str.maketrans({"&": "&amp;", '"': "&quot;", "<": "&lt;", ">": "&gt;"})
+
+# Upper bound on distinct props mappings kept by intern_props().
+MAX_INTERNED_PROPS = 4096
+# Upper bound on attribute strings kept for plain props dicts.
+MAX_RENDERED_PROPS = 32768
+
+
+def escape_attr(value):
+    if "&" in value or '"' in value or "<" in value or ">" in value:
+        return value.translate(_ATTR_ESCAPES)
+    return value
+
+
+def render_props(props):
+    # Attribute values are escaped; values without any of & " < > (nearly
+    # all of them) skip the translate call.
+    parts = []
+    for key, value in props.items():
+        if type(value) is not str:
+            value = str(value)
+        if "&" in value or '"' in value or "<" in value or ">" in value:
+            value = value.translate(_ATTR_ESCAPES)
+        parts.append(f' {key}="{value}"')
+    return "".join(parts)
+
+
+class FrozenProps(dict):
+    # Read-only props mapping that renders its attribute string once.
+    __slots__ = ("_html",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._html = None
+
+    @property
+    def html(self):
+        if self._html is None:
+            self._html = render_props(self)
+        return self._html
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("FrozenProps is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenProps, (dict(self),))
+
+
+_interned_props = {}
+_rendered_props = {}
+
+
+def intern_props(props):
+    # Returns a shared FrozenProps equal to props, so the many nodes built
+    # with the same {"class": ...} mapping all reuse one rendered string.
+    if props is None or type(props) is FrozenProps:
+        return props
+    # As in props_to_html, only all-str mappings are shared: {"x": 1} and
+    # {"x": True} are equal keys but render differently. Others, and
+    # unhashable values, get a FrozenProps of their own.
+    try:
+        key = tuple(props.items())
+        frozen = _interned_props.get(key)
+    except TypeError:
+        return FrozenProps(props)
+    if frozen is None:
+        frozen = FrozenProps(props)
+        if all(type(value) is str for value in props.values()):
+            if len(_interned_props) >= MAX_INTERNED_PROPS:
+                _interned_props.clear()
+            _interned_props[key] = frozen
+    return frozen
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -7,19 +86,75 @@ class HTMLNode:
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
+
+    def iter_html(self):
+        # Walks the tree with an explicit stack so deeply nested documents
+        # don't hit the recursion limit. Closing tags are pushed as plain
+        # strings and emitted once all of a parent's children are done.
+        stack = [self]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        while stack:
+            item = pop()
+            if type(item) is str:
+                yield item
+            elif isinstance(item, ParentNode):
+                item._check_renderable()
+                yield f"<{item.tag}{item.props_to_html()}>"
+                push(f"</{item.tag}>")
+                extend(reversed(item.children))
+            else:
+                yield item.to_html()
+
+    def write_html(self, fp, chunk_size=65536):
+        buffer = []
+        buffered = 0
+        for chunk in self.iter_html():
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= chunk_size:
+                fp.write("".join(buffer))
+                buffer.clear()
+                buffered = 0
+        if buffer:
+            fp.write("".join(buffer))
     
     def props_to_html(self):
-        if self.props is None:
+        props = self.props
+        if props is None:
             return ""
-        props_html = ""
-        for key, value in self.props.items():
-            props_html += f' {key}="{value}"'
+        if type(props) is FrozenProps:
+            return props.html
+        # Plain dicts are memoized on their items, so a mutated dict just
+        # misses. Only all-str items are stored: {"x": 1} and {"x": True}
+        # are equal keys but render differently. A single-item dict (the
+        # common {"class": ...}) is keyed by its one (key, value) pair,
+        # which saves building the outer tuple; the two key shapes can't
+        # collide.
+        try:
+            if len(props) == 1:
+                for key in props.items():
+                    props_html = _rendered_props.get(key)
+            else:
+                key = tuple(props.items())
+                props_html = _rendered_props.get(key)
+        except TypeError:
+            return render_props(props)
+        if props_html is None:
+            props_html = render_props(props)
+            if all(type(value) is str for value in props.values()):
+                if len(_rendered_props) >= MAX_RENDERED_PROPS:
+                    _rendered_props.clear()
+                _rendered_props[key] = props_html
         return props_html
 
     def __repr__(self):
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -38,14 +173,19 @@ class LeafNode(HTMLNode):
         
         return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
         return f"LeafNode(tag={self.tag}, value={self.value}, props={self.props})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def _check_renderable(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         
@@ -54,13 +194,40 @@ class ParentNode(HTMLNode):
         
         if len(self.children) == 0:
             raise ValueError("ParentNode must have at least one child")
-        
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        
-        props_html = self.props_to_html()
-        return f"<{self.tag}{props_html}>{children_html}</{self.tag}>"
+
+    def to_html(self):
+        # Same walk as iter_html, with parts collected in a plain loop: each
+        # stack frame is a parent's children iterator and its tag, and only
+        # a child parent pushes one, so leaf-only parents (most of them)
+        # cost one loop over their children.
+        tag = self.tag
+        children = self.children
+        if tag is None or not children:
+            self._check_renderable()
+        parts = [f"<{tag}>" if self.props is None else f"<{tag}{self.props_to_html()}>"]
+        append = parts.append
+        stack = None
+        children = iter(children)
+        while True:
+            for child in children:
+                if child.children is None or not isinstance(child, ParentNode):
+                    append(child.to_html())
+                    continue
+                if stack is None:
+                    stack = []
+                stack.append((children, tag))
+                tag = child.tag
+                children = child.children
+                if tag is None or not children:
+                    child._check_renderable()
+                append(f"<{tag}>" if child.props is None else f"<{tag}{child.props_to_html()}>")
+                children = iter(children)
+                break
+            else:
+                append(f"</{tag}>")
+                if not stack:
+                    return "".join(parts)
+                children, tag = stack.pop()
 
     def __repr__(self):
-        return f"ParentNode(tag={self.tag}, children={self.children}, props={self.props})"
\ No newline at end of file
+        return f"ParentNode(tag={self.tag}, children={self.children}, props={self.props})"
@@ -0,0 +1,112 @@
+import re
+
+from textnode import TextNode, TextType
+
+# Inline syntax, recognised in a single left-to-right scan:
+#
+#   `code`        TextType.CODE
+#   **bold**      TextType.BOLD
+#   _italic_      TextType.ITALIC (also *italic*)
+#   [text](url)   TextType.LINK
+#   ![alt](url)   TextType.IMAGE
+#
+# Spans don't nest: everything between an opening delimiter and the next
+# matching closing delimiter is taken literally, so "**a _b_**" is a single
+# bold node with the text "a _b_". An opening ` without a closing one
+# raises ValueError. An _ only opens italic at the start of a word and only
+# closes one at the end of a word, so snake_case names stay plain text. A *
+# or ** only opens before a non-space and only closes after one. An _, * or
+# ** that doesn't open a closed span is plain text, so "5 * 3", "a ** b" and
+# "the _id field" stay as written. Brackets that don't form a complete link
+# or image are plain text.
+#
+# A search for a closing delimiter that finds none also rules out every
+# later position, so the first position each search failed from is kept
+# and the scan stays linear however many delimiters are left unclosed.
+
+_SPECIAL = re.compile(r"[`*_!\[]")
+_LINK = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_WORD_UNDERSCORE = re.compile(r"_(?!\w)")
+_CLOSING_STAR = re.compile(r"(?<=\S)\*")
+_CLOSING_STARS = re.compile(r"(?<=\S)\*\*")
+
+
+def _closing(text, delimiter, start):
+    end = text.find(delimiter, start)
+    if end == -1:
+        raise ValueError(f"Invalid markdown: unclosed {delimiter!r}")
+    return end
+
+
+def _search(pattern, text, start, unclosed):
+    if start >= unclosed.get(pattern, len(text) + 1):
+        return None
+    match = pattern.search(text, start)
+    if match is None:
+        unclosed[pattern] = start
+    return match
+
+
+def iter_textnodes(text):
+    text_start = 0
+    pos = 0
+    length = len(text)
+    # closing pattern -> first position a search for it failed from
+    unclosed = {}
+    while pos < length:
+        match = _SPECIAL.search(text, pos)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+        if char == "`":
+            end = _closing(text, "`", i + 1)
+            node = TextNode(text[i + 1:end], TextType.CODE)
+            pos = end + 1
+        elif char == "*":
+            width = 2 if text.startswith("**", i) else 1
+            start = i + width
+            closing = None
+            if start < length and not text[start].isspace():
+                closing = _search(_CLOSING_STARS if width == 2 else _CLOSING_STAR, text, start + 1, unclosed)
+            if closing is None:
+                pos = start
+                continue
+            end = closing.start()
+            node = TextNode(text[start:end], TextType.BOLD if width == 2 else TextType.ITALIC)
+            pos = end + width
+        elif char == "_":
+            if i > 0 and (text[i - 1].isalnum() or text[i - 1] == "_"):
+                pos = i + 1
+                continue
+            closing = _search(_WORD_UNDERSCORE, text, i + 1, unclosed)
+            if closing is None:
+                pos = i + 1
+                continue
+            end = closing.start()
+            node = TextNode(text[i + 1:end], TextType.ITALIC)
+            pos = end + 1
+        elif char == "!":
+            link = _LINK.match(text, i + 1)
+            if link is None:
+                pos = i + 1
+                continue
+            node = TextNode(link.group(1), TextType.IMAGE, link.group(2))
+            pos = link.end()
+        else:
+            link = _LINK.match(text, i)
+            if link is None:
+                pos = i + 1
+                continue
+            node = TextNode(link.group(1), TextType.LINK, link.group(2))
+            pos = link.end()
+        if text_start < i:
+            yield TextNode(text[text_start:i], TextType.TEXT)
+        yield node
+        text_start = pos
+    if text_start < length:
+        yield TextNode(text[text_start:], TextType.TEXT)
+
+
+def text_to_textnodes(text):
+    return list(iter_textnodes(text))
@@ -0,0 +1,230 @@
+import json
+import os
+import posixpath
+import re
+import time
+from email.utils import formatdate
+from urllib.parse import unquote
+from xml.sax.saxutils import escape
+
+from block_markdown import unique_heading_id
+from manifest import write_atomic
+from textnode import TextType
+
+LINKS_VERSION = 1
+# Items in rss.xml: the most recently changed pages.
+FEED_ITEMS = 20
+# Longest page summary kept for the feed, in characters.
+SUMMARY_LENGTH = 200
+
+_SCHEME = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+_LINK_TYPES = (TextType.LINK, TextType.IMAGE)
+_COMPACT = (",", ":")
+
+
+def resolve_url(url, rel_path):
+    # (path under the public dir, fragment) an internal link on page
+    # rel_path points at, or None for an external one (a scheme or
+    # "//host"). Relative URLs resolve against the linking page, "/blog/"
+    # means "/blog/index.html" and a bare "#anchor" the page itself. A
+    # path that climbs out of the site starts with "../".
+    path, _, fragment = url.partition("#")
+    path = unquote(path.split("?", 1)[0])
+    if path.startswith("//") or _SCHEME.match(path):
+        return None
+    if not path:
+        return output_path_for(rel_path), unquote(fragment)
+    if path.startswith("/"):
+        path = path[1:]
+    else:
+        path = posixpath.join(posixpath.dirname(rel_path), path)
+    if not path or path.endswith("/"):
+        path += "index.html"
+    return posixpath.normpath(path), unquote(fragment)
+
+
+def page_links(rel_path, parsed):
+    # The index entry of a rendered page (see LinkIndex): its heading
+    # anchors (deduplicated as render_markdown does), its internal links
+    # and images as [url, target, fragment], and the text of its first
+    # paragraph as a summary.
+    anchors = set()
+    links = []
+    summary = None
+    for tag, content in parsed:
+        if tag == "pre":
+            continue
+        if tag == "ul" or tag == "ol":
+            nodes = [node for item in content for node in item]
+        else:
+            nodes = content
+            if tag[0] == "h":
+                unique_heading_id(content, anchors)
+            elif tag == "p" and summary is None:
+                summary = _summary(content)
+        for node in nodes:
+            if node.text_type in _LINK_TYPES and node.url is not None:
+                target = resolve_url(node.url, rel_path)
+                if target is not None:
+                    links.append([node.url, *target])
+    return sorted(anchors), links, summary or ""
+
+
+def _summary(nodes):
+    text = " ".join("".join(node.text for node in nodes).split())
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    return text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+def page_for_url(url, rel_path):
+    # The content path of the page an internal link on page rel_path points
+    # at (resolved as by resolve_url), or None for external links, links
+    # out of the site and anything but .html/.md.
+    target = resolve_url(url, rel_path)
+    if target is None:
+        return None
+    path = target[0]
+    if path == ".." or path.startswith("../"):
+        return None
+    if path.endswith(".html"):
+        return path[:-5] + ".md"
+    if path.endswith(".md"):
+        return path
+    return None
+
+
+def output_path_for(rel_path):
+    # Path under the public dir a content page is written to.
+    return os.path.splitext(rel_path)[0] + ".html"
+
+
+def page_url(rel_path):
+    # Canonical URL path of a page: "/blog/post.html", "/blog/" for an
+    # index page.
+    url = "/" + output_path_for(rel_path)
+    if url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+
+def _date(mtime_ns):
+    return time.strftime("%Y-%m-%d", time.gmtime(mtime_ns / 1e9))
+
+
+class LinkIndex:
+    # Every heading anchor and internal link of the site, so links can be
+    # checked and sitemap.xml/rss.xml written without reading any output
+    # back. Kept under the cache dir as
+    #   {"pages": {rel_path: [anchors, links, summary, source mtime_ns]},
+    #    "base_url": what sitemap.xml and rss.xml were last written for}
+    # with links as [url, target, fragment], target being the path under
+    # the public dir the link resolves to, so checking one is a dict and a
+    # set lookup. Pages replace their entry when rendered; the others'
+    # carry over from the last build.
+    def __init__(self, path, pages=None, base_url=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.base_url = base_url
+        self.changed = False
+
+    @classmethod
+    def load(cls, path, reset=False):
+        data = {}
+        if not reset:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pass
+        if data.get("version") != LINKS_VERSION:
+            return cls(path, base_url=data.get("base_url"))
+        return cls(path, data.get("pages"), data.get("base_url"))
+
+    def save(self):
+        data = {
+            "version": LINKS_VERSION,
+            "pages": dict(sorted(self.pages.items())),
+            "base_url": self.base_url,
+        }
+        write_atomic(self.path, json.dumps(data, separators=_COMPACT, ensure_ascii=False).encode("utf-8"))
+        self.changed = False
+
+    def add(self, rel_path, anchors, links, summary, mtime_ns):
+        entry = [anchors, links, summary, mtime_ns]
+        if self.pages.get(rel_path) != entry:
+            self.pages[rel_path] = entry
+            self.changed = True
+
+    def remove(self, rel_path):
+        if self.pages.pop(rel_path, None) is not None:
+            self.changed = True
+
+    def check(self, public_dir, assets=(), check_assets=False):
+        # (page, url, problem) for every link to a page or anchor that
+        # doesn't exist, in page order. Links to anything but pages are
+        # only looked at with check_assets: they must be one of assets
+        # (paths under the public dir) or a file there.
+        anchors = {output_path_for(rel_path): set(entry[0]) for rel_path, entry in self.pages.items()}
+        files = {}
+        broken = []
+        for rel_path in sorted(self.pages):
+            for url, target, fragment in self.pages[rel_path][1]:
+                page_anchors = anchors.get(target)
+                if page_anchors is not None:
+                    if fragment and fragment not in page_anchors:
+                        broken.append((rel_path, url, f"no #{fragment} anchor on /{target}"))
+                elif target.startswith("../") or target == "..":
+                    broken.append((rel_path, url, "points outside the site"))
+                elif target in assets:
+                    continue
+                elif target.endswith((".html", ".md")):
+                    broken.append((rel_path, url, "no such page"))
+                elif check_assets:
+                    exists = files.get(target)
+                    if exists is None:
+                        exists = files[target] = os.path.isfile(os.path.join(public_dir, target))
+                    if not exists:
+                        broken.append((rel_path, url, "no such file"))
+        return broken
+
+    def links(self):
+        return sum(len(entry[1]) for entry in self.pages.values())
+
+    def sitemap(self, base_url):
+        base = base_url.rstrip("/")
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        ]
+        for rel_path, entry in sorted(self.pages.items()):
+            loc = escape(base + page_url(rel_path))
+            lines.append(f"<url><loc>{loc}</loc><lastmod>{_date(entry[3])}</lastmod></url>")
+        lines.append("</urlset>")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def feed(self, base_url, titles):
+        # RSS 2.0 for the FEED_ITEMS most recently changed pages; titles
+        # maps pages to their titles. The channel is named after the home
+        # page.
+        base = base_url.rstrip("/")
+        newest = sorted(self.pages.items(), key=lambda item: (-item[1][3], item[0]))[:FEED_ITEMS]
+        site_title = titles.get("index.md", base)
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<rss version="2.0"><channel>',
+            f"<title>{escape(site_title)}</title>",
+            f"<link>{escape(base)}/</link>",
+            f"<description>{escape(site_title)}</description>",
+        ]
+        if newest:
+            lines.append(f"<lastBuildDate>{formatdate(newest[0][1][3] / 1e9, usegmt=True)}</lastBuildDate>")
+        for rel_path, entry in newest:
+            link = escape(base + page_url(rel_path))
+            lines.append(
+                f"<item><title>{escape(titles.get(rel_path, rel_path))}</title><link>{link}</link>"
+                f"<guid>{link}</guid><pubDate>{formatdate(entry[3] / 1e9, usegmt=True)}</pubDate>"
+                f"<description>{escape(entry[2])}</description></item>"
+            )
+        lines.append("</channel></rss>")
+        return ("\n".join(lines) + "\n").encode("utf-8")
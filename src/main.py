@@ -1,7 +1,283 @@
-from textnode import TextNode, TextType
+import argparse
+import os
+import sys
 
-def main():
+from build import (
+    DEFAULT_MAX_IN_FLIGHT,
+    BuildConfig,
+    PageError,
+    build_site,
+    dependent_outputs,
+    explain_output,
+    format_size,
+)
+from compress import DEFAULT_MAX_RATIO, DEFAULT_MIN_SIZE
+from highlight import DEFAULT_CACHE_BYTES, HighlightCache
+from parse_cache import DEFAULT_MAX_BYTES, ParseCache
+from tracing import NULL_TRACER, MemoryBudgetExceeded, Tracer
 
-    node = TextNode("This is some anchor text", TextType.LINK, "https://www.boot.dev")
-    print(node)
 
+def add_build_arguments(parser):
+    parser.add_argument("--content", default="content", help="directory of Markdown pages")
+    parser.add_argument("--template", default="template.html", help="HTML page template")
+    parser.add_argument("--static", default="static", help="directory of static assets")
+    parser.add_argument("--public", default="public", help="output directory")
+    parser.add_argument("--cache-dir", default=".cache", help="where the build manifest is kept")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and rebuild everything")
+    parser.add_argument("--checksum-assets", action="store_true", help="compare static assets by content, not mtime")
+    parser.add_argument("--link-assets", action="store_true", help="hardlink static assets instead of copying them")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="render pages in N worker processes")
+    parser.add_argument("--io-threads", type=int, default=4, metavar="N", help="write outputs from N background threads")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        metavar="N",
+        help="keep at most N rendered pages waiting to be written",
+    )
+    parser.add_argument("--compress", action="store_true", help="write .gz variants of changed HTML/CSS/JS outputs")
+    parser.add_argument("--deflate", action="store_true", help="with --compress, also write zlib .zz variants")
+    parser.add_argument(
+        "--compress-min-size",
+        type=parse_size,
+        default=DEFAULT_MIN_SIZE,
+        metavar="SIZE",
+        help="don't compress files smaller than SIZE",
+    )
+    parser.add_argument(
+        "--compress-max-ratio",
+        type=float,
+        default=DEFAULT_MAX_RATIO,
+        metavar="RATIO",
+        help="skip variants larger than RATIO times the original",
+    )
+    parser.add_argument("--search", action="store_true", help="maintain a sharded search index in public/search/")
+    parser.add_argument("--no-highlight", action="store_true", help="render code blocks as plain text")
+    parser.add_argument(
+        "--check-links", action="store_true", help="report internal links to missing pages or heading anchors"
+    )
+    parser.add_argument(
+        "--check-assets", action="store_true", help="also check links to files other than pages (implies --check-links)"
+    )
+    parser.add_argument("--base-url", metavar="URL", help="write sitemap.xml and rss.xml for the site at URL")
+    parser.add_argument("--no-parse-cache", action="store_true", help="always re-parse Markdown instead of using cached parses")
+    parser.add_argument(
+        "--parse-cache-size",
+        type=parse_size,
+        default=DEFAULT_MAX_BYTES,
+        metavar="SIZE",
+        help="evict cached parses beyond SIZE (e.g. 64M)",
+    )
+    parser.add_argument(
+        "--highlight-cache-size",
+        type=parse_size,
+        default=DEFAULT_CACHE_BYTES,
+        metavar="SIZE",
+        help="evict cached code highlights beyond SIZE (e.g. 16M)",
+    )
+
+
+def parse_size(text):
+    # "1048576", "512K", "64M" or "1G" -> bytes
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    multiplier = units.get(text[-1:].upper(), 1)
+    number = text[:-1] if multiplier != 1 else text
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+
+
+def add_trace_arguments(parser):
+    parser.add_argument("--trace", metavar="FILE", help="write per-stage and per-page spans as a Chrome trace")
+    parser.add_argument("--trace-memory", action="store_true", help="record the tracemalloc peak of each stage")
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="fail the build when a stage's tracemalloc peak exceeds SIZE (implies --trace-memory)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        nargs="?",
+        const=25,
+        metavar="N",
+        help="run the build under cProfile and print the N hottest functions",
+    )
+
+
+def run_build(args):
+    config = config_from_args(args)
+    tracer = NULL_TRACER
+    memory = args.trace_memory or args.max_memory is not None
+    if args.trace or memory:
+        tracer = Tracer(memory=memory, memory_limit=args.max_memory)
+    if memory:
+        import tracemalloc
+
+        tracemalloc.start()
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    try:
+        if profiler is not None:
+            report = profiler.runcall(build_site, config, tracer=tracer)
+        else:
+            report = build_site(config, tracer=tracer)
+    except MemoryBudgetExceeded:
+        # Still show the peaks of the stages that ran.
+        for line in tracer.summary():
+            print(line)
+        raise
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    for line in report.summary() + tracer.summary():
+        print(line)
+    if args.trace:
+        tracer.write(args.trace)
+        print(f"trace written to {args.trace}")
+    if profiler is not None:
+        import pstats
+
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("tottime").print_stats(args.profile)
+    return report
+
+
+def config_from_args(args):
+    return BuildConfig(
+        content_dir=args.content,
+        template_path=args.template,
+        static_dir=args.static,
+        public_dir=args.public,
+        cache_dir=args.cache_dir,
+        force=args.force,
+        jobs=args.jobs,
+        asset_checksum=args.checksum_assets,
+        asset_links=args.link_assets,
+        parse_cache=not args.no_parse_cache,
+        parse_cache_size=args.parse_cache_size,
+        io_threads=args.io_threads,
+        compress=args.compress,
+        compress_deflate=args.deflate,
+        compress_min_size=args.compress_min_size,
+        compress_max_ratio=args.compress_max_ratio,
+        search=args.search,
+        max_in_flight=args.max_in_flight,
+        highlight=not args.no_highlight,
+        highlight_cache_size=args.highlight_cache_size,
+        check_links=args.check_links or args.check_assets,
+        check_assets=args.check_assets,
+        base_url=args.base_url,
+    )
+
+
+def run_cache(args):
+    # Returns {cache name: DiskCacheStats} after pruning, if asked to.
+    caches = [
+        ("parse", ParseCache(args.cache_dir), args.max_size),
+        ("highlight", HighlightCache(args.cache_dir), args.highlight_max_size),
+    ]
+    results = {}
+    for name, cache, max_size in caches:
+        if args.action == "prune":
+            removed, freed = cache.prune(max_size)
+            print(f"{name} cache: removed {removed} entries ({format_size(freed)})")
+        stats = results[name] = cache.stats()
+        print(f"{name} cache: {stats.entries} entries, {format_size(stats.bytes)} in {cache.directory}")
+        if stats.stale_entries:
+            print(f"stale: {stats.stale_entries} entries ({format_size(stats.stale_bytes)}) from other {name} versions")
+    return results
+
+
+def run_deps(args):
+    config = BuildConfig(content_dir=args.content, public_dir=args.public, cache_dir=args.cache_dir)
+    if args.action == "why":
+        lines = explain_output(config, args.path)
+    else:
+        lines = [os.path.join(args.public, output) for output in dependent_outputs(config, args.path)]
+    for line in lines:
+        print(line)
+    return lines
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    # "build" is the default command, so "main.py --force" still works.
+    if not argv or argv[0].startswith("-") and argv[0] not in ("-h", "--help"):
+        argv = ["build", *argv]
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Static site generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the site into the public dir")
+    add_build_arguments(build_parser)
+    add_trace_arguments(build_parser)
+    serve_parser = commands.add_parser("serve", help="build, then serve the public dir locally")
+    add_build_arguments(serve_parser)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8888)
+    serve_parser.add_argument("--watch", action="store_true", help="rebuild changed pages and live-reload browsers")
+    serve_parser.add_argument("--interval", type=float, default=0.5, help="seconds between change scans")
+    daemon_parser = commands.add_parser("daemon", help="serve builds from a warm process over a Unix socket")
+    add_build_arguments(daemon_parser)
+    daemon_parser.add_argument("--socket", help="socket path (default: daemon.sock in the cache dir)")
+    daemon_parser.add_argument("--interval", type=float, default=0.5, help="seconds between source code checks")
+    cache_parser = commands.add_parser("cache", help="inspect or prune the parse and highlight caches")
+    cache_parser.add_argument("action", choices=("stats", "prune"))
+    cache_parser.add_argument("--cache-dir", default=".cache", help="where the build caches are kept")
+    cache_parser.add_argument(
+        "--max-size",
+        type=parse_size,
+        default=DEFAULT_MAX_BYTES,
+        metavar="SIZE",
+        help="prune least recently used parses until the parse cache fits in SIZE",
+    )
+    cache_parser.add_argument(
+        "--highlight-max-size",
+        type=parse_size,
+        default=DEFAULT_CACHE_BYTES,
+        metavar="SIZE",
+        help="prune least recently used highlights until the highlight cache fits in SIZE",
+    )
+    deps_parser = commands.add_parser("deps", help="query the dependency graph of the last build")
+    deps_parser.add_argument("action", choices=("why", "users"))
+    deps_parser.add_argument("path", help="an output for why; the template, a fragment or a page for users")
+    deps_parser.add_argument("--content", default="content", help="directory of Markdown pages")
+    deps_parser.add_argument("--public", default="public", help="output directory")
+    deps_parser.add_argument("--cache-dir", default=".cache", help="where the build manifest is kept")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        try:
+            report = run_build(args)
+        except (MemoryBudgetExceeded, PageError) as e:
+            parser.exit(1, f"build failed: {e}\n")
+        if report.broken_links:
+            # Listed in the summary; the exit status is for CI.
+            return 1
+    elif args.command == "serve":
+        from server import serve
+
+        serve(config_from_args(args), args.host, args.port, args.watch, args.interval)
+    elif args.command == "daemon":
+        from daemon import run_daemon
+
+        socket_path = args.socket or os.path.join(args.cache_dir, "daemon.sock")
+        run_daemon(config_from_args(args), socket_path, args.interval)
+    elif args.command == "cache":
+        run_cache(args)
+    elif args.command == "deps":
+        try:
+            run_deps(args)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 4
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def stat_key(st):
+    return [st.st_mtime_ns, st.st_size]
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class Manifest:
+    # Per-build record of what produced each output, stored as JSON under
+    # the cache dir. Page entries look like
+    #   {"stat": [mtime_ns, size], "source": hash, "title": "Post",
+    #    "output": hash, "output_path": "blog/post.html"}
+    # and are keyed by the page's path relative to the content dir. What
+    # else a page was built from lives in the dependency graph (depgraph.py).
+    def __init__(self, path, pages=None, assets=None, compressed=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else {}
+        # output rel path -> {"stat": ..., "options": [...], "variants":
+        # {".gz": size}} for the precompressed siblings (compress.py)
+        self.compressed = compressed if compressed is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages"), data.get("assets"), data.get("compressed"))
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "pages": dict(sorted(self.pages.items())),
+            "assets": dict(sorted(self.assets.items())),
+            "compressed": dict(sorted(self.compressed.items())),
+        }
+        write_atomic(self.path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
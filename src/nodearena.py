@@ -0,0 +1,235 @@
+from array import array
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+
+# Node kinds stored in NodeArena.kinds
+LEAF = 0
+PARENT = 1
+OTHER = 2
+
+# child_count marker for a ParentNode whose children is None
+NO_CHILDREN = -1
+
+
+class NodeArena:
+    # Columnar storage for a whole HTMLNode tree. Node i is described by
+    # kinds[i], tags[i], values[i] and props[i]; its children are the ids
+    # child_ids[child_start[i]:child_start[i] + child_count[i]]. Tags and
+    # props mappings are interned into shared tables (index 0 means None);
+    # a props entry is kept as a tuple of items and its attribute string is
+    # rendered the first time a node using it is serialized.
+    # Nodes are appended children-first, so the root is normally the last
+    # node added.
+    __slots__ = (
+        "kinds",
+        "tags",
+        "values",
+        "props",
+        "child_start",
+        "child_count",
+        "child_ids",
+        "tag_table",
+        "props_table",
+        "props_html",
+        "_tag_ids",
+        "_props_ids",
+    )
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.tags = array("i")
+        self.values = []
+        self.props = array("i")
+        self.child_start = array("i")
+        self.child_count = array("i")
+        self.child_ids = array("i")
+        self.tag_table = [None]
+        self.props_table = [None]
+        self.props_html = [""]
+        self._tag_ids = {None: 0}
+        self._props_ids = {}
+
+    @classmethod
+    def from_node(cls, root):
+        arena = cls()
+        # Iterative post-order walk; a node object reachable from several
+        # parents is stored once and shared.
+        ids = {}
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in ids:
+                continue
+            children = node.children if isinstance(node, ParentNode) else None
+            if children and not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+            if isinstance(node, ParentNode):
+                if children is None:
+                    index = arena.parent(node.tag, None, node.props)
+                else:
+                    index = arena.parent(
+                        node.tag, [ids[id(child)] for child in children], node.props
+                    )
+            elif isinstance(node, LeafNode):
+                index = arena.leaf(node.tag, node.value, node.props)
+            else:
+                index = arena._append(OTHER, node.tag, node.value, node.props, 0, 0)
+            ids[id(node)] = index
+        return arena
+
+    def leaf(self, tag, value, props=None):
+        return self._append(LEAF, tag, value, props, 0, 0)
+
+    def parent(self, tag, child_ids, props=None):
+        if child_ids is None:
+            return self._append(PARENT, tag, None, props, 0, NO_CHILDREN)
+        start = len(self.child_ids)
+        self.child_ids.extend(child_ids)
+        return self._append(PARENT, tag, None, props, start, len(child_ids))
+
+    def _append(self, kind, tag, value, props, start, count):
+        self.child_start.append(start)
+        self.kinds.append(kind)
+        self.tags.append(self._intern_tag(tag))
+        self.values.append(value)
+        self.props.append(self._intern_props(props))
+        self.child_count.append(count)
+        return len(self.kinds) - 1
+
+    def _intern_tag(self, tag):
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self.tag_table)
+            self.tag_table.append(tag)
+            self._tag_ids[tag] = tag_id
+        return tag_id
+
+    def _intern_props(self, props):
+        if props is None:
+            return 0
+        # Only all-str mappings are shared (see htmlnode.intern_props).
+        key = tuple(props.items())
+        try:
+            props_id = self._props_ids.get(key)
+        except TypeError:
+            props_id = None
+        if props_id is None:
+            props_id = len(self.props_table)
+            self.props_table.append(key)
+            self.props_html.append(None)
+            if all(type(value) is str for _, value in key):
+                self._props_ids[key] = props_id
+        return props_id
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def root(self):
+        return ArenaNode(self, len(self.kinds) - 1)
+
+    def node(self, index):
+        return ArenaNode(self, index)
+
+    def iter_html(self, index=None):
+        if index is None:
+            index = len(self.kinds) - 1
+        kinds = self.kinds
+        tags = self.tags
+        tag_table = self.tag_table
+        values = self.values
+        child_start = self.child_start
+        child_count = self.child_count
+        child_ids = self.child_ids
+        props = self.props
+        stack = [index]
+        while stack:
+            item = stack.pop()
+            if type(item) is str:
+                yield item
+                continue
+            kind = kinds[item]
+            if kind == PARENT:
+                tag = tag_table[tags[item]]
+                count = child_count[item]
+                if tag is None:
+                    raise ValueError("ParentNode must have a tag")
+                if count == NO_CHILDREN:
+                    raise ValueError("ParentNode must have children")
+                if count == 0:
+                    raise ValueError("ParentNode must have at least one child")
+                yield f"<{tag}{self._props_html(props[item])}>"
+                stack.append(f"</{tag}>")
+                start = child_start[item]
+                stack.extend(reversed(child_ids[start:start + count]))
+            elif kind == LEAF:
+                value = values[item]
+                if value is None:
+                    raise ValueError("LeafNode must have a value")
+                tag = tag_table[tags[item]]
+                if tag is None:
+                    yield value
+                elif tag == "img":
+                    yield f"<{tag}{self._props_html(props[item])}>"
+                else:
+                    yield f"<{tag}{self._props_html(props[item])}>{value}</{tag}>"
+            else:
+                raise NotImplementedError("to_html method not implemented")
+
+    def _props_html(self, props_id):
+        html = self.props_html[props_id]
+        if html is None:
+            props = dict(self.props_table[props_id])
+            html = HTMLNode(props=props).props_to_html()
+            self.props_html[props_id] = html
+        return html
+
+    def to_html(self, index=None):
+        return "".join(self.iter_html(index))
+
+
+class ArenaNode:
+    # Lightweight view exposing the HTMLNode interface for one arena slot.
+    # props returns a fresh dict, so mutating it doesn't touch the arena.
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def tag(self):
+        return self.arena.tag_table[self.arena.tags[self.index]]
+
+    @property
+    def value(self):
+        return self.arena.values[self.index]
+
+    @property
+    def props(self):
+        items = self.arena.props_table[self.arena.props[self.index]]
+        if items is None:
+            return None
+        return dict(items)
+
+    @property
+    def children(self):
+        arena = self.arena
+        if arena.kinds[self.index] != PARENT:
+            return None
+        count = arena.child_count[self.index]
+        if count == NO_CHILDREN:
+            return None
+        start = arena.child_start[self.index]
+        return [ArenaNode(arena, i) for i in arena.child_ids[start:start + count]]
+
+    def iter_html(self):
+        return self.arena.iter_html(self.index)
+
+    def to_html(self):
+        return self.arena.to_html(self.index)
+
+    def __repr__(self):
+        return f"ArenaNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
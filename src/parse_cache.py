@@ -0,0 +1,100 @@
+import marshal
+import os
+from collections import OrderedDict
+
+from block_markdown import PARSER_VERSION
+from disk_cache import DiskCache
+from manifest import write_atomic
+from textnode import TextNode, TextType
+
+# Default size bound for the cache directory, enforced by prune().
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_TEXT_TYPES = {text_type.value: text_type for text_type in TextType}
+
+
+def _encode_nodes(nodes):
+    return tuple((node.text, node.text_type.value, node.url) for node in nodes)
+
+
+def _decode_nodes(items):
+    text_types = _TEXT_TYPES
+    return [TextNode(text, text_types[text_type], url) for text, text_type, url in items]
+
+
+def encode_parsed(parsed):
+    # parse_markdown output -> nested tuples of str/None that marshal can
+    # store; see block_markdown.parse_block for the shape.
+    encoded = []
+    for tag, content in parsed:
+        if tag == "pre":
+            encoded.append((tag, content))
+        elif tag == "ul" or tag == "ol":
+            encoded.append((tag, tuple(_encode_nodes(item) for item in content)))
+        else:
+            encoded.append((tag, _encode_nodes(content)))
+    return tuple(encoded)
+
+
+def decode_parsed(encoded):
+    parsed = []
+    for tag, content in encoded:
+        if tag == "pre":
+            parsed.append((tag, content))
+        elif tag == "ul" or tag == "ol":
+            parsed.append((tag, [_decode_nodes(item) for item in content]))
+        else:
+            parsed.append((tag, _decode_nodes(content)))
+    return parsed
+
+
+class ParseCache(DiskCache):
+    # Parsed pages keyed by source hash, one marshal file each under
+    # cache_dir/parse/v<PARSER_VERSION>/. Entries are plain tuples, so a
+    # hit is a marshal.loads and never runs the parser or unpickles
+    # objects. A hit bumps the file's mtime, which is what prune() uses
+    # to evict least recently used entries first. A long-lived process can
+    # also keep up to memory_entries of the encoded tuples in memory (never
+    # the decoded nodes, which builds modify), so its hits skip the disk.
+    suffix = ".marshal"
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, memory_entries=0):
+        super().__init__(os.path.join(cache_dir, "parse"), PARSER_VERSION, max_bytes)
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source_hash):
+        # Returns (title, parsed) or None.
+        entry = self._memory.get(source_hash)
+        if entry is not None:
+            self._memory.move_to_end(source_hash)
+            self.hits += 1
+            return entry[0], decode_parsed(entry[1])
+        path = self._path(source_hash)
+        try:
+            with open(path, "rb") as f:
+                title, encoded = marshal.loads(f.read())
+            parsed = decode_parsed(encoded)
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            self.misses += 1
+            return None
+        self.touch(path)
+        self._remember(source_hash, title, encoded)
+        self.hits += 1
+        return title, parsed
+
+    def put(self, source_hash, title, parsed):
+        encoded = encode_parsed(parsed)
+        data = marshal.dumps((title, encoded))
+        write_atomic(self._path(source_hash), data)
+        self.added(len(data))
+        self._remember(source_hash, title, encoded)
+
+    def _remember(self, source_hash, title, encoded):
+        if not self.memory_entries:
+            return
+        self._memory[source_hash] = (title, encoded)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
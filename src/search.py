@@ -0,0 +1,274 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+import time
+
+from links import output_path_for
+from manifest import write_atomic
+from writer import write_output
+
+SEARCH_VERSION = 1
+# Terms are sharded by their first PREFIX_LENGTH characters.
+PREFIX_LENGTH = 2
+# Document ids per docs/<n>.json file.
+DOCS_PER_SHARD = 1024
+
+_TERM = re.compile(r"\w+")
+_PLAIN_KEY = re.compile(r"[a-z0-9]+")
+_COMPACT = (",", ":")
+
+
+def iter_page_text(title, parsed):
+    # The searchable text of a page: its title and every inline node and
+    # code block of its parse_markdown output.
+    yield title
+    for tag, content in parsed:
+        if tag == "pre":
+            yield content[1]
+        elif tag == "ul" or tag == "ol":
+            for item in content:
+                for node in item:
+                    yield node.text
+        else:
+            for node in content:
+                yield node.text
+
+
+def page_terms(title, parsed):
+    # Sorted distinct terms of a page; single characters and runaway
+    # tokens (minified code, hashes) aren't worth indexing.
+    terms = set()
+    for text in iter_page_text(title, parsed):
+        terms.update(_TERM.findall(text.lower()))
+    return sorted(term for term in terms if 2 <= len(term) <= 40)
+
+
+def shard_name(term):
+    # File name (without .json) of the shard holding term: the prefix
+    # itself when it's plain ASCII, else "_" + its UTF-8 bytes in hex.
+    key = term[:PREFIX_LENGTH]
+    if _PLAIN_KEY.fullmatch(key):
+        return key
+    return "_" + key.encode("utf-8").hex()
+
+
+def encode_postings(ids):
+    # Sorted doc ids -> first id followed by the gaps between them.
+    previous = 0
+    gaps = []
+    for doc_id in ids:
+        gaps.append(doc_id - previous)
+        previous = doc_id
+    return gaps
+
+
+def decode_postings(gaps):
+    ids = []
+    doc_id = 0
+    for gap in gaps:
+        doc_id += gap
+        ids.append(doc_id)
+    return ids
+
+
+class SearchStats:
+    def __init__(self):
+        self.indexed = 0
+        self.removed = 0
+        self.shards_written = 0
+        self.shard_bytes_written = 0
+        self.largest_shard = 0
+        self.shards = 0
+        self.shard_bytes = 0
+        self.elapsed = 0.0
+
+
+class SearchIndex:
+    # Inverted index of the site under public/search/:
+    #   terms/<prefix>.json  {"term": [delta-encoded doc ids], ...}
+    #   docs/<n>.json        [[url, title] or null, ...] for doc ids
+    #                        n * DOCS_PER_SHARD onwards
+    #   meta.json            prefix length, docs per shard, doc count
+    # State kept under the cache dir maps each page to
+    # [doc id, title, terms hash, shard names], which is what lets an
+    # incremental build rewrite only the shards a changed page was or is
+    # now in. Pages whose title and terms didn't change touch nothing.
+    def __init__(self, path, output_dir, pages=None, free_ids=None):
+        self.path = path
+        self.output_dir = output_dir
+        self.pages = pages if pages is not None else {}
+        # a heap, so the lowest freed id is reused first
+        self.free_ids = free_ids if free_ids is not None else []
+        heapq.heapify(self.free_ids)
+        # changes recorded by remove()/add() and not yet flushed
+        self._stats = None
+
+    @classmethod
+    def load(cls, path, output_dir, reset=False):
+        data = {}
+        if not reset:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pass
+        if data.get("version") != SEARCH_VERSION or not os.path.isdir(output_dir):
+            # Without state the existing shards can't be updated safely.
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return cls(path, output_dir)
+        return cls(path, output_dir, data.get("pages"), data.get("free_ids"))
+
+    def save(self):
+        data = {
+            "version": SEARCH_VERSION,
+            "pages": dict(sorted(self.pages.items())),
+            "free_ids": sorted(self.free_ids),
+        }
+        write_atomic(self.path, json.dumps(data, separators=_COMPACT).encode("utf-8"))
+
+    def update(self, changed, deleted):
+        # changed maps page rel path -> (title, terms) for pages rendered
+        # this build; deleted lists pages that are gone.
+        for rel_path in deleted:
+            self.remove(rel_path)
+        for rel_path, (title, terms) in changed.items():
+            self.add(rel_path, title, terms)
+        return self.flush()
+
+    def _pending(self):
+        if self._stats is None:
+            self._stats = SearchStats()
+            self._removed_ids = set()
+            self._additions = {}
+            self._touched_shards = set()
+            self._touched_docs = set()
+            # Past every id in use or free, so a free id (reused from the
+            # heap) is never also handed out as a new one.
+            used = [entry[0] for entry in self.pages.values()]
+            self._next_id = max(used + self.free_ids, default=-1) + 1
+        return self._stats
+
+    def remove(self, rel_path):
+        # Drops a deleted page; its doc id is freed for reuse. Removals
+        # should come before the adds of the same update so the ids are
+        # reused within it.
+        stats = self._pending()
+        entry = self.pages.pop(rel_path, None)
+        if entry is None:
+            return
+        doc_id, _, _, shards = entry
+        self._removed_ids.add(doc_id)
+        self._touched_shards.update(shards)
+        self._touched_docs.add(doc_id // DOCS_PER_SHARD)
+        heapq.heappush(self.free_ids, doc_id)
+        stats.removed += 1
+
+    def add(self, rel_path, title, terms):
+        # Records a rendered page's terms; nothing is written until
+        # flush(), so a build can feed pages in as they stream past and
+        # drop each page's terms right after. Freed doc ids are reused,
+        # lowest first, so the docs files stay dense.
+        stats = self._pending()
+        start = time.perf_counter()
+        terms_hash = hashlib.blake2b("\n".join(terms).encode("utf-8"), digest_size=8).hexdigest()
+        entry = self.pages.get(rel_path)
+        if entry is not None and entry[1] == title and entry[2] == terms_hash:
+            return
+        if entry is not None:
+            doc_id = entry[0]
+            self._removed_ids.add(doc_id)
+            self._touched_shards.update(entry[3])
+        elif self.free_ids:
+            doc_id = heapq.heappop(self.free_ids)
+        else:
+            doc_id = self._next_id
+            self._next_id += 1
+        shards = sorted({shard_name(term) for term in terms})
+        self.pages[rel_path] = [doc_id, title, terms_hash, shards]
+        self._touched_shards.update(shards)
+        self._touched_docs.add(doc_id // DOCS_PER_SHARD)
+        additions = self._additions
+        for term in terms:
+            additions.setdefault(shard_name(term), {}).setdefault(term, []).append(doc_id)
+        stats.indexed += 1
+        stats.elapsed += time.perf_counter() - start
+
+    def flush(self):
+        # Rewrites the shards and docs files touched since the last flush
+        # and returns the stats of that update.
+        stats = self._pending()
+        start = time.perf_counter()
+        touched_shards = self._touched_shards
+        touched_docs = self._touched_docs
+        for name in sorted(touched_shards):
+            size = self._update_shard(name, self._removed_ids, self._additions.get(name, {}))
+            if size is not None:
+                stats.shards_written += 1
+                stats.shard_bytes_written += size
+                stats.largest_shard = max(stats.largest_shard, size)
+        if touched_docs:
+            self._write_docs(touched_docs)
+        if touched_shards or touched_docs:
+            meta = {"version": SEARCH_VERSION, "prefix_length": PREFIX_LENGTH,
+                    "docs_per_shard": DOCS_PER_SHARD, "docs": len(self.pages)}
+            self._write("meta.json", meta)
+
+        terms_dir = os.path.join(self.output_dir, "terms")
+        if os.path.isdir(terms_dir):
+            for entry in os.scandir(terms_dir):
+                stats.shards += 1
+                stats.shard_bytes += entry.stat().st_size
+        stats.elapsed += time.perf_counter() - start
+        self._stats = None
+        return stats
+
+    def _write(self, rel_path, data):
+        encoded = json.dumps(data, separators=_COMPACT, ensure_ascii=False).encode("utf-8")
+        write_output(os.path.join(self.output_dir, rel_path), encoded)
+        return len(encoded)
+
+    def _update_shard(self, name, removed_ids, additions):
+        # Rewrites one term shard; returns its new size, or None if it
+        # ended up empty and was removed.
+        rel_path = f"terms/{name}.json"
+        path = os.path.join(self.output_dir, rel_path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                shard = json.load(f)
+        except FileNotFoundError:
+            shard = {}
+        postings = {}
+        for term, gaps in shard.items():
+            ids = [doc_id for doc_id in decode_postings(gaps) if doc_id not in removed_ids]
+            if ids:
+                postings[term] = ids
+        for term, ids in additions.items():
+            postings[term] = sorted(postings.get(term, []) + ids)
+        if not postings:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return self._write(rel_path, {term: encode_postings(postings[term]) for term in sorted(postings)})
+
+    def _write_docs(self, blocks):
+        by_id = {entry[0]: (rel_path, entry[1]) for rel_path, entry in self.pages.items()}
+        for block in sorted(blocks):
+            first = block * DOCS_PER_SHARD
+            docs = []
+            for doc_id in range(first, first + DOCS_PER_SHARD):
+                page = by_id.get(doc_id)
+                docs.append(None if page is None else ["/" + output_path_for(page[0]), page[1]])
+            while docs and docs[-1] is None:
+                docs.pop()
+            if docs:
+                self._write(f"docs/{block}.json", docs)
+            else:
+                try:
+                    os.remove(os.path.join(self.output_dir, "docs", f"{block}.json"))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from build import WarmState, build_site
+from depgraph import FRAGMENT, DepGraph
+from watch import Watcher
+
+LIVERELOAD_PATH = "/__livereload"
+
+# Long-polls the live-reload endpoint and reloads once the build version
+# it reports changes.
+LIVERELOAD_SCRIPT = b"""<script>
+(function poll(version) {
+  fetch("/__livereload?since=" + version)
+    .then(function (response) { return response.text(); })
+    .then(function (latest) {
+      if (version && latest !== version) { location.reload(); } else { poll(latest); }
+    })
+    .catch(function () { setTimeout(function () { poll(version); }, 1000); });
+})("");
+</script>
+"""
+
+
+class LiveReload:
+    def __init__(self):
+        self.version = 1
+        self._changed = threading.Condition()
+
+    def notify(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait(self, since, timeout=30.0):
+        with self._changed:
+            if since:
+                self._changed.wait_for(lambda: str(self.version) != since, timeout)
+            return self.version
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    livereload = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == LIVERELOAD_PATH:
+            if self.livereload is None:
+                # Not serving with --watch: nothing ever reloads.
+                self.send_error(404)
+                return
+            since = parse_qs(url.query).get("since", [""])[0]
+            self._send(str(self.livereload.wait(since)).encode("ascii"), "text/plain")
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if self.livereload is not None and path.endswith(".html") and os.path.isfile(path):
+            with open(path, "rb") as f:
+                html = f.read()
+            index = html.rfind(b"</body>")
+            if index == -1:
+                index = len(html)
+            self._send(html[:index] + LIVERELOAD_SCRIPT + html[index:], "text/html; charset=utf-8")
+            return
+        super().do_GET()
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.path.startswith(LIVERELOAD_PATH):
+            super().log_message(format, *args)
+
+
+def make_server(public_dir, host="127.0.0.1", port=8888, livereload=None):
+    handler = type("Handler", (DevRequestHandler,), {"livereload": livereload})
+    return ThreadingHTTPServer((host, port), partial(handler, directory=public_dir))
+
+
+def print_report(report):
+    for line in report.summary():
+        print(line)
+
+
+def rebuild(config, changed, state=None):
+    # Content edits only rebuild the touched pages; anything else (the
+    # template or static files) goes through a normal incremental build.
+    content_dir = os.path.abspath(config.content_dir) + os.sep
+    if all(os.path.abspath(path).startswith(content_dir) for path in changed):
+        return build_site(config, pages=changed, state=state)
+    return build_site(config, state=state)
+
+
+def serve(config, host="127.0.0.1", port=8888, watch=False, interval=0.5):
+    state = WarmState()
+    print_report(build_site(config, state=state))
+    livereload = LiveReload() if watch else None
+    httpd = make_server(config.public_dir, host, port, livereload)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"serving {config.public_dir} at http://{host}:{httpd.server_port}/")
+    try:
+        if not watch:
+            threading.Event().wait()
+        # Template fragments are whatever the first build's graph recorded.
+        fragments = [node[len(FRAGMENT):] for node in DepGraph.load(config.deps_path).edges if node.startswith(FRAGMENT)]
+        watcher = Watcher([config.content_dir, config.template_path, *fragments, config.static_dir])
+        print(f"watching {len(watcher.files)} files, scan took {watcher.last_scan_seconds * 1000:.1f} ms")
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            print(f"{len(changed)} changed file(s), scan took {watcher.last_scan_seconds * 1000:.1f} ms")
+            try:
+                print_report(rebuild(config, changed, state))
+            except (OSError, ValueError) as e:
+                print(f"build failed: {e}")
+                continue
+            livereload.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,122 @@
+import marshal
+import os
+import re
+
+from manifest import content_hash, write_atomic
+
+_PLACEHOLDER = re.compile(r"\{\{ (\w+) \}\}")
+# {{ include partials/nav.html }}, resolved relative to the including file
+_INCLUDE = re.compile(r"\{\{ include ([^\s{}]+) \}\}")
+
+# Bump when the compiled form changes so stale cache files are ignored.
+TEMPLATE_FORMAT = 1
+
+
+class Template:
+    # A template compiled into alternating literal segments and slots:
+    # parts[0], parts[2], ... are literal text and parts[1], parts[3], ...
+    # are placeholder names. Rendering is a single join instead of one
+    # full-template str.replace per placeholder.
+    __slots__ = ("parts",)
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+
+    @classmethod
+    def compile(cls, text):
+        parts = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            parts.append(text[position:match.start()])
+            parts.append(match.group(1))
+            position = match.end()
+        parts.append(text[position:])
+        return cls(parts)
+
+    @property
+    def slots(self):
+        return self.parts[1::2]
+
+    def _value(self, values, name):
+        # Placeholders without a value are left in the output untouched.
+        value = values.get(name)
+        if value is None:
+            return "{{ " + name + " }}"
+        return value
+
+    def render(self, values):
+        out = list(self.parts)
+        for i in range(1, len(out), 2):
+            value = self._value(values, out[i])
+            out[i] = value if type(value) is str else value.to_html()
+        return "".join(out)
+
+
+def read_template_sources(path):
+    # Reads a template and every fragment it includes, recursively.
+    # Returns {path: (text, hash, included paths)} with the template first.
+    sources = {}
+
+    def visit(path, chain):
+        if path in chain:
+            raise ValueError(f"Template include cycle: {' -> '.join(chain + [path])}")
+        if path in sources:
+            return
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            if not chain:
+                raise
+            raise ValueError(f"Template include not found: {path} (included from {chain[-1]})")
+        text = data.decode("utf-8")
+        directory = os.path.dirname(path)
+        includes = [os.path.normpath(os.path.join(directory, name)) for name in _INCLUDE.findall(text)]
+        sources[path] = (text, content_hash(data), includes)
+        for include in includes:
+            visit(include, chain + [path])
+
+    visit(path, [])
+    return sources
+
+
+def _expand(path, sources):
+    text = sources[path][0]
+    includes = iter(sources[path][2])
+    return _INCLUDE.sub(lambda match: _expand(next(includes), sources), text)
+
+
+# template hash -> Template, shared by every build in this process
+_compiled = {}
+
+
+def load_template(path, cache_dir=None):
+    # Returns (Template, template hash, sources) where sources is the
+    # read_template_sources mapping. Without includes the hash is the
+    # template file's own; with them it covers every fragment too.
+    # Compiled templates are memoized by that hash in memory and, given
+    # a cache_dir, on disk.
+    sources = read_template_sources(path)
+    hashes = [file_hash for _, file_hash, _ in sources.values()]
+    template_hash = hashes[0] if len(hashes) == 1 else content_hash("".join(hashes).encode("ascii"))
+    template = _compiled.get(template_hash)
+    if template is not None:
+        return template, template_hash, sources
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, "templates", f"{template_hash}.marshal")
+        try:
+            with open(cache_path, "rb") as f:
+                version, parts = marshal.loads(f.read())
+            if version == TEMPLATE_FORMAT:
+                template = Template(parts)
+        except (OSError, EOFError, ValueError, TypeError):
+            template = None
+
+    if template is None:
+        template = Template.compile(_expand(path, sources))
+        if cache_path is not None:
+            write_atomic(cache_path, marshal.dumps((TEMPLATE_FORMAT, template.parts)))
+    _compiled[template_hash] = template
+    return template, template_hash, sources
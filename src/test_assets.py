@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from assets import file_digest, sync_assets
+from build import iter_files
+
+
+class TestSyncAssets(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self._tmp.name, "static")
+        self.public = os.path.join(self._tmp.name, "public")
+        self.write("static/styles.css", "body {}")
+        self.write("static/images/logo.png", "\x89PNG" + "x" * 5000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self._tmp.name, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, rel_path):
+        with open(os.path.join(self._tmp.name, rel_path)) as f:
+            return f.read()
+
+    def sync(self, previous=None, **kwargs):
+        return sync_assets(iter_files(self.static), self.public, previous or {}, **kwargs)
+
+    def test_copy_then_skip(self):
+        result = self.sync()
+        self.assertEqual(sorted(result.copied), ["images/logo.png", "styles.css"])
+        self.assertEqual(result.bytes_copied, 7 + 5005)
+        self.assertEqual(self.read("public/images/logo.png"), "\x89PNG" + "x" * 5000)
+        src = os.stat(os.path.join(self.static, "styles.css"))
+        out = os.stat(os.path.join(self.public, "styles.css"))
+        self.assertEqual(src.st_mtime_ns, out.st_mtime_ns)
+
+        result = self.sync(result.assets)
+        self.assertEqual(result.copied, [])
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(result.bytes_skipped, 7 + 5005)
+
+    def test_changed_file_is_copied(self):
+        assets = self.sync().assets
+        self.write("static/styles.css", "body { color: red; }")
+        result = self.sync(assets)
+        self.assertEqual(result.copied, ["styles.css"])
+        self.assertEqual(self.read("public/styles.css"), "body { color: red; }")
+
+    def test_checksum(self):
+        assets = self.sync().assets
+        # Same size and content but a different mtime: only the checksum
+        # mode recognises it as unchanged.
+        os.utime(os.path.join(self.public, "styles.css"), ns=(0, 0))
+        self.assertEqual(self.sync(assets, checksum=True).copied, [])
+        self.assertEqual(self.sync(assets).copied, ["styles.css"])
+
+    def test_orphans(self):
+        assets = self.sync().assets
+        os.remove(os.path.join(self.static, "styles.css"))
+        result = self.sync(assets)
+        self.assertEqual(result.deleted, ["styles.css"])
+        self.assertNotIn("styles.css", result.assets)
+
+    def test_hardlinks(self):
+        result = self.sync(link=True)
+        self.assertEqual(sorted(result.linked), ["images/logo.png", "styles.css"])
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.static, "styles.css"), os.path.join(self.public, "styles.css"))
+        )
+        self.assertEqual(self.sync(result.assets, link=True).skipped, 2)
+
+    def test_force(self):
+        assets = self.sync().assets
+        self.assertEqual(len(self.sync(assets, force=True).copied), 2)
+
+    def test_file_digest(self):
+        path = os.path.join(self.static, "styles.css")
+        self.assertEqual(file_digest(path), file_digest(os.path.join(self.static, "styles.css")))
+        self.assertNotEqual(file_digest(path), file_digest(os.path.join(self.static, "images/logo.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+
+import bench  # noqa: E402
+
+
+def results(**medians):
+    return {"scenarios": {name: {"median": median} for name, median in medians.items()}}
+
+
+class TestCompare(unittest.TestCase):
+    def test_rows(self):
+        rows = bench.compare(results(parse=1.2, render=1.05, new=1.0), results(parse=1.0, render=1.0, gone=1.0), 0.10)
+        self.assertEqual([row[0] for row in rows], ["parse", "render"])
+        name, before, after, ratio, regressed = rows[0]
+        self.assertEqual((before, after, regressed), (1.0, 1.2, True))
+        self.assertAlmostEqual(ratio, 1.2)
+        self.assertFalse(rows[1][4])
+
+    def test_threshold(self):
+        self.assertFalse(bench.compare(results(parse=1.2), results(parse=1.0), 0.25)[0][4])
+        self.assertTrue(bench.compare(results(parse=1.01), results(parse=1.0), 0.0)[0][4])
+
+
+class TestArguments(unittest.TestCase):
+    def test_repeats_must_be_positive(self):
+        for repeats in ("0", "-1", "x"):
+            with redirect_stderr(StringIO()) as err, self.assertRaises(SystemExit):
+                bench.main(["--repeats", repeats])
+            self.assertIn("expected a positive integer", err.getvalue())
+        self.assertEqual(bench.positive_int("3"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import io
+import unittest
+from block_markdown import (
+    BlockType,
+    MarkdownError,
+    block_to_block_type,
+    iter_blocks,
+    markdown_to_html,
+    markdown_to_html_node,
+    parse_markdown,
+    render_markdown,
+    write_markdown_html,
+)
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_blocks(self):
+        md = """
+This is **bolded** paragraph
+
+This is another paragraph with _italic_ text and `code` here
+This is the same paragraph on a new line
+
+- This is a list
+- with items
+"""
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(md))),
+            [
+                ["This is **bolded** paragraph"],
+                [
+                    "This is another paragraph with _italic_ text and `code` here",
+                    "This is the same paragraph on a new line",
+                ],
+                ["- This is a list", "- with items"],
+            ],
+        )
+
+    def test_code_block_keeps_blank_lines(self):
+        md = "text\n```\na\n\n  b\n```\nafter\n"
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(md))),
+            [["text"], ["```", "a", "", "  b", "```"], ["after"]],
+        )
+
+    def test_heading_is_own_block(self):
+        self.assertEqual(
+            list(iter_blocks(["# Title", "para", "## Sub"])),
+            [["# Title"], ["para"], ["## Sub"]],
+        )
+
+    def test_block_start_lines(self):
+        starts = []
+        lines = ["# Title", "para", "more", "", "```", "code", "```", "## Sub"]
+        # Each start is known by the time its block is yielded.
+        seen = [(block[0], starts[-1]) for block in iter_blocks(lines, starts)]
+        self.assertEqual(seen, [("# Title", 1), ("para", 2), ("```", 5), ("## Sub", 8)])
+
+    def test_error_names_the_block_line(self):
+        with self.assertRaises(MarkdownError) as context:
+            parse_markdown("# Title\n\nfine\n\n- item\n- `open\n")
+        self.assertEqual(context.exception.line, 5)
+        self.assertEqual(str(context.exception), "line 5: Invalid markdown: unclosed '`'")
+
+
+class TestBlockType(unittest.TestCase):
+    def test_block_types(self):
+        self.assertEqual(block_to_block_type(["### heading"]), BlockType.HEADING)
+        self.assertEqual(block_to_block_type(["####### too deep"]), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type(["```", "code", "```"]), BlockType.CODE)
+        self.assertEqual(block_to_block_type(["> a", "> b"]), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type(["- a", "* b"]), BlockType.UNORDERED_LIST)
+        self.assertEqual(block_to_block_type(["1. a", "2. b"]), BlockType.ORDERED_LIST)
+        self.assertEqual(block_to_block_type(["1. a", "b"]), BlockType.PARAGRAPH)
+
+
+class TestMarkdownToHTML(unittest.TestCase):
+    def test_paragraphs(self):
+        md = """
+This is **bolded** paragraph
+text in a p
+tag here
+
+This is another paragraph with _italic_ text and `code` here
+
+"""
+        self.assertEqual(
+            markdown_to_html(md),
+            "<div><p>This is <b>bolded</b> paragraph text in a p tag here</p>"
+            "<p>This is another paragraph with <i>italic</i> text and <code>code</code> here</p></div>",
+        )
+
+    def test_codeblock(self):
+        md = """
+```
+This is text that _should_ remain
+the **same** even with inline stuff
+if a < b
+```
+"""
+        self.assertEqual(
+            markdown_to_html(md),
+            "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n"
+            "if a &lt; b\n</code></pre></div>",
+        )
+
+    def test_headings_quotes_lists(self):
+        md = """# Title
+
+## Sub with [link](/x)
+
+> quoted
+> text
+
+- one
+- **two**
+
+1. first
+2. second
+"""
+        self.assertEqual(
+            markdown_to_html(md),
+            '<div><h1 id="title">Title</h1><h2 id="sub-with-link">Sub with <a href="/x">link</a></h2>'
+            "<blockquote>quoted text</blockquote>"
+            "<ul><li>one</li><li><b>two</b></li></ul>"
+            "<ol><li>first</li><li>second</li></ol></div>",
+        )
+
+    def test_empty_document(self):
+        self.assertEqual(markdown_to_html(""), "<div></div>")
+
+    def test_streaming_writer_matches(self):
+        md = "# T\n\npara **b**\n\n- a\n- b\n\n```\ncode\n```\n" * 50
+        out = io.StringIO()
+        write_markdown_html(io.StringIO(md), out)
+        self.assertEqual(out.getvalue(), markdown_to_html(md))
+
+    def test_escaping(self):
+        md = (
+            "# Title with `code`\n\n"
+            "A [link](/a?x=1&y=\"2\") and ![img](/i.png) with **b** and _i_\n"
+            "continued\n\n"
+            "> quoted *text*\n> more\n\n"
+            "1. one\n2. **two**\n\n"
+            "```\n<tag> & stuff\n\n```\n"
+        )
+        self.assertEqual(
+            markdown_to_html(md),
+            '<div><h1 id="title-with-code">Title with <code>code</code></h1>'
+            '<p>A <a href="/a?x=1&amp;y=&quot;2&quot;">link</a> and <img src="/i.png" alt="img"> with <b>b</b> and '
+            "<i>i</i> continued</p><blockquote>quoted <i>text</i> more</blockquote>"
+            "<ol><li>one</li><li><b>two</b></li></ol><pre><code>&lt;tag&gt; &amp; stuff\n\n</code></pre></div>",
+        )
+        self.assertEqual(markdown_to_html("plain"), "<div><p>plain</p></div>")
+
+    def test_string_path_matches_tree(self):
+        md = (
+            "# Title with `code`\n\n"
+            "A [link](/a?x=1&y=\"2\") and ![img](/i.png) with **b** and _i_\ncontinued\n\n"
+            "> quoted _text_\n> more\n\n"
+            "- one\n- **two**\n\n1. one\n2. **two**\n\n"
+            "```\n<tag> & stuff\n\n```\n\n## Title with `code`\n"
+        )
+        for document in (md, "", "plain", "#\n"):
+            self.assertEqual(markdown_to_html(document), markdown_to_html_node(document).to_html())
+
+    def test_duplicate_heading_ids(self):
+        md = "# Usage\n\n## Usage\n\n## Usage 1\n\n### usage\n\n## !!\n"
+        expected = (
+            '<div><h1 id="usage">Usage</h1><h2 id="usage-1">Usage</h2><h2 id="usage-1-1">Usage 1</h2>'
+            '<h3 id="usage-2">usage</h3><h2>!!</h2></div>'
+        )
+        self.assertEqual(markdown_to_html(md), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        out = io.StringIO()
+        write_markdown_html(io.StringIO(md), out)
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_code_block_language(self):
+        parsed = parse_markdown("```python extra words\nx = 1\n```")
+        self.assertEqual(parsed, [("pre", ("python", "x = 1\n"))])
+        self.assertEqual(render_markdown(parsed), "<div><pre><code>x = 1\n</code></pre></div>")
+
+        def highlighter(language, code):
+            return None if language == "cobol" else f"<i>{language}</i>"
+
+        self.assertEqual(
+            render_markdown(parsed, highlighter),
+            '<div><pre><code class="language-python"><i>python</i></code></pre></div>',
+        )
+        unknown = parse_markdown("```cobol\n<x>\n```")
+        self.assertEqual(render_markdown(unknown, highlighter), "<div><pre><code>&lt;x&gt;\n</code></pre></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
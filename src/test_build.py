@@ -0,0 +1,225 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+
+import main
+from build import BuildConfig, PageError, _batches, build_site, extract_title, page_pipeline
+from template import Template
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class BuildTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post.md", "# Post\n\nA **post**")
+        self.write("static/styles.css", "body {}")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, text):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        # Make sure mtime-based change detection notices quick rewrites.
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def read(self, rel_path):
+        with open(self.path(rel_path)) as f:
+            return f.read()
+
+    def config(self, **kwargs):
+        options = {
+            "content_dir": self.path("content"),
+            "template_path": self.path("template.html"),
+            "static_dir": self.path("static"),
+            "public_dir": self.path("public"),
+            "cache_dir": self.path(".cache"),
+        }
+        options.update(kwargs)
+        return BuildConfig(**options)
+
+
+class TestBuildSite(BuildTestCase):
+    def test_full_build(self):
+        report = build_site(self.config())
+        self.assertEqual(report.rendered, ["index.md", "blog/post.md"])
+        self.assertEqual(report.assets_copied, ["styles.css"])
+        self.assertEqual(
+            self.read("public/blog/post.html"),
+            '<html><title>Post</title><body><div><h1 id="post">Post</h1><p>A <b>post</b></p></div></body></html>',
+        )
+        self.assertEqual(self.read("public/styles.css"), "body {}")
+
+    def test_noop_build(self):
+        build_site(self.config())
+        report = build_site(self.config())
+        self.assertEqual(report.rendered, [])
+        self.assertEqual(report.skipped, 2)
+        self.assertEqual(report.assets_copied, [])
+        self.assertEqual(report.assets_skipped, 1)
+
+    def test_one_file_change(self):
+        build_site(self.config())
+        self.write("content/blog/post.md", "# Post\n\nEdited")
+        report = build_site(self.config())
+        self.assertEqual(report.rendered, ["blog/post.md"])
+        self.assertIn("Edited", self.read("public/blog/post.html"))
+
+    def test_touch_without_change_skips(self):
+        build_site(self.config())
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.assertEqual(build_site(self.config()).rendered, [])
+
+    def test_template_change_rerenders_all(self):
+        build_site(self.config())
+        self.write("template.html", "<main>{{ Content }}</main>")
+        report = build_site(self.config())
+        self.assertEqual(sorted(report.rendered), ["blog/post.md", "index.md"])
+
+    def test_deleted_sources_remove_outputs(self):
+        build_site(self.config())
+        os.remove(self.path("content/blog/post.md"))
+        os.remove(self.path("static/styles.css"))
+        report = build_site(self.config())
+        self.assertEqual(report.deleted, ["blog/post.md"])
+        self.assertEqual(report.assets_deleted, ["styles.css"])
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+        self.assertFalse(os.path.exists(self.path("public/styles.css")))
+
+    def test_missing_output_rerenders(self):
+        build_site(self.config())
+        os.remove(self.path("public/index.html"))
+        self.assertEqual(build_site(self.config()).rendered, ["index.md"])
+
+    def test_targeted_build(self):
+        build_site(self.config())
+        self.write("content/index.md", "# Home\n\nChanged")
+        self.write("content/blog/post.md", "# Post\n\nAlso changed")
+        os.remove(self.path("static/styles.css"))
+        report = build_site(self.config(), pages=[self.path("content/index.md")])
+        self.assertEqual(report.rendered, ["index.md"])
+        self.assertEqual(report.assets_deleted, [])
+        self.assertNotIn("Also changed", self.read("public/blog/post.html"))
+
+        os.remove(self.path("content/index.md"))
+        report = build_site(self.config(), pages=[self.path("content/index.md"), self.path("static/x.css")])
+        self.assertEqual(report.deleted, ["index.md"])
+        self.assertTrue(os.path.exists(self.path("public/blog/post.html")))
+
+    def test_force(self):
+        build_site(self.config())
+        report = build_site(self.config(force=True))
+        self.assertEqual(len(report.rendered), 2)
+        self.assertEqual(report.assets_copied, ["styles.css"])
+
+    def test_force_removes_deleted_outputs(self):
+        self.write("static/x.css", "x {}")
+        build_site(self.config())
+        os.remove(self.path("content/blog/post.md"))
+        os.remove(self.path("static/x.css"))
+        report = build_site(self.config(force=True))
+        self.assertEqual((report.rendered, report.deleted, report.assets_deleted), (["index.md"], ["blog/post.md"], ["x.css"]))
+        build_site(self.config())
+        self.assertFalse(os.path.exists(self.path("public/blog/post.html")))
+        self.assertFalse(os.path.exists(self.path("public/x.css")))
+
+    def test_page_errors_name_the_source(self):
+        self.write("content/bad.md", "# Bad\n\nfine\n\nrun `make\n")
+        for jobs in (1, 2):
+            with self.assertRaises(PageError) as context:
+                build_site(self.config(jobs=jobs))
+            self.assertEqual(str(context.exception), f"{self.path('content/bad.md')}:5: Invalid markdown: unclosed '`'")
+        self.write("content/bad.md", "no title")
+        with self.assertRaises(PageError) as context:
+            build_site(self.config())
+        self.assertEqual(str(context.exception), f"{self.path('content/bad.md')}: Markdown page must have an h1 heading")
+
+    def test_main_reports_page_errors(self):
+        self.write("content/bad.md", "# Bad\n\nrun `make\n")
+        args = [
+            "build",
+            "--content", self.path("content"),
+            "--template", self.path("template.html"),
+            "--public", self.path("public"),
+            "--cache-dir", self.path(".cache"),
+        ]
+        with redirect_stderr(StringIO()) as err, self.assertRaises(SystemExit) as raised:
+            main.main(args)
+        self.assertEqual(raised.exception.code, 1)
+        self.assertEqual(err.getvalue(), f"build failed: {self.path('content/bad.md')}:3: Invalid markdown: unclosed '`'\n")
+
+
+class TestParallelBuild(BuildTestCase):
+    def test_jobs_output_is_identical(self):
+        for i in range(20):
+            self.write(f"content/posts/{i}.md", f"# Post {i}\n\nSome _text_ for post {i}")
+        sequential = build_site(self.config(jobs=1))
+        expected = {rel: self.read(f"public/{rel}") for rel in ("index.html", "posts/7.html", "posts/19.html")}
+        with open(self.path(".cache/manifest.json")) as f:
+            expected_manifest = f.read()
+
+        report = build_site(self.config(force=True, jobs=3))
+        self.assertEqual(report.rendered, sequential.rendered)
+        self.assertEqual(sum(pages for pages, _ in report.workers.values()), 22)
+        for rel, html in expected.items():
+            self.assertEqual(self.read(f"public/{rel}"), html)
+        with open(self.path(".cache/manifest.json")) as f:
+            self.assertEqual(f.read(), expected_manifest)
+        self.assertTrue(any(line.startswith("worker 1") for line in report.summary()))
+
+
+class TestPipeline(BuildTestCase):
+    def tasks(self, count):
+        tasks = []
+        for i in range(count):
+            self.write(f"content/p{i}.md", f"# P{i}\n\nText {i}")
+            tasks.append((f"p{i}.md", self.path(f"content/p{i}.md"), self.path(f"public/p{i}.html")))
+        return tasks
+
+    def test_pages_stream_one_at_a_time(self):
+        pages = page_pipeline(self.tasks(3), Template.compile(TEMPLATE))
+        rel_path, _, deps, terms, entry = next(pages)
+        self.assertEqual((rel_path, deps, terms, entry), ("p0.md", [], None, None))
+        # Nothing past the first page has been read or written yet.
+        self.assertTrue(os.path.exists(self.path("public/p0.html")))
+        self.assertFalse(os.path.exists(self.path("public/p1.html")))
+        self.assertEqual([page[0] for page in pages], ["p1.md", "p2.md"])
+
+    def test_batches_fit_in_flight_limit(self):
+        tasks = list(range(1024))
+        self.assertEqual({len(batch) for batch in _batches(tasks, 4)}, {32})
+        self.assertEqual({len(batch) for batch in _batches(tasks, 4, max_in_flight=16)}, {2})
+        self.assertEqual({len(batch) for batch in _batches(tasks, 4, max_in_flight=1)}, {1})
+
+    def test_small_in_flight_limit(self):
+        self.tasks(10)
+        expected = build_site(self.config()).rendered
+        for jobs in (1, 2):
+            report = build_site(self.config(force=True, jobs=jobs, max_in_flight=1))
+            self.assertEqual(report.rendered, expected)
+            self.assertEqual(self.read("public/p9.html"), '<html><title>P9</title><body><div><h1 id="p9">P9</h1><p>Text 9</p></div></body></html>')
+
+
+class TestExtractTitle(unittest.TestCase):
+    def test_extract_title(self):
+        self.assertEqual(extract_title("intro\n# Hello  \n## Sub"), "Hello")
+
+    def test_missing_title(self):
+        with self.assertRaises(ValueError):
+            extract_title("## Only a subheading")
+
+
+if __name__ == "__main__":
+    unittest.main()
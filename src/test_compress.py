@@ -0,0 +1,98 @@
+import gzip
+import os
+import tempfile
+import unittest
+import zlib
+
+from build import build_site
+from compress import compress_file, compress_outputs
+from test_build import BuildTestCase
+
+BIG_HTML = "<p>" + "compressible text " * 200 + "</p>"
+
+
+class TestCompressFile(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel_path, data):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_gzip_and_deflate(self):
+        path = self.write("page.html", BIG_HTML.encode())
+        size, variants = compress_file(path, deflate=True)
+        self.assertEqual(size, len(BIG_HTML))
+        with open(path + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), BIG_HTML.encode())
+        with open(path + ".zz", "rb") as f:
+            self.assertEqual(zlib.decompress(f.read()), BIG_HTML.encode())
+        self.assertEqual(set(variants), {".gz", ".zz"})
+        # Deterministic output: compressing again gives the same bytes.
+        with open(path + ".gz", "rb") as f:
+            first = f.read()
+        compress_file(path)
+        with open(path + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+        self.assertFalse(os.path.exists(path + ".zz"))
+
+    def test_min_size_and_ratio_cutoff(self):
+        small = self.write("small.css", b"body {}")
+        self.assertEqual(compress_file(small), (7, {}))
+        noisy = self.write("noise.js", os.urandom(4096))
+        self.assertEqual(compress_file(noisy)[1], {})
+        self.assertFalse(os.path.exists(noisy + ".gz"))
+
+    def test_only_changed_files(self):
+        self.write("a.html", BIG_HTML.encode())
+        self.write("b.css", BIG_HTML.encode())
+        self.write("c.png", BIG_HTML.encode())
+        first = compress_outputs(self.root, ["a.html", "b.css", "c.png"], {})
+        self.assertEqual(first.compressed, ["a.html", "b.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "c.png.gz")))
+        self.write("b.css", (BIG_HTML + "changed").encode())
+        second = compress_outputs(self.root, ["a.html", "b.css", "c.png"], first.entries)
+        self.assertEqual((second.compressed, second.unchanged), (["b.css"], 1))
+        third = compress_outputs(self.root, ["a.html", "b.css"], second.entries, deflate=True)
+        self.assertEqual(third.compressed, ["a.html", "b.css"])
+
+    def test_process_pool(self):
+        names = [f"p{i}.html" for i in range(6)]
+        for name in names:
+            self.write(name, BIG_HTML.encode())
+        result = compress_outputs(self.root, names, {}, jobs=2)
+        self.assertEqual(result.compressed, names)
+        self.assertLess(result.bytes_out, result.bytes_in)
+
+
+class TestBuildCompression(BuildTestCase):
+    def test_build_writes_and_removes_variants(self):
+        self.write("content/long.md", "# Long\n\n" + "words and more words " * 200)
+        report = build_site(self.config(compress=True))
+        self.assertEqual(report.compressed, ["long.html"])
+        self.assertEqual(report.compress_skipped, 3)
+        self.assertTrue(os.path.exists(self.path("public/long.html.gz")))
+        self.assertTrue(any(line.startswith("compression: 1 compressed") for line in report.summary()))
+
+        self.assertEqual(build_site(self.config(compress=True)).compress_unchanged, 4)
+
+        os.remove(self.path("content/long.md"))
+        build_site(self.config(compress=True))
+        self.assertFalse(os.path.exists(self.path("public/long.html.gz")))
+
+    def test_disabling_removes_variants(self):
+        self.write("content/long.md", "# Long\n\n" + "words and more words " * 200)
+        build_site(self.config(compress=True))
+        build_site(self.config())
+        self.assertFalse(os.path.exists(self.path("public/long.html.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest import mock
+
+import client
+from build import WarmState, build_site
+from depgraph import DepGraph
+from manifest import Manifest
+from test_build import BuildTestCase
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestWarmState(BuildTestCase):
+    def test_reuses_saved_state_until_another_build_saves(self):
+        state = WarmState()
+        build_site(self.config(), state=state)
+        self.write("content/blog/post.md", "# Post\n\nEdited")
+        refuse = mock.patch.object(Manifest, "load", side_effect=AssertionError("loaded"))
+        with refuse, mock.patch.object(DepGraph, "load", side_effect=AssertionError("loaded")):
+            report = build_site(self.config(), state=state)
+        self.assertEqual(report.rendered, ["blog/post.md"])
+
+        # A build from another process rewrites the manifest.
+        build_site(self.config(force=True))
+        with mock.patch.object(Manifest, "load", wraps=Manifest.load) as load:
+            report = build_site(self.config(), state=state)
+        load.assert_called_once()
+        self.assertEqual((report.rendered, report.skipped), ([], 2))
+
+    def test_parse_hits_are_counted_per_build(self):
+        state = WarmState()
+        build_site(self.config(), state=state)
+        self.write("template.html", self.read("template.html") + "\n")
+        report = build_site(self.config(), state=state)
+        self.assertEqual((report.parse_hits, report.parse_misses), (2, 0))
+        self.assertIs(state.parse_cache, state.get_parse_cache(self.config()))
+
+
+class TestDaemon(BuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.socket = self.path("daemon.sock")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, os.path.join(SRC_DIR, "main.py"), "daemon",
+                "--content", self.path("content"),
+                "--template", self.path("template.html"),
+                "--static", self.path("static"),
+                "--public", self.path("public"),
+                "--cache-dir", self.path(".cache"),
+                "--socket", self.socket,
+                "--interval", "0.05",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 10
+        while not os.path.exists(self.socket):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.fail("daemon didn't start")
+            time.sleep(0.02)
+
+    def tearDown(self):
+        if self.process.poll() is None:
+            try:
+                self.request({"command": "stop"})
+                self.process.wait(5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        super().tearDown()
+
+    def request(self, message):
+        return client.request(self.socket, message, timeout=10)
+
+    def test_build_request(self):
+        self.write("content/blog/post.md", "# Post\n\nFrom the daemon")
+        response = self.request({"command": "build", "pages": [self.path("content/blog/post.md")]})
+        self.assertTrue(response["ok"], response)
+        self.assertIn("pages: 1 rendered (0 via dependencies), 0 unchanged, 0 deleted", response["summary"])
+        self.assertIn("From the daemon", self.read("public/blog/post.html"))
+        self.assertEqual(self.request({"command": "status"})["builds"], 2)
+
+    def test_errors_are_returned(self):
+        response = self.request({"command": "explode"})
+        self.assertEqual(response, {"ok": False, "error": "ValueError: Unknown daemon command: 'explode'"})
+        self.assertTrue(self.request({"command": "status"})["ok"])
+
+    def test_reload_keeps_socket(self):
+        self.request({"command": "build"})
+        before = self.request({"command": "status"})
+        self.assertEqual(before["builds"], 2)
+        self.request({"command": "reload"})
+        # Same process (re-exec'd) on the same socket, fresh state.
+        after = self.request({"command": "status"})
+        self.assertEqual((after["pid"], after["builds"]), (before["pid"], 1))
+
+    def test_stop(self):
+        self.assertEqual(self.request({"command": "stop"}), {"ok": True})
+        self.assertEqual(self.process.wait(5), 0)
+        self.assertFalse(os.path.exists(self.socket))
+        with redirect_stderr(StringIO()) as err, self.assertRaises(SystemExit) as raised:
+            client.main(["status", "--socket", self.socket])
+        self.assertEqual(raised.exception.code, 1)
+        self.assertIn("no daemon listening", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
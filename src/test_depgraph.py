@@ -0,0 +1,168 @@
+import os
+import tempfile
+import unittest
+
+from build import build_site, dependent_outputs, explain_output
+from depgraph import DepGraph
+from test_build import BuildTestCase
+
+
+class TestDepGraph(unittest.TestCase):
+    def graph(self):
+        return DepGraph(
+            "deps.json",
+            {
+                "page:a.md": ["template:t.html", "title:b.md"],
+                "page:b.md": ["template:t.html", "link:a.md"],
+                "page:c.md": ["template:u.html"],
+                "template:t.html": ["fragment:nav.html"],
+                "fragment:nav.html": ["fragment:links.html"],
+            },
+            {"template:t.html": "1", "fragment:nav.html": "2", "fragment:links.html": "3", "title:b.md": "B"},
+        )
+
+    def test_dependents_are_transitive(self):
+        graph = self.graph()
+        self.assertEqual(
+            graph.dependents(["fragment:links.html"]),
+            {"fragment:nav.html", "template:t.html", "page:a.md", "page:b.md"},
+        )
+        self.assertEqual(graph.dependents(["title:b.md"]), {"page:a.md"})
+        self.assertEqual(graph.dependents(["template:u.html"]), {"page:c.md"})
+
+    def test_changed_inputs(self):
+        graph = self.graph()
+        current = {"template:t.html": "1", "fragment:nav.html": "2", "fragment:links.html": "4", "title:b.md": "B"}
+        self.assertEqual(graph.changed_inputs(current), {"fragment:links.html"})
+        self.assertEqual(graph.changed_inputs({"title:new.md": "N"}), {"title:new.md"})
+
+    def test_dependency_tree(self):
+        self.assertEqual(
+            list(self.graph().dependency_tree("page:b.md")),
+            [(1, "template:t.html"), (2, "fragment:nav.html"), (3, "fragment:links.html"), (1, "link:a.md")],
+        )
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = self.graph()
+            graph.path = os.path.join(tmp, "deps.json")
+            graph.save()
+            loaded = DepGraph.load(graph.path)
+            self.assertEqual(loaded.edges, graph.edges)
+            self.assertEqual(loaded.inputs, graph.inputs)
+        self.assertEqual(DepGraph.load("/nonexistent/deps.json").edges, {})
+
+
+class TestBuildDependencies(BuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<html>{{ include partials/nav.html }}<title>{{ Title }}</title>{{ Content }}</html>")
+        self.write("partials/nav.html", "<nav>site</nav>")
+        self.write("partials/unused.html", "<footer></footer>")
+        self.write("content/index.md", "# Home\n\nRead [](/blog/post.html) or [the post](/blog/post.html)")
+        self.write("content/about.md", "# About\n\nSee [home](/)")
+
+    def test_title_link_rendered(self):
+        build_site(self.config())
+        self.assertIn('<a href="/blog/post.html">Post</a>', self.read("public/index.html"))
+
+    def test_fragment_change_rebuilds_template_users(self):
+        build_site(self.config())
+        self.write("partials/unused.html", "<footer>changed</footer>")
+        self.assertEqual(build_site(self.config()).rendered, [])
+        self.write("partials/nav.html", "<nav>new</nav>")
+        report = build_site(self.config())
+        self.assertEqual(sorted(report.rendered), ["about.md", "blog/post.md", "index.md"])
+        self.assertEqual(sorted(report.invalidated), ["about.md", "blog/post.md", "index.md"])
+        self.assertIn("<nav>new</nav>", self.read("public/about.html"))
+
+    def test_switching_template_rebuilds_pages(self):
+        self.write("other.html", "<main>{{ Content }}</main>")
+        build_site(self.config())
+        other = self.config(template_path=self.path("other.html"))
+        report = build_site(other)
+        self.assertEqual(sorted(report.rendered), ["about.md", "blog/post.md", "index.md"])
+        self.assertTrue(self.read("public/about.html").startswith("<main>"))
+        # Edits to the new template are picked up too.
+        self.write("other.html", "<article>{{ Content }}</article>")
+        self.assertEqual(len(build_site(other).rendered), 3)
+        self.assertTrue(self.read("public/about.html").startswith("<article>"))
+
+    def test_template_path_spelling_is_normalized(self):
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            build_site(self.config(template_path="template.html"))
+            self.assertEqual(build_site(self.config(template_path="./template.html")).rendered, [])
+            self.write("template.html", "<html>{{ Content }}</html>")
+            self.assertEqual(len(build_site(self.config(template_path="./template.html")).rendered), 3)
+        finally:
+            os.chdir(cwd)
+
+    def test_title_change_rebuilds_linking_pages(self):
+        build_site(self.config())
+        self.write("content/blog/post.md", "# Post\n\nNew body, same title")
+        self.assertEqual(build_site(self.config()).rendered, ["blog/post.md"])
+        self.write("content/blog/post.md", "# Renamed\n\nBody")
+        report = build_site(self.config())
+        self.assertEqual(report.rendered, ["blog/post.md", "index.md"])
+        self.assertEqual(report.invalidated, ["index.md"])
+        self.assertIn('<a href="/blog/post.html">Renamed</a>', self.read("public/index.html"))
+
+    def test_targeted_build_follows_title_dependents(self):
+        build_site(self.config())
+        self.write("content/blog/post.md", "# Renamed\n\nBody")
+        report = build_site(self.config(), pages=[self.path("content/blog/post.md")])
+        self.assertEqual(report.rendered, ["blog/post.md", "index.md"])
+        self.assertIn(">Renamed</a>", self.read("public/index.html"))
+
+    def test_deleted_target_rebuilds_linking_pages(self):
+        build_site(self.config())
+        os.remove(self.path("content/blog/post.md"))
+        report = build_site(self.config())
+        self.assertEqual(report.deleted, ["blog/post.md"])
+        self.assertEqual(report.rendered, ["index.md"])
+        self.assertIn('<a href="/blog/post.html"></a>', self.read("public/index.html"))
+
+    def test_created_target_rebuilds_linking_pages(self):
+        self.write("content/about.md", "# About\n\nSee [](/new.html)")
+        build_site(self.config())
+        self.assertIn('<a href="/new.html"></a>', self.read("public/about.html"))
+        self.write("content/new.md", "# Bee Page\n\nHi")
+        report = build_site(self.config())
+        self.assertEqual(report.rendered, ["new.md", "about.md"])
+        self.assertIn('<a href="/new.html">Bee Page</a>', self.read("public/about.html"))
+        # Deleted and created again.
+        os.remove(self.path("content/new.md"))
+        build_site(self.config())
+        self.write("content/new.md", "# Bee Again\n\nHi")
+        build_site(self.config())
+        self.assertIn('<a href="/new.html">Bee Again</a>', self.read("public/about.html"))
+
+    def test_graph_persists(self):
+        build_site(self.config())
+        graph = DepGraph.load(self.path(".cache/deps.json"))
+        template = "template:" + self.path("template.html")
+        self.assertEqual(graph.edges["page:index.md"], [template, "link:blog/post.md", "title:blog/post.md"])
+        self.assertEqual(graph.edges[template], ["fragment:" + self.path("partials/nav.html")])
+        self.assertEqual(graph.inputs["title:blog/post.md"], "Post")
+
+    def test_why_and_users(self):
+        build_site(self.config())
+        config = self.config()
+        lines = explain_output(config, self.path("public/index.html"))
+        self.assertEqual(lines[0], f"{self.path('public/index.html')} is built from {self.path('content/index.md')}")
+        self.assertEqual(lines[1:3], [f"  template {self.path('template.html')}", f"    includes {self.path('partials/nav.html')}"])
+        self.assertEqual(lines[3:], ["  links to blog/post.md", "  shows the title of blog/post.md", "linked from: about.md"])
+        with self.assertRaises(ValueError):
+            explain_output(config, self.path("public/missing.html"))
+
+        self.assertEqual(dependent_outputs(config, self.path("content/blog/post.md")), ["index.html"])
+        self.assertEqual(
+            dependent_outputs(config, self.path("partials/nav.html")),
+            ["about.html", "blog/post.html", "index.html"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import highlight
+import main
+from build import build_site
+from highlight import HighlightCache, highlight_html, language_name
+from htmlnode import LeafNode
+from test_build import BuildTestCase
+
+PYTHON = 'def f(x):\n    # <note>\n    return "a\\"b" + str(x) if x else None\n'
+PAGE = "# {title}\n\nSome code:\n\n```python\n" + PYTHON + "```\n"
+
+
+class TestHighlight(unittest.TestCase):
+    def test_python_tokens(self):
+        self.assertEqual(
+            highlight_html("python", PYTHON),
+            '<span class="kw">def</span> f(x):\n'
+            '    <span class="com"># &lt;note&gt;</span>\n'
+            '    <span class="kw">return</span> <span class="str">"a\\"b"</span> + <span class="bi">str</span>(x) '
+            '<span class="kw">if</span> x <span class="kw">else</span> <span class="kw">None</span>\n',
+        )
+
+    def test_emits_leaf_nodes(self):
+        nodes = highlight.highlight("json", '{"a": 1}')
+        self.assertTrue(all(isinstance(node, LeafNode) for node in nodes))
+        self.assertEqual(
+            "".join(node.to_html() for node in nodes),
+            '{<span class="attr">"a"</span>: <span class="num">1</span>}',
+        )
+
+    def test_other_languages(self):
+        self.assertEqual(
+            highlight_html("sh", 'echo "$HOME" $USER # hi'),
+            '<span class="bi">echo</span> <span class="str">"$HOME"</span> <span class="var">$USER</span> '
+            '<span class="com"># hi</span>',
+        )
+        self.assertEqual(
+            highlight_html("html", '<a href="x">&</a>'),
+            '<span class="tag">&lt;a</span> <span class="attr">href</span>=<span class="str">"x"</span>'
+            '<span class="tag">&gt;</span>&amp;<span class="tag">&lt;/a</span><span class="tag">&gt;</span>',
+        )
+        self.assertIn('<span class="com">/* c */</span>', highlight_html("css", "a { color: red; } /* c */"))
+        self.assertIn('<span class="kw">const</span>', highlight_html("js", "const a = 1"))
+
+    def test_unknown_language(self):
+        self.assertIsNone(language_name("cobol"))
+        self.assertIsNone(highlight_html("cobol", "MOVE A TO B"))
+        self.assertEqual(language_name("Py"), "python")
+
+
+class TestHighlightCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_highlights_each_snippet_once(self):
+        cache = HighlightCache(self.cache_dir)
+        with mock.patch.object(highlight, "highlight_html", wraps=highlight_html) as tokenize:
+            first = cache.get("python", PYTHON)
+            self.assertEqual(cache.get("py", PYTHON), first)
+            cache.get("python", "pass\n")
+        self.assertEqual(tokenize.call_count, 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertIsNone(cache.get("cobol", PYTHON))
+
+    def test_disk_cache_is_shared(self):
+        HighlightCache(self.cache_dir).get("python", PYTHON)
+        cache = HighlightCache(self.cache_dir)
+        with mock.patch.object(highlight, "highlight_html", side_effect=AssertionError("tokenized")):
+            self.assertEqual(cache.get("python", PYTHON), highlight_html("python", PYTHON))
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_prune(self):
+        cache = HighlightCache(self.cache_dir)
+        for n in range(4):
+            cache.get("python", f"x = {n}\n")
+        stale = os.path.join(self.cache_dir, "highlight", "v0", "ab")
+        os.makedirs(stale)
+        with open(os.path.join(stale, "ab.html"), "w") as f:
+            f.write("old")
+        stats = cache.stats()
+        self.assertEqual((stats.entries, stats.stale_entries), (4, 1))
+        size = stats.bytes // 4
+        self.assertEqual(cache.prune(size * 2), (3, size * 2 + 3))
+        self.assertFalse(os.path.exists(os.path.dirname(stale)))
+        self.assertEqual(cache.stats().entries, 2)
+
+    def test_memory_layer_is_bounded(self):
+        cache = HighlightCache(memory_entries=2)
+        for code in ("a\n", "b\n", "c\n", "a\n"):
+            cache.get("python", code)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+
+
+class TestHighlightBuild(BuildTestCase):
+    def test_repeated_snippets_are_highlighted_once(self):
+        for n in range(3):
+            self.write(f"content/code{n}.md", PAGE.format(title=f"Code {n}"))
+        report = build_site(self.config())
+        self.assertEqual((report.highlight_hits, report.highlight_misses), (2, 1))
+        self.assertIn("highlight cache: 2 hits, 1 misses", report.summary())
+        output = self.read("public/code1.html")
+        self.assertIn('<pre><code class="language-python"><span class="kw">def</span> f(x):', output)
+
+    def test_highlighting_can_be_turned_off(self):
+        self.write("content/code.md", PAGE.format(title="Code"))
+        build_site(self.config())
+        report = build_site(self.config(highlight=False))
+        # Only the page with a highlighted code block depends on it.
+        self.assertEqual(report.rendered, ["code.md"])
+        self.assertIn("<pre><code>def f(x):", self.read("public/code.html"))
+        self.assertEqual(build_site(self.config()).rendered, ["code.md"])
+
+    def test_parallel_build_matches(self):
+        for n in range(4):
+            self.write(f"content/code{n}.md", PAGE.format(title=f"Code {n}"))
+        build_site(self.config())
+        expected = self.read("public/code2.html")
+        report = build_site(self.config(force=True, jobs=2))
+        self.assertEqual(report.highlight_misses, 0)
+        self.assertEqual(self.read("public/code2.html"), expected)
+        self.assertTrue(os.path.isdir(self.path(".cache/highlight")))
+
+    def test_size_bound_enforced_after_build(self):
+        for n in range(10):
+            self.write(f"content/code{n}.md", f"# Code {n}\n\n```python\nx = {n}\n" + "print(x)\n" * 50 + "```\n")
+        build_site(self.config(highlight_cache_size=4096))
+        stats = HighlightCache(self.path(".cache")).stats()
+        self.assertLessEqual(stats.bytes, 4096)
+        self.assertGreater(stats.entries, 0)
+
+    def test_cache_command_covers_highlights(self):
+        self.write("content/code.md", PAGE.format(title="Code"))
+        build_site(self.config())
+        args = ["cache", "prune", "--cache-dir", self.path(".cache"), "--highlight-max-size", "0"]
+        with redirect_stdout(StringIO()) as out:
+            self.assertEqual(main.main(args), 0)
+        self.assertIn("highlight cache: removed 1 entries", out.getvalue())
+        self.assertIn("highlight cache: 0 entries", out.getvalue())
+        self.assertIn("parse cache: 3 entries", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -90,8 +90,9 @@ class TestLeafNode(unittest.TestCase):
     def test_leaf_children_none(self):
         node = LeafNode("p", "Text")
         self.assertIsNone(node.children)
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import FrozenProps, HTMLNode, LeafNode, ParentNode, intern_props
 
 class TestHTMLNode(unittest.TestCase):
     def test_props_to_html_empty(self):
@@ -299,5 +300,114 @@ class TestParentNode(unittest.TestCase):
         child = LeafNode("span", "child")
         parent = ParentNode("div", [child])
         self.assertIsNone(parent.value)
+
+class TestStreamingHTML(unittest.TestCase):
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("h1", "Title"),
+                ParentNode("p", [LeafNode(None, "Text "), LeafNode("a", "link", {"href": "/x"})]),
+                LeafNode("img", "", {"src": "a.png", "alt": "A"}),
+            ],
+            {"class": "page"},
+        )
+        expected = '<div class="page"><h1>Title</h1><p>Text <a href="/x">link</a></p><img src="a.png" alt="A"></div>'
+        self.assertEqual("".join(node.iter_html()), expected)
+        self.assertEqual(node.to_html(), expected)
+
+    def test_write_html(self):
+        node = ParentNode("ul", [LeafNode("li", str(i)) for i in range(100)])
+        buffer = io.StringIO()
+        node.write_html(buffer, chunk_size=16)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+
+    def test_leaf_write_html(self):
+        buffer = io.StringIO()
+        LeafNode("b", "bold").write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<b>bold</b>")
+
+    def test_deep_nesting(self):
+        depth = 10000
+        node = LeafNode("span", "deep")
+        for _ in range(depth):
+            node = ParentNode("div", [node])
+        html = node.to_html()
+        self.assertEqual(html, "<div>" * depth + "<span>deep</span>" + "</div>" * depth)
+
+    def test_nested_child_errors(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError) as context:
+            node.to_html()
+        self.assertEqual(str(context.exception), "ParentNode must have at least one child")
+        with self.assertRaises(ValueError):
+            ParentNode("div", [LeafNode("p", None)]).to_html()
+        with self.assertRaises(NotImplementedError):
+            ParentNode("div", [HTMLNode("p", "x")]).to_html()
+
+
+class TestPropsRendering(unittest.TestCase):
+    def test_escapes_attribute_values(self):
+        node = HTMLNode("a", "x", None, {"title": 'say "hi" & <wave>'})
+        self.assertEqual(node.props_to_html(), ' title="say &quot;hi&quot; &amp; &lt;wave&gt;"')
+
+    def test_non_string_values(self):
+        node = HTMLNode("td", "x", None, {"colspan": 2})
+        self.assertEqual(node.props_to_html(), ' colspan="2"')
+
+    def test_memoized_plain_props_follow_mutation(self):
+        props = {"class": "nav", "id": "a"}
+        node = HTMLNode("a", "x", None, props)
+        self.assertEqual(node.props_to_html(), ' class="nav" id="a"')
+        props["id"] = "b&c"
+        self.assertEqual(node.props_to_html(), ' class="nav" id="b&amp;c"')
+        # Equal keys, different strings.
+        self.assertEqual(HTMLNode("td", "x", None, {"x": 1}).props_to_html(), ' x="1"')
+        self.assertEqual(HTMLNode("td", "x", None, {"x": True}).props_to_html(), ' x="True"')
+        self.assertEqual(HTMLNode("td", "x", None, {"x": [1]}).props_to_html(), ' x="[1]"')
+        self.assertEqual(HTMLNode("td", "x", None, {"x": 1, "y": "2"}).props_to_html(), ' x="1" y="2"')
+        self.assertEqual(HTMLNode("td", "x", None, {"x": True, "y": "2"}).props_to_html(), ' x="True" y="2"')
+
+    def test_link_href_with_quote(self):
+        node = LeafNode("a", "x", {"href": '/a"b?x=1&y=2'})
+        self.assertEqual(node.to_html(), '<a href="/a&quot;b?x=1&amp;y=2">x</a>')
+
+    def test_intern_props_shares_mapping(self):
+        first = intern_props({"class": "kw"})
+        second = intern_props({"class": "kw"})
+        self.assertIs(first, second)
+        self.assertIsInstance(first, FrozenProps)
+        self.assertIsNone(intern_props(None))
+        self.assertIs(intern_props(first), first)
+
+    def test_intern_props_value_types(self):
+        # Equal mappings that render differently are never shared.
+        self.assertEqual(intern_props({"data-n": 1}).html, ' data-n="1"')
+        self.assertEqual(intern_props({"data-n": True}).html, ' data-n="True"')
+        self.assertIsNot(intern_props({"data-n": 1}), intern_props({"data-n": 1}))
+        self.assertEqual(intern_props({"data-n": [1]}).html, ' data-n="[1]"')
+
+    def test_interned_props_render_like_plain(self):
+        props = {"class": "a&b", "id": "x"}
+        plain = LeafNode("span", "v", props).to_html()
+        self.assertEqual(LeafNode("span", "v", intern_props(props)).to_html(), plain)
+
+    def test_frozen_props_read_only(self):
+        props = intern_props({"class": "kw"})
+        with self.assertRaises(TypeError):
+            props["class"] = "other"
+        with self.assertRaises(TypeError):
+            props.update({"id": "x"})
+        with self.assertRaises(TypeError):
+            del props["class"]
+        self.assertEqual(props, {"class": "kw"})
+
+    def test_frozen_props_pickle(self):
+        import pickle
+        props = pickle.loads(pickle.dumps(FrozenProps({"class": "kw"})))
+        self.assertIsInstance(props, FrozenProps)
+        self.assertEqual(props.html, ' class="kw"')
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
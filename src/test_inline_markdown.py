@@ -0,0 +1,116 @@
+import unittest
+from inline_markdown import iter_textnodes, text_to_textnodes
+from textnode import TextNode, TextType
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_types(self):
+        text = (
+            "This is **text** with an _italic_ word and a `code block` and an "
+            "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        )
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+        )
+
+    def test_plain_text(self):
+        self.assertEqual(text_to_textnodes("just text"), [TextNode("just text", TextType.TEXT)])
+
+    def test_empty(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_star_italic(self):
+        self.assertEqual(
+            text_to_textnodes("a *b* c"),
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("b", TextType.ITALIC),
+                TextNode(" c", TextType.TEXT),
+            ],
+        )
+
+    def test_adjacent_spans(self):
+        self.assertEqual(
+            text_to_textnodes("**a**`b`"),
+            [TextNode("a", TextType.BOLD), TextNode("b", TextType.CODE)],
+        )
+
+    def test_no_nesting(self):
+        self.assertEqual(
+            text_to_textnodes("**a _b_ `c`**"),
+            [TextNode("a _b_ `c`", TextType.BOLD)],
+        )
+        self.assertEqual(
+            text_to_textnodes("`**not bold**`"),
+            [TextNode("**not bold**", TextType.CODE)],
+        )
+
+    def test_intraword_underscore(self):
+        self.assertEqual(
+            text_to_textnodes("call snake_case_name now"),
+            [TextNode("call snake_case_name now", TextType.TEXT)],
+        )
+        self.assertEqual(
+            text_to_textnodes("_a_b_ c"),
+            [TextNode("a_b", TextType.ITALIC), TextNode(" c", TextType.TEXT)],
+        )
+
+    def test_unmatched_brackets_are_text(self):
+        self.assertEqual(
+            text_to_textnodes("a [b] c! d [e](f"),
+            [TextNode("a [b] c! d [e](f", TextType.TEXT)],
+        )
+
+    def test_unclosed_code(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("a `b")
+
+    def test_stray_underscores_are_text(self):
+        for text in ("a _b", "use the _id field", "see https://x.com/_next/ docs"):
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+        self.assertEqual(
+            text_to_textnodes("_a_ and _b"),
+            [TextNode("a", TextType.ITALIC), TextNode(" and _b", TextType.TEXT)],
+        )
+
+    def test_stray_asterisks_are_text(self):
+        for text in ("Price is 5 * 3", "a *b", "a **b", "a ** b **", "* not a list"):
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+        self.assertEqual(
+            text_to_textnodes("2 * 3 is *six* or **6 **"),
+            [TextNode("2 * 3 is ", TextType.TEXT), TextNode("six", TextType.ITALIC), TextNode(" or **6 **", TextType.TEXT)],
+        )
+
+    def test_generator(self):
+        nodes = iter_textnodes("a **b**")
+        self.assertEqual(next(nodes), TextNode("a ", TextType.TEXT))
+        self.assertEqual(next(nodes), TextNode("b", TextType.BOLD))
+        with self.assertRaises(StopIteration):
+            next(nodes)
+
+    def test_many_unclosed_delimiters(self):
+        # Each failed search for a closing delimiter is only done once.
+        for text in ("*a " * 50000, "**a " * 50000, "_a " * 50000):
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
+    def test_long_input(self):
+        text = "word **bold** [l](/u) " * 20000
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 80001)
+        self.assertEqual(nodes[-1], TextNode(" ", TextType.TEXT))
+
+
+if __name__ == "__main__":
+    unittest.main()
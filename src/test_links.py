@@ -0,0 +1,196 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import main
+from block_markdown import parse_markdown, render_markdown
+from build import WarmState, build_site
+from links import LinkIndex, page_for_url, page_links, page_url, resolve_url
+from test_build import BuildTestCase
+
+
+class TestResolveUrl(unittest.TestCase):
+    def test_internal_links(self):
+        self.assertEqual(resolve_url("/about.html", "blog/post.md"), ("about.html", ""))
+        self.assertEqual(resolve_url("other.html#top", "blog/post.md"), ("blog/other.html", "top"))
+        self.assertEqual(resolve_url("../", "blog/post.md"), ("index.html", ""))
+        self.assertEqual(resolve_url("/blog/?page=2", "index.md"), ("blog/index.html", ""))
+        self.assertEqual(resolve_url("#a%20b", "blog/post.md"), ("blog/post.html", "a b"))
+        self.assertEqual(resolve_url("../../x.png", "blog/post.md"), ("../x.png", ""))
+
+    def test_external_links(self):
+        for url in ("https://example.com/", "//cdn.example.com/x.js", "mailto:me@example.com", "tel:123"):
+            self.assertIsNone(resolve_url(url, "index.md"))
+
+    def test_page_for_url(self):
+        self.assertEqual(page_for_url("/blog/post.html", "index.md"), "blog/post.md")
+        self.assertEqual(page_for_url("/blog/", "index.md"), "blog/index.md")
+        self.assertEqual(page_for_url("/", "blog/post.md"), "index.md")
+        self.assertEqual(page_for_url("other.html#top", "blog/post.md"), "blog/other.md")
+        self.assertEqual(page_for_url("../index.html?x=1", "blog/post.md"), "index.md")
+        self.assertIsNone(page_for_url("https://example.com/a.html", "index.md"))
+        self.assertIsNone(page_for_url("/styles.css", "index.md"))
+        self.assertIsNone(page_for_url("../../up.html", "blog/post.md"))
+        # Resolved as the link checker resolves them.
+        self.assertEqual(page_for_url("#top", "blog/post.md"), "blog/post.md")
+        self.assertEqual(page_for_url("/a%20b.html", "index.md"), "a b.md")
+        self.assertIsNone(page_for_url("tel:123.html", "index.md"))
+
+    def test_page_url(self):
+        self.assertEqual(page_url("blog/post.md"), "/blog/post.html")
+        self.assertEqual(page_url("blog/index.md"), "/blog/")
+
+
+class TestPageLinks(unittest.TestCase):
+    def test_entry(self):
+        parsed = parse_markdown(
+            "# Title\n\nFirst [para](/a.html#x) with ![img](img.png).\n\n## Sub *part*\n\n"
+            "- [item](https://example.com)\n- [list](#title)\n\n```\n[not](/a link)\n```"
+        )
+        anchors, links, summary = page_links("blog/post.md", parsed)
+        self.assertEqual(anchors, ["sub-part", "title"])
+        self.assertEqual(
+            links,
+            [["/a.html#x", "a.html", "x"], ["img.png", "blog/img.png", ""], ["#title", "blog/post.html", "title"]],
+        )
+        self.assertEqual(summary, "First para with img.")
+
+    def test_duplicate_headings_match_rendered_ids(self):
+        parsed = parse_markdown("# Usage\n\n## Usage\n\n## Usage\n\n[third](#usage-2)")
+        anchors, links, _ = page_links("index.md", parsed)
+        self.assertEqual(anchors, ["usage", "usage-1", "usage-2"])
+        for anchor in anchors:
+            self.assertIn(f'id="{anchor}"', render_markdown(parsed))
+        index = LinkIndex("links.json")
+        index.add("index.md", anchors, links, "", 0)
+        self.assertEqual(index.check("/nonexistent"), [])
+
+
+class TestLinkIndex(unittest.TestCase):
+    def index(self):
+        index = LinkIndex("links.json")
+        index.add("index.md", ["intro"], [["/blog/post.html#setup", "blog/post.html", "setup"]], "Home", 0)
+        index.add(
+            "blog/post.md",
+            ["setup"],
+            [
+                ["../index.html#intro", "index.html", "intro"],
+                ["#gone", "blog/post.html", "gone"],
+                ["/missing.html", "missing.html", ""],
+                ["/static.html", "static.html", ""],
+                ["/logo.png", "logo.png", ""],
+                ["../../x.html", "../x.html", ""],
+            ],
+            "Post",
+            86400 * 10**9,
+        )
+        return index
+
+    def test_check(self):
+        self.assertEqual(
+            self.index().check("/nonexistent", {"static.html": {}}),
+            [
+                ("blog/post.md", "#gone", "no #gone anchor on /blog/post.html"),
+                ("blog/post.md", "/missing.html", "no such page"),
+                ("blog/post.md", "../../x.html", "points outside the site"),
+            ],
+        )
+        broken = self.index().check("/nonexistent", {"static.html": {}}, check_assets=True)
+        self.assertIn(("blog/post.md", "/logo.png", "no such file"), broken)
+
+    def test_changed_only_by_new_entries(self):
+        index = self.index()
+        index.changed = False
+        index.add("index.md", ["intro"], [["/blog/post.html#setup", "blog/post.html", "setup"]], "Home", 0)
+        self.assertFalse(index.changed)
+        index.remove("nothing.md")
+        self.assertFalse(index.changed)
+        index.remove("index.md")
+        self.assertTrue(index.changed)
+
+    def test_sitemap_and_feed(self):
+        index = self.index()
+        self.assertEqual(
+            index.sitemap("https://example.com/").decode(),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            "<url><loc>https://example.com/blog/post.html</loc><lastmod>1970-01-02</lastmod></url>\n"
+            "<url><loc>https://example.com/</loc><lastmod>1970-01-01</lastmod></url>\n"
+            "</urlset>\n",
+        )
+        feed = index.feed("https://example.com", {"index.md": "Home & Away", "blog/post.md": "Post"}).decode()
+        self.assertIn("<title>Home &amp; Away</title>", feed)
+        # Newest first.
+        self.assertLess(feed.index("<title>Post</title>"), feed.index("<link>https://example.com/</link><guid>"))
+        self.assertIn("<pubDate>Fri, 02 Jan 1970 00:00:00 GMT</pubDate>", feed)
+
+
+class TestLinkBuild(BuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\nRead [the post](/blog/post.html#more).\n\n## Intro\n")
+        self.write("content/blog/post.md", "# Post\n\nBack [home](../index.html#intro)\n\n## More\n")
+
+    def test_broken_links_are_reported_with_locations(self):
+        report = build_site(self.config(check_links=True))
+        self.assertEqual((report.links_checked, report.broken_links), (2, []))
+        self.assertIn('<h2 id="more">More</h2>', self.read("public/blog/post.html"))
+
+        self.write("content/blog/post.md", "# Post\n\nBack [home](../index.html#intro)\n\n## Renamed\n")
+        report = build_site(self.config(check_links=True))
+        # index.md wasn't rendered again, but its link is still checked.
+        self.assertEqual(report.rendered, ["blog/post.md"])
+        self.assertEqual(
+            report.broken_links,
+            [(self.path("content/index.md") + ":3", "/blog/post.html#more", "no #more anchor on /blog/post.html")],
+        )
+        self.assertIn(
+            f"broken link: {self.path('content/index.md')}:3: /blog/post.html#more (no #more anchor on /blog/post.html)",
+            report.summary(),
+        )
+
+    def test_deleted_page_breaks_links(self):
+        build_site(self.config(check_links=True))
+        os.remove(self.path("content/blog/post.md"))
+        report = build_site(self.config(check_links=True))
+        self.assertEqual([link[2] for link in report.broken_links], ["no such page"])
+
+    def test_assets_are_checked_on_request(self):
+        self.write("content/about.md", "# About\n\n![x](/styles.css) ![y](/missing.png)")
+        self.assertEqual(build_site(self.config(check_links=True)).broken_links, [])
+        report = build_site(self.config(check_assets=True))
+        self.assertEqual(report.broken_links, [(self.path("content/about.md") + ":3", "/missing.png", "no such file")])
+
+    def test_sitemap_and_feed(self):
+        state = WarmState()
+        build_site(self.config(base_url="https://example.com"), state=state)
+        self.assertIn("<loc>https://example.com/blog/post.html</loc>", self.read("public/sitemap.xml"))
+        self.assertIn("<description>Back home</description>", self.read("public/rss.xml"))
+        self.assertIsNone(build_site(self.config(base_url="https://example.com"), state=state).links_checked)
+
+        build_site(self.config(base_url="https://example.org"))
+        self.assertIn("<loc>https://example.org/</loc>", self.read("public/sitemap.xml"))
+        build_site(self.config())
+        self.assertFalse(os.path.exists(self.path("public/sitemap.xml")))
+        self.assertFalse(os.path.exists(self.path("public/rss.xml")))
+        self.assertFalse(os.path.exists(self.path(".cache/links.json")))
+
+    def test_main_fails_on_broken_links(self):
+        self.write("content/about.md", "# About\n\n[gone](/gone.html)")
+        args = [
+            "build",
+            "--content", self.path("content"),
+            "--template", self.path("template.html"),
+            "--static", self.path("static"),
+            "--public", self.path("public"),
+            "--cache-dir", self.path(".cache"),
+            "--check-links",
+        ]
+        with redirect_stdout(StringIO()) as out:
+            self.assertEqual(main.main(args), 1)
+        self.assertIn("links: 3 checked, 1 broken", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
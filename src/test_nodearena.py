@@ -0,0 +1,93 @@
+import unittest
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from nodearena import NodeArena
+
+
+class TestNodeArena(unittest.TestCase):
+    def test_from_node_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("h1", "Title"),
+                ParentNode("p", [LeafNode(None, "Text "), LeafNode("a", "link", {"href": "/x"})]),
+                LeafNode("img", "", {"src": "a.png", "alt": "A"}),
+            ],
+            {"class": "page"},
+        )
+        arena = NodeArena.from_node(node)
+        self.assertEqual(len(arena), 6)
+        self.assertEqual(arena.to_html(), node.to_html())
+        self.assertEqual(arena.root.to_html(), node.to_html())
+
+    def test_view_interface(self):
+        node = ParentNode("p", [LeafNode("b", "bold"), LeafNode("a", "x", {"href": "/"})], {"id": "p1"})
+        root = NodeArena.from_node(node).root
+        self.assertEqual(root.tag, "p")
+        self.assertIsNone(root.value)
+        self.assertEqual(root.props, {"id": "p1"})
+        bold, link = root.children
+        self.assertEqual(bold.tag, "b")
+        self.assertEqual(bold.value, "bold")
+        self.assertIsNone(bold.children)
+        self.assertIsNone(bold.props)
+        self.assertEqual(link.props, {"href": "/"})
+        self.assertEqual(link.to_html(), '<a href="/">x</a>')
+
+    def test_interning(self):
+        arena = NodeArena()
+        items = [arena.leaf("span", str(i), {"class": "item"}) for i in range(100)]
+        arena.parent("div", items, {"class": "item"})
+        self.assertEqual(arena.tag_table, [None, "span", "div"])
+        self.assertEqual(len(arena.props_table), 2)
+        self.assertEqual(
+            arena.to_html(),
+            '<div class="item">' + "".join(f'<span class="item">{i}</span>' for i in range(100)) + "</div>",
+        )
+
+    def test_props_value_types(self):
+        arena = NodeArena()
+        items = [arena.leaf("td", "x", {"data-n": value}) for value in (1, True, [1], [1])]
+        arena.parent("tr", items)
+        self.assertEqual(len(arena.props_table), 5)
+        self.assertEqual(
+            arena.to_html(),
+            '<tr><td data-n="1">x</td><td data-n="True">x</td><td data-n="[1]">x</td><td data-n="[1]">x</td></tr>',
+        )
+
+    def test_shared_subtree_stored_once(self):
+        nav = ParentNode("nav", [LeafNode("a", "Home", {"href": "/"})])
+        node = ParentNode("div", [nav, LeafNode("p", "body"), nav])
+        arena = NodeArena.from_node(node)
+        self.assertEqual(len(arena), 4)
+        self.assertEqual(arena.to_html(), node.to_html())
+
+    def test_deep_nesting(self):
+        node = LeafNode("span", "deep")
+        for _ in range(5000):
+            node = ParentNode("div", [node])
+        self.assertEqual(NodeArena.from_node(node).to_html(), node.to_html())
+
+    def test_errors_match_nodes(self):
+        cases = [
+            (ParentNode(None, [LeafNode("b", "x")]), ValueError, "ParentNode must have a tag"),
+            (ParentNode("div", None), ValueError, "ParentNode must have children"),
+            (ParentNode("div", []), ValueError, "ParentNode must have at least one child"),
+            (ParentNode("div", [LeafNode("p", None)]), ValueError, "LeafNode must have a value"),
+            (ParentNode("div", [HTMLNode("p", "x")]), NotImplementedError, "to_html method not implemented"),
+        ]
+        for node, error, message in cases:
+            with self.assertRaises(error) as context:
+                NodeArena.from_node(node).to_html()
+            self.assertEqual(str(context.exception), message)
+
+
+class TestSlots(unittest.TestCase):
+    def test_nodes_have_no_dict(self):
+        for node in (HTMLNode(), LeafNode("p", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
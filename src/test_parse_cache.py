@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import build
+from block_markdown import parse_markdown, render_markdown
+from build import build_site
+from parse_cache import ParseCache, decode_parsed, encode_parsed
+from test_build import BuildTestCase
+
+MARKDOWN = "# Title\n\nSome **bold** and [a link](/x)\n\n- one\n- _two_\n\n```\ncode <here>\n```\n"
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_encode_round_trip(self):
+        parsed = parse_markdown(MARKDOWN)
+        decoded = decode_parsed(encode_parsed(parsed))
+        self.assertEqual(decoded, parsed)
+        self.assertEqual(render_markdown(decoded), render_markdown(parsed))
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get("ab" * 16))
+        parsed = parse_markdown(MARKDOWN)
+        self.cache.put("ab" * 16, "Title", parsed)
+        self.assertEqual(self.cache.get("ab" * 16), ("Title", parsed))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_corrupt_entry_is_a_miss(self):
+        self.cache.put("cd" * 16, "T", parse_markdown("# T"))
+        with open(self.cache._path("cd" * 16), "wb") as f:
+            f.write(b"\x00garbage")
+        self.assertIsNone(self.cache.get("cd" * 16))
+
+    def test_prune_evicts_least_recently_used(self):
+        for i, key in enumerate(("aa", "bb", "cc")):
+            self.cache.put(key * 16, "T", parse_markdown("# T\n\n" + "x" * 1000))
+            os.utime(self.cache._path(key * 16), ns=(0, i * 1_000_000_000))
+        self.cache.get("aa" * 16)  # now the most recently used
+        size = os.path.getsize(self.cache._path("aa" * 16))
+        removed, freed = self.cache.prune(size * 2)
+        self.assertEqual((removed, freed), (1, size))
+        self.assertIsNone(self.cache.get("bb" * 16))
+        self.assertIsNotNone(self.cache.get("aa" * 16))
+        self.assertIsNotNone(self.cache.get("cc" * 16))
+
+    def test_memory_layer(self):
+        cache = ParseCache(self._tmp.name, memory_entries=2)
+        for key in ("aa", "bb", "cc"):
+            cache.put(key * 16, key, parse_markdown("# T\n\n[](/x)"))
+            os.remove(cache._path(key * 16))
+        self.assertIsNone(cache.get("aa" * 16))  # evicted, and gone from disk
+        title, parsed = cache.get("cc" * 16)
+        self.assertEqual(title, "cc")
+        # Hits hand out fresh nodes; a build filling in link text doesn't
+        # change what the next build gets.
+        parsed[1][1][0].text = "filled in"
+        self.assertEqual(cache.get("cc" * 16)[1][1][1][0].text, "")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_stats_and_stale_versions(self):
+        self.cache.put("ab" * 16, "T", parse_markdown("# T"))
+        stale = os.path.join(self.cache.root, "v0", "ab")
+        os.makedirs(stale)
+        with open(os.path.join(stale, "ab.marshal"), "wb") as f:
+            f.write(b"old")
+        stats = self.cache.stats()
+        self.assertEqual((stats.entries, stats.stale_entries, stats.stale_bytes), (1, 1, 3))
+        self.assertEqual(self.cache.prune()[0], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.cache.root, "v0")))
+        self.assertEqual(self.cache.stats().entries, 1)
+
+
+class TestBuildParseCache(BuildTestCase):
+    def test_template_change_skips_parser(self):
+        build_site(self.config())
+        expected = self.read("public/blog/post.html")
+        self.write("template.html", self.read("template.html") + "\n")
+        with mock.patch.object(build, "parse_markdown", side_effect=AssertionError("parsed")):
+            report = build_site(self.config())
+        self.assertEqual(report.rendered, ["index.md", "blog/post.md"])
+        self.assertEqual((report.parse_hits, report.parse_misses), (2, 0))
+        self.assertEqual(self.read("public/blog/post.html"), expected + "\n")
+
+    def test_disabled(self):
+        report = build_site(self.config(parse_cache=False))
+        self.assertEqual((report.parse_hits, report.parse_misses), (0, 0))
+        self.assertFalse(os.path.exists(self.path(".cache/parse")))
+
+    def test_size_bound_enforced_after_build(self):
+        for i in range(10):
+            self.write(f"content/posts/{i}.md", f"# Post {i}\n\n" + "words " * 200)
+        build_site(self.config(parse_cache_size=4096))
+        stats = ParseCache(self.path(".cache")).stats()
+        self.assertLessEqual(stats.bytes, 4096)
+        self.assertGreater(stats.entries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+import unittest
+
+from block_markdown import parse_markdown
+from build import build_site
+from search import (
+    SearchIndex,
+    decode_postings,
+    encode_postings,
+    page_terms,
+    shard_name,
+)
+from test_build import BuildTestCase
+
+
+class TestTerms(unittest.TestCase):
+    def test_page_terms(self):
+        parsed = parse_markdown("# Hello\n\nThe **Quick** fox, a [Link](/x)\n\n- item_one\n\n```\nprint(x)\n```")
+        self.assertEqual(
+            page_terms("Hello World", parsed),
+            ["fox", "hello", "item_one", "link", "print", "quick", "the", "world"],
+        )
+
+    def test_postings_round_trip(self):
+        ids = [3, 4, 10, 1000]
+        self.assertEqual(encode_postings(ids), [3, 1, 6, 990])
+        self.assertEqual(decode_postings(encode_postings(ids)), ids)
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("python"), "py")
+        self.assertEqual(shard_name("x"), "x")
+        self.assertEqual(shard_name("über"), "_c3bc62")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.state = os.path.join(self._tmp.name, "search.json")
+        self.out = os.path.join(self._tmp.name, "search")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def load(self, **kwargs):
+        return SearchIndex.load(self.state, self.out, **kwargs)
+
+    def shard(self, name):
+        with open(os.path.join(self.out, "terms", f"{name}.json")) as f:
+            return {term: decode_postings(gaps) for term, gaps in json.load(f).items()}
+
+    def test_incremental_updates_touch_only_changed_shards(self):
+        index = self.load()
+        stats = index.update({"a.md": ("A", ["apple", "banana"]), "b.md": ("B", ["apple", "cherry"])}, [])
+        index.save()
+        self.assertEqual((stats.indexed, stats.shards_written, stats.shards), (2, 3, 3))
+        self.assertEqual(self.shard("ap"), {"apple": [0, 1]})
+        cherry = os.path.join(self.out, "terms", "ch.json")
+        os.utime(cherry, ns=(0, 1_000_000_000))
+
+        index = self.load()
+        stats = index.update({"a.md": ("A", ["apple", "date"]), "b.md": ("B", ["apple", "cherry"])}, [])
+        self.assertEqual((stats.indexed, stats.shards_written), (1, 2))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "terms", "ba.json")))
+        self.assertEqual(self.shard("da"), {"date": [0]})
+        self.assertEqual(os.stat(cherry).st_mtime_ns, 1_000_000_000)
+
+    def test_delete_and_reuse_ids(self):
+        index = self.load()
+        index.update({"a.md": ("A", ["apple"]), "b.md": ("B", ["apple"])}, [])
+        stats = index.update({}, ["a.md"])
+        self.assertEqual(stats.removed, 1)
+        self.assertEqual(self.shard("ap"), {"apple": [1]})
+        index.update({"c.md": ("C", ["apricot"])}, [])
+        self.assertEqual(index.pages["c.md"][0], 0)
+        with open(os.path.join(self.out, "docs", "0.json")) as f:
+            self.assertEqual(json.load(f), [["/c.html", "C"], ["/b.html", "B"]])
+        with open(os.path.join(self.out, "meta.json")) as f:
+            self.assertEqual(json.load(f)["docs"], 2)
+
+    def test_freed_top_id_is_not_handed_out_twice(self):
+        index = self.load()
+        index.update({"a.md": ("A", ["apple"]), "b.md": ("B", ["berry"]), "c.md": ("C", ["cherry"])}, [])
+        index.save()
+        index = self.load()
+        index.update({}, ["c.md"])
+        index.save()
+        # A later build: d reuses c's freed id, e gets a new one.
+        index = self.load()
+        index.update({"d.md": ("D", ["date"]), "e.md": ("E", ["elder"])}, [])
+        self.assertEqual((index.pages["d.md"][0], index.pages["e.md"][0]), (2, 3))
+        with open(os.path.join(self.out, "docs", "0.json")) as f:
+            self.assertEqual([doc[0] for doc in json.load(f)], ["/a.html", "/b.html", "/d.html", "/e.html"])
+
+    def test_streamed_adds_match_update(self):
+        index = self.load()
+        index.update({"a.md": ("A", ["apple"]), "b.md": ("B", ["apple", "berry"])}, [])
+        expected = (self.shard("ap"), self.shard("be"))
+        index.update({}, ["a.md", "b.md"])
+        index.remove("missing.md")
+        index.add("a.md", "A", ["apple"])
+        index.add("b.md", "B", ["apple", "berry"])
+        # Nothing is written until the flush.
+        self.assertFalse(os.path.exists(os.path.join(self.out, "terms", "be.json")))
+        stats = index.flush()
+        self.assertEqual((stats.indexed, stats.removed), (2, 0))
+        self.assertEqual((self.shard("ap"), self.shard("be")), expected)
+
+    def test_missing_state_resets_output(self):
+        index = self.load()
+        index.update({"a.md": ("A", ["apple"])}, [])
+        index.save()
+        os.remove(self.state)
+        index = self.load()
+        self.assertEqual(index.pages, {})
+        self.assertFalse(os.path.exists(self.out))
+
+
+class TestBuildSearch(BuildTestCase):
+    def test_build_index(self):
+        report = build_site(self.config(search=True))
+        self.assertEqual(report.search.indexed, 2)
+        self.assertTrue(any(line.startswith("search: 2 pages indexed") for line in report.summary()))
+        with open(self.path("public/search/terms/po.json")) as f:
+            self.assertEqual(list(json.load(f)), ["post"])
+
+        self.write("content/blog/post.md", "# Post\n\nA **post** about zebras")
+        report = build_site(self.config(search=True))
+        self.assertEqual((report.search.indexed, report.search.shards_written), (1, 3))
+        with open(self.path("public/search/terms/ze.json")) as f:
+            self.assertEqual(json.load(f), {"zebras": [1]})
+
+        os.remove(self.path("content/blog/post.md"))
+        report = build_site(self.config(search=True))
+        self.assertEqual(report.search.removed, 1)
+        self.assertFalse(os.path.exists(self.path("public/search/terms/ze.json")))
+
+    def test_enabling_indexes_unchanged_pages(self):
+        build_site(self.config())
+        report = build_site(self.config(search=True))
+        self.assertEqual(report.rendered, [])
+        self.assertEqual(report.search.indexed, 2)
+        build_site(self.config())
+        self.assertFalse(os.path.exists(self.path("public/search")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from server import DevRequestHandler, LiveReload, make_server
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        quiet = mock.patch.object(DevRequestHandler, "log_message")
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        self._tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self._tmp.name, "index.html"), "w") as f:
+            f.write("<html><body><p>hi</p></body></html>")
+        with open(os.path.join(self._tmp.name, "styles.css"), "w") as f:
+            f.write("p {}")
+        self.livereload = LiveReload()
+        self.base = self.start(self.livereload)
+
+    def start(self, livereload):
+        httpd = make_server(self._tmp.name, port=0, livereload=livereload)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return f"http://127.0.0.1:{httpd.server_port}"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def get(self, path, base=None):
+        with urlopen((base or self.base) + path, timeout=5) as response:
+            return response.read().decode("utf-8")
+
+    def test_html_gets_livereload_script(self):
+        html = self.get("/")
+        self.assertTrue(html.startswith("<html><body><p>hi</p><script>"))
+        self.assertTrue(html.endswith("</body></html>"))
+        self.assertEqual(self.get("/styles.css"), "p {}")
+
+    def test_livereload_endpoint(self):
+        self.assertEqual(self.get("/__livereload?since="), "1")
+        threading.Timer(0.05, self.livereload.notify).start()
+        self.assertEqual(self.get("/__livereload?since=1"), "2")
+
+    def test_no_livereload_without_watch(self):
+        base = self.start(None)
+        self.assertEqual(self.get("/", base), "<html><body><p>hi</p></body></html>")
+        with self.assertRaises(HTTPError) as context:
+            self.get("/__livereload?since=", base)
+        self.assertEqual(context.exception.code, 404)
+        context.exception.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import template as template_module
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template.compile(TEMPLATE)
+        self.assertEqual(
+            template.parts,
+            ("<html><title>", "Title", "</title><body>", "Content", "</body></html>"),
+        )
+        self.assertEqual(template.slots, ("Title", "Content"))
+
+    def test_render_strings_and_nodes(self):
+        template = Template.compile(TEMPLATE)
+        content = ParentNode("div", [LeafNode("p", "Hi")])
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": content}),
+            "<html><title>Home</title><body><div><p>Hi</p></div></body></html>",
+        )
+
+    def test_missing_values_are_left_alone(self):
+        template = Template.compile("{{ Title }} {{ Other }}{{not a slot}}")
+        self.assertEqual(template.render({"Title": "x"}), "x {{ Other }}{{not a slot}}")
+
+    def test_value_containing_placeholder(self):
+        template = Template.compile(TEMPLATE)
+        html = template.render({"Title": "{{ Content }}", "Content": "body"})
+        self.assertEqual(html, "<html><title>{{ Content }}</title><body>body</body></html>")
+
+    def test_no_placeholders(self):
+        self.assertEqual(Template.compile("plain").render({}), "plain")
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            cache_dir = os.path.join(tmp, "cache")
+            with open(path, "w") as f:
+                f.write(TEMPLATE + "<!-- disk cache test -->")
+            template, template_hash, _ = load_template(path, cache_dir)
+            cached = os.path.join(cache_dir, "templates", f"{template_hash}.marshal")
+            self.assertTrue(os.path.exists(cached))
+            again, again_hash, _ = load_template(path, cache_dir)
+            self.assertIs(again, template)
+            self.assertEqual(again_hash, template_hash)
+
+            # A fresh process: nothing memoized, so the compiled parts come
+            # from the marshal file without compiling again.
+            with mock.patch.dict(template_module._compiled, clear=True):
+                with mock.patch.object(Template, "compile", side_effect=AssertionError("compiled")):
+                    loaded, loaded_hash, _ = load_template(path, cache_dir)
+                self.assertIsNot(loaded, template)
+                self.assertEqual(loaded.parts, template.parts)
+                self.assertIs(template_module._compiled[template_hash], loaded)
+
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            changed, changed_hash, _ = load_template(path, cache_dir)
+            self.assertNotEqual(changed_hash, template_hash)
+            self.assertEqual(changed.slots, ("Content",))
+
+
+class TestIncludes(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_nested_includes(self):
+        path = self.write("template.html", "<body>{{ include partials/nav.html }}{{ Content }}</body>")
+        self.write("partials/nav.html", "<nav>{{ include links.html }}</nav>")
+        self.write("partials/links.html", "<a>{{ Title }}</a>")
+        template, template_hash, sources = load_template(path)
+        self.assertEqual(template.render({"Title": "T", "Content": "c"}), "<body><nav><a>T</a></nav>c</body>")
+        nav = os.path.join(self.root, "partials", "nav.html")
+        links = os.path.join(self.root, "partials", "links.html")
+        self.assertEqual(list(sources), [path, nav, links])
+        self.assertEqual(sources[path][2], [nav])
+
+        self.write("partials/links.html", "<b>{{ Title }}</b>")
+        changed, changed_hash, _ = load_template(path)
+        self.assertNotEqual(changed_hash, template_hash)
+        self.assertEqual(changed.render({"Title": "T", "Content": "c"}), "<body><nav><b>T</b></nav>c</body>")
+
+    def test_missing_include(self):
+        path = self.write("template.html", "{{ include nope.html }}")
+        with self.assertRaises(ValueError) as context:
+            load_template(path)
+        self.assertIn("Template include not found", str(context.exception))
+
+    def test_include_cycle(self):
+        path = self.write("template.html", "{{ include a.html }}")
+        self.write("a.html", "{{ include template.html }}")
+        with self.assertRaises(ValueError) as context:
+            load_template(path)
+        self.assertIn("Template include cycle", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
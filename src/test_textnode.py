@@ -1,5 +1,5 @@
 import unittest
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, text_node_to_html_node, text_nodes_to_html, text_nodes_to_html_nodes
 from htmlnode import LeafNode
 
 class TestTextNode(unittest.TestCase):
@@ -163,5 +163,47 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.props, {"href": "https://example.com/search?q=test"})
 
 
+class TestBatchConversion(unittest.TestCase):
+    def setUp(self):
+        self.nodes = [
+            TextNode("plain ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode("it", TextType.ITALIC),
+            TextNode("x = 1", TextType.CODE),
+            TextNode("go", TextType.LINK, '/a?b=1&c="2"'),
+            TextNode('alt "text"', TextType.IMAGE, "/i.png"),
+        ]
+
+    def test_nodes_match_single_conversion(self):
+        html_nodes = text_nodes_to_html_nodes(self.nodes)
+        self.assertEqual(
+            [node.to_html() for node in html_nodes],
+            [text_node_to_html_node(node).to_html() for node in self.nodes],
+        )
+
+    def test_html_matches_leaf_nodes(self):
+        expected = "".join(text_node_to_html_node(node).to_html() for node in self.nodes)
+        self.assertEqual(text_nodes_to_html(self.nodes), expected)
+        self.assertEqual(text_nodes_to_html(iter(self.nodes)), expected)
+        self.assertEqual(text_nodes_to_html([]), "")
+
+    def test_batch_missing_url_errors(self):
+        for text_type, message in (
+            (TextType.LINK, "Link TextNode must have a URL"),
+            (TextType.IMAGE, "Image TextNode must have a URL"),
+        ):
+            for convert in (text_nodes_to_html_nodes, text_nodes_to_html):
+                with self.assertRaises(ValueError) as context:
+                    convert([TextNode("x", TextType.TEXT), TextNode("x", text_type)])
+                self.assertEqual(str(context.exception), message)
+
+    def test_batch_invalid_text_type(self):
+        node = TextNode("x", "bogus")
+        for convert in (text_nodes_to_html_nodes, text_nodes_to_html):
+            with self.assertRaises(ValueError) as context:
+                convert([node])
+            self.assertEqual(str(context.exception), "Invalid text type: bogus")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
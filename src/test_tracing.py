@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from build import build_site
+from main import main
+from test_build import BuildTestCase
+from tracing import NULL_TRACER, MemoryBudgetExceeded, Tracer
+
+
+class TestTracer(unittest.TestCase):
+    def test_span_events(self):
+        tracer = Tracer()
+        with tracer.span("render", "stage", pages=2):
+            with tracer.span("page", path="a.md"):
+                pass
+        page, render = tracer.events
+        self.assertEqual(page["name"], "page")
+        self.assertEqual(page["args"], {"path": "a.md"})
+        self.assertEqual(render["cat"], "stage")
+        self.assertEqual(render["ph"], "X")
+        self.assertLessEqual(render["ts"], page["ts"])
+        self.assertGreaterEqual(render["dur"], page["dur"])
+        self.assertEqual(tracer.summary()[0].split(":")[0], "stage render")
+
+    def test_memory_peaks(self):
+        tracer = Tracer(memory=True)
+        tracemalloc.start()
+        try:
+            with tracer.span("alloc", "stage"):
+                data = [bytes(1024) for _ in range(1000)]
+        finally:
+            tracemalloc.stop()
+        del data
+        self.assertGreater(tracer.stage_peaks["alloc"], 1024 * 1000)
+        self.assertIn("peak_kib", tracer.events[0]["args"])
+
+    def test_memory_budget(self):
+        tracer = Tracer(memory_limit=512 * 1024)
+        tracemalloc.start()
+        try:
+            with tracer.span("small", "stage"):
+                data = bytes(1024)
+            with self.assertRaises(MemoryBudgetExceeded) as raised:
+                with tracer.span("big", "stage"):
+                    data = [bytes(1024) for _ in range(1000)]
+                    tracer.check_memory()
+                    self.fail("check_memory() should have raised")
+        finally:
+            tracemalloc.stop()
+        del data
+        self.assertEqual(raised.exception.stage, "big")
+        self.assertGreater(raised.exception.peak, 512 * 1024)
+        self.assertIn("MiB memory budget", str(raised.exception))
+        self.assertEqual(set(tracer.stage_peaks), {"small", "big"})
+        self.assertIsNone(tracer.stage)
+
+    def test_write(self):
+        tracer = Tracer()
+        with tracer.span("x"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            tracer.write(path)
+            with open(path) as f:
+                self.assertEqual(len(json.load(f)["traceEvents"]), 1)
+
+    def test_null_tracer(self):
+        with NULL_TRACER.span("x", "stage", path="a"):
+            pass
+        self.assertEqual(NULL_TRACER.summary(), [])
+        self.assertFalse(NULL_TRACER.enabled)
+
+
+class TestBuildTracing(BuildTestCase):
+    def test_build_records_stages_and_pages(self):
+        tracer = Tracer()
+        build_site(self.config(), tracer=tracer)
+        names = [event["name"] for event in tracer.events]
+        for name in ("discover", "render", "assets", "manifest", "build", "read", "parse", "serialize", "write"):
+            self.assertIn(name, names)
+        pages = [event["args"]["path"] for event in tracer.events if event["name"] == "page"]
+        self.assertEqual(pages, ["index.md", "blog/post.md"])
+
+    def test_parallel_build_collects_worker_events(self):
+        for i in range(4):
+            self.write(f"content/p{i}.md", f"# P{i}")
+        tracer = Tracer()
+        build_site(self.config(jobs=2), tracer=tracer)
+        pages = [event for event in tracer.events if event["name"] == "page"]
+        self.assertEqual(len(pages), 6)
+        self.assertTrue(all(event["pid"] != tracer.pid for event in pages))
+
+    def test_max_memory_fails_build(self):
+        out = StringIO()
+        args = ["build", "--content", self.path("content"), "--template", self.path("template.html"),
+                "--static", self.path("static"), "--public", self.path("public"), "--cache-dir", self.path(".cache")]
+        with redirect_stdout(out), self.assertRaises(SystemExit) as raised:
+            with mock.patch("sys.stderr", StringIO()) as err:
+                main([*args, "--max-memory", "1K"])
+        self.assertEqual(raised.exception.code, 1)
+        self.assertIn("build failed: stage", err.getvalue())
+        self.assertIn("peak", out.getvalue())
+        self.assertFalse(tracemalloc.is_tracing())
+
+        with redirect_stdout(StringIO()):
+            main([*args, "--max-memory", "256M"])
+        self.assertTrue(os.path.exists(self.path("public/index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
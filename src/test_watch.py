@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from watch import Watcher, diff_snapshots, snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        os.makedirs(os.path.join(self.root, "content", "blog"))
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+        self.write("template.html", "{{ Content }}")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, text):
+        with open(self.path(rel_path), "w") as f:
+            f.write(text)
+
+    def test_snapshot_dirs_and_files(self):
+        files = snapshot([self.path("content"), self.path("template.html"), self.path("missing")])
+        self.assertEqual(
+            sorted(files),
+            sorted([self.path("content/index.md"), self.path("content/blog/post.md"), self.path("template.html")]),
+        )
+
+    def test_diff(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), {"b", "c", "d"})
+
+    def test_watcher_poll(self):
+        watcher = Watcher([self.path("content")])
+        self.assertEqual(watcher.poll(), set())
+        self.write("content/blog/post.md", "# Post, edited")
+        os.remove(self.path("content/index.md"))
+        self.assertEqual(
+            watcher.poll(),
+            {self.path("content/blog/post.md"), self.path("content/index.md")},
+        )
+        self.assertEqual(watcher.poll(), set())
+        self.assertGreater(watcher.last_scan_seconds, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
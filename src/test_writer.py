@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import writer
+from build import build_site
+from test_build import BuildTestCase
+from writer import OutputWriter, write_output
+
+
+class TestWriteOutput(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "out", "page.html")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_identical_output_keeps_mtime(self):
+        self.assertTrue(write_output(self.path, b"<p>hi</p>"))
+        os.utime(self.path, ns=(0, 1_000_000_000))
+        self.assertFalse(write_output(self.path, b"<p>hi</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+
+    def test_same_size_different_bytes(self):
+        write_output(self.path, b"<p>hi</p>")
+        self.assertTrue(write_output(self.path, b"<p>yo</p>"))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>yo</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["page.html"])
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_writes_and_counts(self):
+        paths = [os.path.join(self._tmp.name, f"p{i}.html") for i in range(20)]
+        write_output(paths[0], b"page 0")
+        with OutputWriter(workers=3) as out:
+            for i, path in enumerate(paths):
+                out.submit(path, f"page {i}".encode())
+        self.assertEqual((out.written, out.unchanged), (19, 1))
+        with open(paths[7], "rb") as f:
+            self.assertEqual(f.read(), b"page 7")
+
+    def test_backpressure_bounds_pending_bytes(self):
+        release = threading.Event()
+        peak = []
+        out = OutputWriter(workers=2, max_pending=100)
+
+        def slow_write(path, data):
+            release.wait()
+            return True
+
+        def submit_all():
+            for i in range(10):
+                out.submit(f"p{i}", b"x" * 40)
+                peak.append(out._pending)
+
+        with mock.patch.object(writer, "write_output", slow_write):
+            producer = threading.Thread(target=submit_all)
+            producer.start()
+            producer.join(0.2)
+            # Two 40-byte pages fit in the 100-byte budget; the third waits.
+            self.assertTrue(producer.is_alive())
+            self.assertEqual(peak, [40, 80])
+            release.set()
+            producer.join()
+            out.close()
+        self.assertLessEqual(max(peak), 100)
+        self.assertEqual(out.written, 10)
+
+    def test_max_pages_bounds_queued_pages(self):
+        release = threading.Event()
+        queued = []
+        out = OutputWriter(workers=1, max_pages=3)
+
+        def slow_write(path, data):
+            release.wait()
+            return True
+
+        def submit_all():
+            for i in range(6):
+                out.submit(f"p{i}", b"x")
+                queued.append(out._queued)
+
+        with mock.patch.object(writer, "write_output", slow_write):
+            producer = threading.Thread(target=submit_all)
+            producer.start()
+            producer.join(0.2)
+            # Tiny pages, but only three may wait for the disk.
+            self.assertTrue(producer.is_alive())
+            self.assertEqual(queued, [1, 2, 3])
+            release.set()
+            producer.join()
+            out.close()
+        self.assertLessEqual(max(queued), 3)
+        self.assertEqual(out.written, 6)
+
+    def test_errors_are_raised(self):
+        missing_dir = os.path.join(self._tmp.name, "file")
+        with open(missing_dir, "w"):
+            pass
+        out = OutputWriter(workers=1)
+        out.submit(os.path.join(missing_dir, "page.html"), b"x")
+        with self.assertRaises(OSError):
+            out.close()
+
+
+class TestBuildOutputs(BuildTestCase):
+    def test_force_rebuild_leaves_identical_outputs(self):
+        build_site(self.config())
+        path = self.path("public/index.html")
+        os.utime(path, ns=(0, 1_000_000_000))
+        self.write("content/blog/post.md", "# Post\n\nChanged")
+        report = build_site(self.config(force=True))
+        self.assertEqual(report.rendered, ["index.md", "blog/post.md"])
+        self.assertEqual((report.outputs_written, report.outputs_unchanged), (1, 1))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1_000_000_000)
+        self.assertTrue(any(line.startswith("outputs: 1 written") for line in report.summary()))
+
+
+if __name__ == "__main__":
+    unittest.main()
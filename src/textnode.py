@@ -1,5 +1,5 @@
 from enum import Enum
-from htmlnode import LeafNode
+from htmlnode import LeafNode, escape_attr
 
 class TextType(Enum):
     TEXT = "text"
@@ -10,6 +10,8 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -23,28 +25,74 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
+def _link_node(text_node):
+    if text_node.url is None:
+        raise ValueError("Link TextNode must have a URL")
+    return LeafNode("a", text_node.text, {"href": text_node.url})
+
+
+def _image_node(text_node):
+    if text_node.url is None:
+        raise ValueError("Image TextNode must have a URL")
+    return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+
+
+def _link_html(text_node):
+    if text_node.url is None:
+        raise ValueError("Link TextNode must have a URL")
+    return f'<a href="{escape_attr(text_node.url)}">{text_node.text}</a>'
+
+
+def _image_html(text_node):
+    if text_node.url is None:
+        raise ValueError("Image TextNode must have a URL")
+    return f'<img src="{escape_attr(text_node.url)}" alt="{escape_attr(text_node.text)}">'
+
+
+# TextType -> function building the LeafNode for a text node
+_TO_HTML_NODE = {
+    TextType.TEXT: lambda text_node: LeafNode(None, text_node.text),
+    TextType.BOLD: lambda text_node: LeafNode("b", text_node.text),
+    TextType.ITALIC: lambda text_node: LeafNode("i", text_node.text),
+    TextType.CODE: lambda text_node: LeafNode("code", text_node.text),
+    TextType.LINK: _link_node,
+    TextType.IMAGE: _image_node,
+}
+
+# Tags for the types that render as <tag>text</tag> with no attributes
+_SIMPLE_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i", TextType.CODE: "code"}
+
+# TextType -> function rendering a text node straight to its HTML string
+_TO_HTML = {TextType.LINK: _link_html, TextType.IMAGE: _image_html}
+
+
+def _invalid_text_type(text_node):
+    raise ValueError(f"Invalid text type: {text_node.text_type}")
+
+
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-        
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-        
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-        
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-        
-    elif text_node.text_type == TextType.LINK:
-        if text_node.url is None:
-            raise ValueError("Link TextNode must have a URL")
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-        
-    elif text_node.text_type == TextType.IMAGE:
-        if text_node.url is None:
-            raise ValueError("Image TextNode must have a URL")
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-        
-    else:
-        raise ValueError(f"Invalid text type: {text_node.text_type}")
\ No newline at end of file
+    return _TO_HTML_NODE.get(text_node.text_type, _invalid_text_type)(text_node)
+
+
+def text_nodes_to_html_nodes(text_nodes):
+    to_node = _TO_HTML_NODE.get
+    return [to_node(node.text_type, _invalid_text_type)(node) for node in text_nodes]
+
+
+def text_nodes_to_html(text_nodes):
+    # Same output as joining text_node_to_html_node(node).to_html() for
+    # every node, without building the intermediate LeafNodes.
+    simple_tags = _SIMPLE_TAGS
+    to_html = _TO_HTML
+    parts = []
+    append = parts.append
+    for node in text_nodes:
+        text_type = node.text_type
+        if text_type is TextType.TEXT:
+            append(node.text)
+        elif text_type in simple_tags:
+            tag = simple_tags[text_type]
+            append(f"<{tag}>{node.text}</{tag}>")
+        else:
+            append(to_html.get(text_type, _invalid_text_type)(node))
+    return "".join(parts)
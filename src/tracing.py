@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class MemoryBudgetExceeded(Exception):
+    def __init__(self, stage, peak, limit):
+        super().__init__(
+            f"stage {stage} peaked at {peak / 1048576:.1f} MiB, "
+            f"over the {limit / 1048576:.1f} MiB memory budget"
+        )
+        self.stage = stage
+        self.peak = peak
+        self.limit = limit
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        if self.category == "stage" and self.tracer.memory:
+            tracemalloc.reset_peak()
+            self.tracer.stage = self.name
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        tracer = self.tracer
+        args = self.args
+        if self.category == "stage" and tracer.memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracer.stage_peaks[self.name] = max(tracer.stage_peaks.get(self.name, 0), peak)
+            args = dict(args, peak_kib=peak // 1024)
+            tracer.stage = None
+        # Chrome trace-event "complete" event; timestamps in microseconds.
+        event = {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.start // 1000,
+            "dur": (end - self.start) // 1000,
+            "pid": tracer.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        tracer.events.append(event)
+        if self.category == "stage" and exc_type is None and tracer.memory_limit is not None:
+            if peak > tracer.memory_limit:
+                raise MemoryBudgetExceeded(self.name, peak, tracer.memory_limit)
+        return False
+
+
+class Tracer:
+    # Records spans as Chrome trace events (load the file in chrome://tracing
+    # or Perfetto). With memory=True, spans in the "stage" category also
+    # record the tracemalloc peak reached while they were open, and with a
+    # memory_limit (bytes) a stage whose peak goes over it raises
+    # MemoryBudgetExceeded, at the end of the stage or at the next
+    # check_memory() call inside it.
+    enabled = True
+
+    def __init__(self, memory=False, memory_limit=None):
+        self.memory = memory or memory_limit is not None
+        self.memory_limit = memory_limit
+        self.pid = os.getpid()
+        self.events = []
+        self.stage_peaks = {}
+        # the stage span currently open, when tracking memory
+        self.stage = None
+
+    def span(self, name, category="page", **args):
+        return _Span(self, name, category, args)
+
+    def extend(self, events):
+        self.events.extend(events)
+
+    def check_memory(self):
+        # Cheap enough to call once per page from long-running stages.
+        if self.memory_limit is None or self.stage is None:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        if peak > self.memory_limit:
+            self.stage_peaks[self.stage] = max(self.stage_peaks.get(self.stage, 0), peak)
+            raise MemoryBudgetExceeded(self.stage, peak, self.memory_limit)
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self):
+        totals = {}
+        for event in self.events:
+            if event["cat"] == "stage":
+                totals[event["name"]] = totals.get(event["name"], 0) + event["dur"]
+        lines = []
+        for name, micros in totals.items():
+            line = f"stage {name}: {micros / 1000:.1f} ms"
+            if name in self.stage_peaks:
+                line += f", peak {self.stage_peaks[name] / 1024:.0f} KiB"
+            lines.append(line)
+        return lines
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _NullTracer:
+    # Stand-in used when tracing is off: span() hands back one shared no-op
+    # context manager, so instrumented code pays only a method call.
+    enabled = False
+    memory = False
+    events = ()
+    stage_peaks = {}
+    _span = _NullSpan()
+
+    def span(self, name, category="page", **args):
+        return self._span
+
+    def extend(self, events):
+        pass
+
+    def check_memory(self):
+        pass
+
+    def summary(self):
+        return []
+
+
+NULL_TRACER = _NullTracer()
@@ -0,0 +1,60 @@
+import os
+import time
+
+
+def snapshot(roots):
+    # Maps every file under roots (directories or single files) to its
+    # (mtime_ns, size), with one os.scandir pass per directory.
+    files = {}
+    stack = []
+    for root in roots:
+        try:
+            st = os.stat(root)
+        except FileNotFoundError:
+            continue
+        if os.path.isdir(root):
+            stack.append(root)
+        else:
+            files[root] = (st.st_mtime_ns, st.st_size)
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files[entry.path] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    changed = {path for path, key in new.items() if old.get(path) != key}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+class Watcher:
+    def __init__(self, roots):
+        self.roots = list(roots)
+        self.last_scan_seconds = 0.0
+        self.files = self._scan()
+
+    def _scan(self):
+        start = time.perf_counter()
+        files = snapshot(self.roots)
+        self.last_scan_seconds = time.perf_counter() - start
+        return files
+
+    def poll(self):
+        files = self._scan()
+        changed = diff_snapshots(self.files, files)
+        self.files = files
+        return changed
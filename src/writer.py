@@ -0,0 +1,103 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import write_atomic
+from tracing import NULL_TRACER
+
+# Rendered bytes allowed to wait for the disk before submit() blocks.
+DEFAULT_MAX_PENDING = 16 * 1024 * 1024
+
+
+def output_unchanged(path, data):
+    # True if path already holds exactly data. The size check settles most
+    # changed files without reading them.
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def write_output(path, data):
+    # Writes data through a temporary file unless path already holds it,
+    # so identical outputs keep their mtime. Returns True if it wrote.
+    if output_unchanged(path, data):
+        return False
+    write_atomic(path, data)
+    return True
+
+
+class OutputWriter:
+    # Writes rendered pages from a small thread pool so the render loop
+    # doesn't wait on the disk. submit() blocks while more than
+    # max_pending bytes (or, if given, max_pages pages) are queued, which
+    # bounds memory when rendering outruns writing. close() (or leaving the with block) waits for every
+    # write and re-raises the first error.
+    def __init__(self, workers=4, max_pending=DEFAULT_MAX_PENDING, tracer=NULL_TRACER, max_pages=None):
+        self.max_pending = max_pending
+        self.max_pages = max_pages
+        self.tracer = tracer
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+        self._pending = 0
+        self._queued = 0
+        self._error = None
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="output-writer")
+
+    def submit(self, path, data):
+        size = len(data)
+        with self._condition:
+            # A page bigger than the whole budget still goes through, alone.
+            while self._full(size):
+                self._condition.wait()
+            if self._error is not None:
+                raise self._error
+            self._pending += size
+            self._queued += 1
+        self._executor.submit(self._write, path, data)
+
+    def _full(self, size):
+        if self.max_pages is not None and self._queued and self._queued >= self.max_pages:
+            return True
+        return self._pending > 0 and self._pending + size > self.max_pending
+
+    def _write(self, path, data):
+        written = False
+        error = None
+        try:
+            with self.tracer.span("write", path=path):
+                written = write_output(path, data)
+        except BaseException as e:
+            error = e
+        with self._condition:
+            self._pending -= len(data)
+            self._queued -= 1
+            if error is not None:
+                if self._error is None:
+                    self._error = error
+            elif written:
+                self.written += 1
+                self.bytes_written += len(data)
+            else:
+                self.unchanged += 1
+            self._condition.notify_all()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
+        return False